@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import tracemalloc
+from importlib.metadata import PathDistribution
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from pytest_benchmark.fixture import BenchmarkFixture
+
+SitePackages = Callable[[int], Path]
+Projects = Callable[[int], list[PathDistribution]]
+
+
+def record(benchmark: BenchmarkFixture, func: Callable[[], object], **extra: object) -> None:
+    """Trace the peak memory of one more, untimed, call and keep it next to the timings together with ``extra``."""
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    benchmark.extra_info.update(peak_memory_kib=round(peak / 1024), **extra)
+
+
+__all__ = [
+    "Projects",
+    "SitePackages",
+    "record",
+]
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import gzip
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import pytest
+import yaml
+
+from pypi_changes._distributions import HeaderDistribution
+from tests.conftest import (  # ruff:ignore[unused-import] # the fixtures are shared with the test suite
+    _no_index,
+    _no_proxy,
+    option_simple,
+    pypi_server,
+)
+
+if TYPE_CHECKING:
+    from importlib.metadata import PathDistribution
+
+    from bench import Projects, SitePackages
+    from tests.conftest import PyPIServer
+
+
+@pytest.fixture(scope="session")
+def recorded_project() -> dict[str, Any]:
+    """The PyPI JSON API response of pytz, a project with a long release history, as recorded for the test suite."""
+    cassette = Path(__file__).parents[1] / "tests" / "pypi_info_pytz.yaml"
+    [interaction] = yaml.safe_load(cassette.read_text(encoding="utf-8"))["interactions"]
+    return json.loads(gzip.decompress(interaction["response"]["body"]["string"]))  # recorded as served, compressed
+
+
+@pytest.fixture
+def site_packages(tmp_path: Path) -> SitePackages:
+    """Create a synthetic site-packages of the given number of distributions, a mix of dist-info and egg-info."""
+
+    def make(count: int) -> Path:
+        path = tmp_path / f"site-packages-{count}"
+        for at in range(count):
+            name, version = f"project-{at}", f"{at % 7}.{at % 13}.0"
+            if at % 10:
+                meta = path / f"project_{at}-{version}.dist-info" / "METADATA"
+            else:
+                meta = path / f"project_{at}-{version}-py3.12.egg-info" / "PKG-INFO"
+            meta.parent.mkdir(parents=True)
+            header = f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\nSummary: a project\n\n"
+            meta.write_text(header + "A long description.\n" * 200, encoding="utf-8")
+        return path
+
+    return make
+
+
+@pytest.fixture
+def large_projects(
+    tmp_path: Path,
+    pypi_server: PyPIServer,  # ruff:ignore[redefined-while-unused]
+    recorded_project: dict[str, Any],
+) -> Projects:
+    """Serve the given number of large projects from the stand-in PyPI, each a copy of the recorded response."""
+
+    def make(count: int) -> list[PathDistribution]:
+        distributions: list[PathDistribution] = []
+        for at in range(count):
+            name = f"project-{at}"
+            pypi_server.projects[name] = {**recorded_project, "info": {**recorded_project["info"], "name": name}}
+            distributions.append(HeaderDistribution(tmp_path / name, name, "2021.1"))
+        return distributions
+
+    return make
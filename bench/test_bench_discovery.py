@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from bench import record
+from pypi_changes._distributions import _iter_distributions
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_benchmark.fixture import BenchmarkFixture
+
+    from bench import SitePackages
+
+
+@pytest.mark.parametrize("count", [100, 2000])
+def test_iter_distributions(benchmark: BenchmarkFixture, site_packages: SitePackages, count: int) -> None:
+    path = site_packages(count)
+
+    def discover() -> int:
+        return sum(1 for _ in _iter_distributions([path]))
+
+    assert benchmark(discover) == count
+    record(benchmark, discover)
+
+
+@pytest.mark.parametrize("count", [100, 2000])
+def test_iter_distributions_unchanged(
+    benchmark: BenchmarkFixture, site_packages: SitePackages, count: int, tmp_path: Path
+) -> None:
+    path = site_packages(count)
+    sum(1 for _ in _iter_distributions([path], cache_dir=tmp_path / "distributions"))  # the listing of the first run
+
+    def discover() -> int:
+        return sum(1 for _ in _iter_distributions([path], cache_dir=tmp_path / "distributions"))
+
+    assert benchmark(discover) == count
+    record(benchmark, discover)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import os
+from itertools import count
+from typing import TYPE_CHECKING, Callable
+
+import pytest
+
+from bench import record
+from pypi_changes import _info
+from pypi_changes._info import pypi_info
+
+if TYPE_CHECKING:
+    from importlib.metadata import PathDistribution
+    from pathlib import Path
+
+    from pytest_benchmark.fixture import BenchmarkFixture
+    from pytest_mock import MockerFixture
+
+    from bench import Projects
+    from pypi_changes._cli import Options
+    from tests.conftest import PyPIServer
+
+    #: the setup of a benchmark round, the arguments of ``_run``
+    Setup = Callable[[], tuple[tuple[list[PathDistribution], Options], dict[str, object]]]
+
+#: seconds the stand-in server takes per request, a rough round trip to PyPI
+LATENCY = 0.005
+
+
+@pytest.fixture
+def options(option_simple: Options) -> Options:
+    option_simple.jobs = 10
+    option_simple.cache_duration = 3600
+    return option_simple
+
+
+@pytest.fixture
+def fresh_cache(options: Options, pypi_server: PyPIServer, tmp_path: Path) -> Callable[[list[PathDistribution]], Setup]:
+    """Set up each round of fetching the distributions against a cache of its own, counting only its requests."""
+    caches = count()
+
+    def setup_for(distributions: list[PathDistribution]) -> Setup:
+        def setup() -> tuple[tuple[list[PathDistribution], Options], dict[str, object]]:
+            options.cache_path = tmp_path / f"cold-{next(caches)}.sqlite"
+            pypi_server.requests.clear()
+            return (distributions, options), {}
+
+        return setup
+
+    return setup_for
+
+
+def _run(distributions: list[PathDistribution], options: Options) -> None:
+    for pkg in pypi_info(distributions, options):
+        assert pkg.exc is None
+
+
+@pytest.mark.parametrize("projects", [50, 300])
+def test_fetch_cold(
+    benchmark: BenchmarkFixture,
+    large_projects: Projects,
+    pypi_server: PyPIServer,
+    fresh_cache: Callable[[list[PathDistribution]], Setup],
+    projects: int,
+) -> None:
+    setup = fresh_cache(large_projects(projects))
+    pypi_server.delay = LATENCY
+
+    benchmark.pedantic(_run, setup=setup, rounds=3)
+
+    assert len(pypi_server.requests) == projects
+    record(benchmark, lambda: _run(*setup()[0]), requests=projects)
+
+
+@pytest.mark.parametrize("offline", [False, True], ids=["warm", "offline"])
+@pytest.mark.parametrize("projects", [50, 300])
+def test_fetch_from_cache(
+    benchmark: BenchmarkFixture,
+    large_projects: Projects,
+    pypi_server: PyPIServer,
+    options: Options,
+    offline: bool,
+    projects: int,
+) -> None:
+    distributions = large_projects(projects)
+    _run(distributions, options)
+    pypi_server.requests.clear()
+    options.offline = offline
+
+    benchmark(_run, distributions, options)
+
+    assert not pypi_server.requests  # warm within --cache-duration, nothing is asked
+    record(benchmark, lambda: _run(distributions, options), requests=0)
+
+
+@pytest.mark.parametrize("source", ["json", "simple"])
+def test_fetch_source(
+    benchmark: BenchmarkFixture,
+    large_projects: Projects,
+    pypi_server: PyPIServer,
+    options: Options,
+    fresh_cache: Callable[[list[PathDistribution]], Setup],
+    mocker: MockerFixture,
+    source: str,
+) -> None:
+    setup = fresh_cache(large_projects(100))
+    options.source = source
+    stats = mocker.spy(_info, "track_cache_stats")
+
+    benchmark.pedantic(_run, setup=setup, rounds=3)
+
+    requests, downloaded = len(pypi_server.requests), stats.spy_return.fetched_bytes
+    record(benchmark, lambda: _run(*setup()[0]), requests=requests, downloaded_kib=round(downloaded / 1024))
+
+
+def test_fetch_with_index_server(
+    benchmark: BenchmarkFixture,
+    large_projects: Projects,
+    pypi_server: PyPIServer,
+    fresh_cache: Callable[[list[PathDistribution]], Setup],
+    mocker: MockerFixture,
+) -> None:
+    # the stand-in answers as both PyPI and the private index, each request costing a round trip
+    mocker.patch("pypi_changes._info.PYPI_INDEX", "https://pypi.org/simple")
+    mocker.patch.dict(os.environ, {"PIP_INDEX_URL": f"{pypi_server.url}/simple"})
+    setup = fresh_cache(large_projects(100))
+    pypi_server.delay = 4 * LATENCY
+
+    benchmark.pedantic(_run, setup=setup, rounds=3)
+
+    assert len(pypi_server.requests) == 2 * 100  # the JSON API and the index, both asked about every project
+    record(benchmark, lambda: _run(*setup()[0]), requests=2 * 100)
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from bench import record
+from pypi_changes._cache import ReleaseStore
+from pypi_changes._info import PYPI_JSON_API, _normalize
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_benchmark.fixture import BenchmarkFixture
+
+
+def test_normalize(benchmark: BenchmarkFixture, recorded_project: dict[str, Any]) -> None:
+    raw = recorded_project["releases"]
+
+    releases = benchmark(_normalize, raw)
+
+    assert len(releases) == len(raw)
+    record(benchmark, lambda: _normalize(raw), versions=len(raw))
+
+
+def test_release_store_get(benchmark: BenchmarkFixture, recorded_project: dict[str, Any], tmp_path: Path) -> None:
+    releases = _normalize(recorded_project["releases"])
+    with ReleaseStore(tmp_path / "a.sqlite") as store:
+        store.put(PYPI_JSON_API, "pytz", "key", '"etag"', releases)
+
+        assert benchmark(store.get, PYPI_JSON_API, "pytz", '"etag"') == releases
+        record(benchmark, lambda: store.get(PYPI_JSON_API, "pytz", '"etag"'), versions=len(releases))
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from io import StringIO
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable
+
+import pytest
+from rich.console import Console
+
+from bench import record
+from pypi_changes._distributions import HeaderDistribution
+from pypi_changes._info import _normalize
+from pypi_changes._pkg import Package
+from pypi_changes._print import get_sorted_pkg_list
+from pypi_changes._print.json import print_json
+from pypi_changes._print.requirements import print_requirements
+from pypi_changes._print.tree import _new_tree, _package_text, _print_lines, print_tree
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from pytest_benchmark.fixture import BenchmarkFixture
+    from pytest_mock import MockerFixture
+
+    from pypi_changes._cli import Options
+
+
+@pytest.fixture
+def packages(recorded_project: dict[str, Any], tmp_path: Path) -> Callable[[], list[Package]]:
+    releases = _normalize(recorded_project["releases"])
+    versions = list(releases)
+
+    def make() -> list[Package]:  # fresh packages each time, their release lookups are memoized
+        return [
+            Package(HeaderDistribution(tmp_path / str(at), f"project-{at}", versions[at % len(versions)]), releases)
+            for at in range(500)
+        ]
+
+    return make
+
+
+@pytest.mark.parametrize("limit", [None, 20], ids=["all", "top-20"])
+@pytest.mark.parametrize("sort", ["alphabetic", "updated"])
+def test_sort(
+    benchmark: BenchmarkFixture,
+    packages: Callable[[], list[Package]],
+    option_simple: Options,
+    sort: str,
+    limit: int | None,
+) -> None:
+    option_simple.sort = sort
+    option_simple.limit = limit
+    now = datetime.now(timezone.utc)
+
+    def run() -> list[Package]:
+        return list(get_sorted_pkg_list(packages(), option_simple, now))
+
+    assert len(benchmark(run)) == (limit or 500)
+    record(benchmark, run)
+
+
+@pytest.mark.parametrize("printer", [print_tree, print_json, print_requirements], ids=["tree", "json", "requirements"])
+@pytest.mark.parametrize("stream", [False, True], ids=["sorted", "stream"])
+def test_render(
+    benchmark: BenchmarkFixture,
+    packages: Callable[[], list[Package]],
+    option_simple: Options,
+    capsys: pytest.CaptureFixture[str],
+    printer: Callable[[Iterable[Package], Options], None],
+    stream: bool,
+) -> None:
+    option_simple.sort = "updated"
+    option_simple.stream = stream
+
+    benchmark(lambda: printer(packages(), option_simple))
+
+    assert capsys.readouterr().out
+    record(benchmark, lambda: printer(packages(), option_simple))
+
+
+@pytest.mark.parametrize("backend", ["orjson", "json"])
+@pytest.mark.parametrize("compact", [False, True], ids=["indented", "compact"])
+def test_render_json(
+    benchmark: BenchmarkFixture,
+    packages: Callable[[], list[Package]],
+    option_simple: Options,
+    capsys: pytest.CaptureFixture[str],
+    mocker: MockerFixture,
+    compact: bool,
+    backend: str,
+) -> None:
+    if backend == "json":
+        mocker.patch("pypi_changes._print.json._orjson", return_value=None)
+    option_simple.sort = "updated"
+    option_simple.compact = compact
+
+    benchmark(lambda: print_json(packages(), option_simple))
+
+    assert capsys.readouterr().out
+    record(benchmark, lambda: print_json(packages(), option_simple))
+
+
+def _render_tree(console: Console, python: Path, packages: list[Package], now: datetime) -> None:
+    tree = _new_tree(python)
+    for pkg in packages:
+        tree.add(_package_text(pkg, now, link=console.is_terminal))
+    console.print(tree)
+
+
+def _render_lines(console: Console, python: Path, packages: list[Package], now: datetime) -> None:
+    _print_lines(console, python, packages, now, link=console.is_terminal)
+
+
+@pytest.mark.parametrize("renderer", [_render_tree, _render_lines], ids=["tree", "lines"])
+@pytest.mark.parametrize("terminal", [True, False], ids=["terminal", "redirected"])
+@pytest.mark.parametrize("count", [100, 1_000, 10_000])
+def test_render_large_tree(
+    benchmark: BenchmarkFixture,
+    recorded_project: dict[str, Any],
+    tmp_path: Path,
+    renderer: Callable[[Console, Path, list[Package], datetime], None],
+    terminal: bool,
+    count: int,
+) -> None:
+    releases = _normalize(recorded_project["releases"])
+    versions = list(releases)
+    packages = [
+        Package(HeaderDistribution(tmp_path / str(at), f"project-{at}", versions[at % len(versions)]), releases)
+        for at in range(count)
+    ]
+    now = datetime.now(timezone.utc)
+
+    def run() -> int:
+        console = Console(file=StringIO(), force_terminal=terminal, color_system="truecolor" if terminal else None)
+        renderer(console, Path("python"), packages, now)
+        return console.file.getvalue().count("\n")  # ty: ignore[unresolved-attribute]
+
+    assert benchmark(run) == count + 1
+    record(benchmark, run)
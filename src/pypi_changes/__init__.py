@@ -2,22 +2,40 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from contextlib import nullcontext
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
 
 from ._cli import parse_cli_arguments
-from ._distributions import collect_distributions
-from ._info import pypi_info
-from ._print.json import print_json
-from ._print.requirements import print_requirements
-from ._print.tree import print_tree
 from ._version import version
 
 if TYPE_CHECKING:
-    from collections.abc import Sequence
+    from collections.abc import Iterable, Sequence
+
+    from ._api import Checker, check_environment, check_environment_async
+    from ._cli import Options
+    from ._pkg import Package, Release
+    from ._timings import Timings
 
 #: semantic version of the package
 __version__ = version
 
+# the library API pulls in the HTTP stack, load it when first used so that the command line starts fast
+_LAZY = {
+    "Checker": "_api",
+    "Package": "_pkg",
+    "Release": "_pkg",
+    "check_environment": "_api",
+    "check_environment_async": "_api",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if (module := _LAZY.get(name)) is None:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    return getattr(import_module(f".{module}", __name__), name)
+
 
 def main(args: Sequence[str] | None = None) -> int:
     """
@@ -27,19 +45,72 @@ def main(args: Sequence[str] | None = None) -> int:
     :return: exit code
     """
     options = parse_cli_arguments(args)
-    distributions = collect_distributions(options)
-    info = pypi_info(distributions, options)
-
-    if options.output == "tree":
-        print_tree(info, options)
-    elif options.output == "json":
-        print_json(info, options)
-    else:  # output == "requirements"
-        print_requirements(info, options)
+    if options.cache_command is not None:
+        from ._cache import run_cache_command
+
+        return run_cache_command(options)
+    if options.serve:
+        from ._serve import run_server
+
+        return run_server(options)
+    from ._timings import Timings, print_timings, profile
+
+    output = options.timings
+    with nullcontext() if options.profile is None else profile(options.profile):
+        timings = None if output is None else Timings()
+        _run(options, timings)
+    if timings is not None and output is not None:  # set together, checking both narrows each
+        print_timings(timings, output)
     return 0
 
 
+def _run(options: Options, timings: Timings | None) -> None:
+    from ._distributions import collect_distributions, file_distributions
+    from ._serve import served_info
+    from ._timings import phase
+
+    if options.prefetch is not None:
+        distributions = file_distributions(options.prefetch)
+    else:
+        with phase(timings, "discover"):
+            distributions = collect_distributions(options, timings)
+    # a serve process of the cache answers from memory, unless fetching here is the point (warming, offline, timing)
+    local = options.no_server or options.prefetch is not None or options.offline or timings is not None
+    info: Iterable[Package] | None = None if local else served_info(distributions, options)
+    if info is None:
+        from ._info import pypi_info
+
+        info = pypi_info(distributions, options, timings)
+    if timings is not None:  # the printers pull the packages, time spent waiting for them is fetching not rendering
+        info = timings.track(info, "fetch", within=None if options.prefetch else "render")
+    if options.prefetch is not None:  # warm the cache only, nothing to show
+        for _ in info:
+            pass
+        return
+    if options.only_outdated:  # before the printers sort, so they only ever see what is shown
+        info = (pkg for pkg in info if pkg.outdated)
+
+    with phase(timings, "render"):
+        if options.output == "tree":
+            from ._print.tree import print_tree
+
+            print_tree(info, options)
+        elif options.output == "json":
+            from ._print.json import print_json
+
+            print_json(info, options)
+        else:  # output == "requirements"
+            from ._print.requirements import print_requirements
+
+            print_requirements(info, options)
+
+
 __all__ = [
+    "Checker",
+    "Package",
+    "Release",
     "__version__",
+    "check_environment",
+    "check_environment_async",
     "main",
 ]
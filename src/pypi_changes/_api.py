@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from ._cli import default_options, resolve_pythons
+from ._distributions import collect_distributions
+from ._info import Lookup
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from types import TracebackType
+    from typing import Self
+
+    from ._cli import Options
+    from ._pkg import Package
+
+
+class Checker:
+    """
+    Check Python environments for outdated packages from a program, without any terminal output.
+
+    The HTTP session with its connection pools, the caches and the index server clients stay open across checks, so a
+    long running process should create one and reuse it. Close it when done, or use it as a context manager.
+    """
+
+    def __init__(  # ruff:ignore[too-many-arguments]
+        self,
+        *,
+        jobs: int | None = None,
+        host_limits: dict[str, int] | None = None,
+        source: str | None = None,
+        cache_path: Path | None = None,
+        cache_duration: int | None = None,
+        cache_max_size: int | None = None,
+        not_found_duration: int | None = None,
+        not_published: Sequence[str] | None = None,
+        offline: bool | None = None,
+    ) -> None:
+        """
+        Create a checker, the settings not passed take their command line default.
+
+        :param jobs: maximum number of parallel requests
+        :param host_limits: at most this many parallel requests to a host
+        :param source: read release history from the ``json`` API or the ``simple`` index
+        :param cache_path: the SQLite file caching the requests
+        :param cache_duration: seconds to cache requests, ``0`` always revalidates, ``-1`` caches forever
+        :param cache_max_size: megabytes the cache is kept within
+        :param not_found_duration: seconds a project answered with ``404`` is not asked about again
+        :param not_published: name patterns of projects not to look up
+        :param offline: answer only from the cache, never connecting to the network
+        """
+        settings: dict[str, Any] = {
+            "jobs": jobs,
+            "host_limits": host_limits,
+            "source": source,
+            "cache_path": cache_path,
+            "cache_duration": cache_duration,
+            "cache_max_size": cache_max_size,
+            "not_found_duration": not_found_duration,
+            "not_published": None if not_published is None else list(not_published),
+            "offline": offline,
+        }
+        self._options = default_options()
+        for key, value in settings.items():
+            if value is not None:
+                setattr(self._options, key, value)
+        self._lookup = Lookup(self._options)
+        self._executor = ThreadPoolExecutor(thread_name_prefix="check")
+
+    def check(self, python: str | Path | Sequence[str | Path] | None = None) -> list[Package]:
+        """
+        Check environments for outdated packages.
+
+        :param python: interpreters, virtual environments or directories (or globs) of them, or requirements and lock
+            files, by default the running one
+        :return: the packages of the environments, in the order of the environments and then by name
+        """
+        options = self._options_for(python)
+        distributions = collect_distributions(options, show_status=False)
+        packages = list(self._lookup.packages(distributions))
+        self._lookup.evict()
+        return _sorted(packages, options)
+
+    async def check_async(self, python: str | Path | Sequence[str | Path] | None = None) -> list[Package]:
+        """
+        Check environments for outdated packages from a running event loop, see :meth:`check`.
+
+        The check runs on a worker thread, its requests on a thread pool of at most ``jobs`` threads, so the event loop
+        is never blocked.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.check, python)
+
+    def _options_for(self, python: str | Path | Sequence[str | Path] | None) -> Options:
+        options = copy(self._options)
+        if python is None:
+            python = sys.executable
+        options.python = resolve_pythons([python] if isinstance(python, (str, Path)) else python)
+        return options
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self._lookup.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+def _sorted(packages: list[Package], options: Options) -> list[Package]:
+    order = {python: at for at, python in enumerate(options.python)}
+    return sorted(packages, key=lambda pkg: (-1 if pkg.python is None else order[pkg.python], pkg.name.lower()))
+
+
+def check_environment(python: str | Path | Sequence[str | Path] | None = None, **settings: Any) -> list[Package]:
+    """
+    Check environments for outdated packages, a one off :meth:`Checker.check`.
+
+    :param python: interpreters, virtual environments or directories (or globs) of them, or requirements and lock
+        files, by default the running one
+    :param settings: the settings of the :class:`Checker`
+    :return: the packages of the environments
+    """
+    with Checker(**settings) as checker:
+        return checker.check(python)
+
+
+async def check_environment_async(
+    python: str | Path | Sequence[str | Path] | None = None, **settings: Any
+) -> list[Package]:
+    """
+    Check environments for outdated packages from a running event loop, a one off :meth:`Checker.check_async`.
+
+    :param python: interpreters, virtual environments or directories (or globs) of them, or requirements and lock
+        files, by default the running one
+    :param settings: the settings of the :class:`Checker`
+    :return: the packages of the environments
+    """
+    checker = Checker(**settings)
+    try:
+        return await checker.check_async(python)
+    finally:
+        await asyncio.get_running_loop().run_in_executor(None, checker.close)
+
+
+__all__ = [
+    "Checker",
+    "check_environment",
+    "check_environment_async",
+]
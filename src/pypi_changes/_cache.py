@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from contextlib import closing
+from http import HTTPStatus
+from threading import Lock
+from typing import TYPE_CHECKING, Any, NamedTuple, cast
+
+from humanize import naturalsize
+from requests_cache import CachedSession
+from requests_cache.policy.directives import CacheDirectives
+from rich.console import Console
+
+from ._pkg import releases_from_rows, releases_to_rows
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+    from types import TracebackType
+    from typing import Self
+
+    from requests import Response
+    from requests_cache.backends.sqlite import SQLiteCache
+
+    from ._cli import Options
+    from ._pkg import Release
+
+
+class NotCachedError(LookupError):
+    """Raised in offline mode for a request the cache holds no response for."""
+
+
+class CacheStats:
+    """Count how the responses of a run were served: from the cache, revalidated, downloaded or missing offline."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.fetched = 0
+        self.fetched_bytes = 0
+        self.missing = 0
+
+    def record(self, response: Response, *args: Any, **kwargs: Any) -> Response:  # ruff:ignore[unused-method-argument]
+        if (from_cache := getattr(response, "from_cache", None)) is None:
+            return response  # the hook fires for the transport response too, count it once wrapped by the cache layer
+        with self._lock:
+            if not from_cache:
+                self.fetched += 1
+                self.fetched_bytes += len(response.content)
+            elif response.status_code == HTTPStatus.GATEWAY_TIMEOUT:
+                self.missing += 1  # the cache layer answers an offline miss with its own 504, that is not a hit
+            elif getattr(response, "revalidated", False):
+                self.revalidated += 1
+            else:
+                self.hits += 1
+        return response
+
+    def __str__(self) -> str:
+        downloaded = f"{self.fetched} downloaded ({self.fetched_bytes / 1024:.1f} KiB)"
+        summary = f"{self.hits} from cache, {self.revalidated} revalidated, {downloaded}"
+        return f"{summary}, {self.missing} not cached" if self.missing else summary
+
+
+def track_cache_stats(session: CachedSession) -> CacheStats:
+    stats = CacheStats()
+    session.hooks["response"].append(stats.record)
+    return stats
+
+
+class CacheUsage:
+    """Collect the cache keys of the responses a run used, so that eviction drops the least recently used first."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.keys: set[str] = set()
+
+    def record(self, response: Response, *args: Any, **kwargs: Any) -> Response:  # ruff:ignore[unused-method-argument]
+        if (key := getattr(response, "cache_key", None)) is not None:
+            with self._lock:
+                self.keys.add(key)
+        return response
+
+    def drain(self) -> set[str]:
+        """:return: the keys collected since the last call"""
+        with self._lock:
+            keys, self.keys = self.keys, set()
+        return keys
+
+
+def track_cache_usage(session: CachedSession) -> CacheUsage:
+    usage = CacheUsage()
+    session.hooks["response"].append(usage.record)
+    return usage
+
+
+#: responses not used for this long are evicted even if the cache is within its size limit
+MAX_IDLE = 30 * 24 * 3600
+#: the most responses a run evicts, so maintenance costs a run a bounded amount of time however large the cache is
+EVICT_BATCH = 500
+
+
+def evict(path: Path, used: Iterable[str], max_size: int, batch: int | None = EVICT_BATCH) -> int:
+    """
+    Mark the responses used as recently used, then drop the least recently used while the cache is too large or idle.
+
+    :param path: the cache database
+    :param used: cache keys of the responses used since the last call
+    :param max_size: the size in bytes the live data of the cache should stay within
+    :param batch: the most responses to evict in one call, ``None`` for no limit
+    :return: the number of responses evicted
+    """
+    now = int(time.time())
+    limit = -1 if batch is None else batch
+    with closing(sqlite3.connect(str(path), timeout=30, isolation_level=None)) as conn:
+        if not _has_table(conn, "responses"):
+            return 0
+        if not _has_table(conn, "last_used"):  # start tracking, everything already cached counts as used now
+            conn.execute("CREATE TABLE last_used (key TEXT PRIMARY KEY, at INTEGER NOT NULL)")
+            conn.execute("CREATE INDEX last_used_at ON last_used(at)")
+            conn.execute("INSERT INTO last_used SELECT key, ? FROM responses", (now,))
+        conn.executemany("REPLACE INTO last_used VALUES (?, ?)", ((key, now) for key in used))
+        if _has_table(conn, "skips"):  # one row per project and source at most, cheap to sweep in full
+            conn.execute("DELETE FROM skips WHERE until <= ?", (now,))
+        if _has_table(conn, "releases"):  # same size, drops those whose response was deleted without passing here
+            conn.execute("DELETE FROM releases WHERE key NOT IN (SELECT key FROM responses)")
+
+        query = "SELECT key FROM last_used WHERE at < ? ORDER BY at LIMIT ?"  # walks the index, never the table
+        keys = [row[0] for row in conn.execute(query, (now - MAX_IDLE, limit))]
+        _delete(conn, keys)
+        while _live_size(conn) > max_size and (batch is None or len(keys) < batch):
+            step = 50 if batch is None else min(50, batch - len(keys))
+            if not (more := [row[0] for row in conn.execute("SELECT key FROM last_used ORDER BY at LIMIT ?", (step,))]):
+                break
+            _delete(conn, more)
+            keys.extend(more)
+    return len(keys)
+
+
+def _has_table(conn: sqlite3.Connection, name: str) -> bool:
+    query = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?"
+    return conn.execute(query, (name,)).fetchone() is not None
+
+
+def _delete(conn: sqlite3.Connection, keys: list[str]) -> None:
+    for at in range(0, len(keys), 500):  # stay well within the bound parameter limit of older SQLite versions
+        chunk = keys[at : at + 500]
+        marks = ",".join("?" * len(chunk))
+        conn.execute(f"DELETE FROM responses WHERE key IN ({marks})", chunk)  # ruff:ignore[hardcoded-sql-expression]
+        conn.execute(f"DELETE FROM last_used WHERE key IN ({marks})", chunk)  # ruff:ignore[hardcoded-sql-expression]
+        if _has_table(conn, "releases"):  # the releases read from a response go with it
+            conn.execute(f"DELETE FROM releases WHERE key IN ({marks})", chunk)  # ruff:ignore[hardcoded-sql-expression]
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> list[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _live_size(conn: sqlite3.Connection) -> int:
+    # pages freed by deletes are reused rather than returned to the file system, so the file size is no measure
+    page_size, pages, free = (
+        conn.execute(f"PRAGMA {i}").fetchone()[0] for i in ("page_size", "page_count", "freelist_count")
+    )
+    return page_size * (pages - free)
+
+
+class CacheInfo(NamedTuple):
+    path: Path
+    file_size: int
+    live_size: int
+    responses: int
+    expired: int
+    projects: int
+
+
+def cache_info(path: Path) -> CacheInfo:
+    with closing(sqlite3.connect(str(path), timeout=30)) as conn:
+        live_size = _live_size(conn)
+        responses = expired = projects = 0
+        if _has_table(conn, "responses"):
+            responses, expired = conn.execute(
+                "SELECT COUNT(*), COUNT(CASE WHEN expires <= ? THEN 1 END) FROM responses", (int(time.time()),)
+            ).fetchone()
+        if _has_table(conn, "releases"):
+            projects = conn.execute("SELECT COUNT(DISTINCT name) FROM releases").fetchone()[0]
+    return CacheInfo(path, path.stat().st_size, live_size, responses, expired or 0, projects)
+
+
+def vacuum(path: Path) -> None:
+    with closing(sqlite3.connect(str(path), timeout=30, isolation_level=None)) as conn:
+        conn.execute("VACUUM")
+
+
+def run_cache_command(options: Options) -> int:
+    path = options.cache_path
+    if not path.exists():
+        Console(stderr=True).print(f"[red]no cache at {path}")
+        return 1
+    if options.cache_command == "prune":
+        with CachedSession(str(path), backend="sqlite") as session:
+            delete_unusable(session)
+            evicted = evict(path, (), options.cache_max_size * 1024 * 1024, batch=None)
+            cast("SQLiteCache", session.cache).delete(vacuum=False)  # drops the redirects left to evicted responses
+        Console(stderr=True).print(f"evicted {evicted} least recently used responses")
+    elif options.cache_command == "vacuum":
+        vacuum(path)
+    info = cache_info(path)
+    Console().print(
+        f"{info.path}\n"
+        f"  size      {naturalsize(info.file_size, binary=True)} ({naturalsize(info.live_size, binary=True)} in use)\n"
+        f"  responses {info.responses} ({info.expired} expired)\n"
+        f"  projects  {info.projects}",
+        highlight=False,
+    )
+    return 0
+
+
+def delete_unusable(session: CachedSession) -> None:
+    # an expired response carrying an ETag/Last-Modified validator is still useful, it is revalidated with a conditional
+    # request and an unchanged project costs a 304 instead of the full body; only drop those that cannot be revalidated
+    keys = [r.cache_key for r in session.cache.filter(valid=False, expired=True) if not _has_validator(r)]
+    if keys:
+        cast("SQLiteCache", session.cache).delete(*keys, vacuum=False)  # the sessions use the sqlite backend
+
+
+def _has_validator(response: Response) -> bool:
+    return CacheDirectives.from_headers(response.headers).has_validator
+
+
+#: seconds a source (PyPI or an index server) that lists only versions another source has too is not asked about the
+#: project, before checking it again
+SKIP_TTL = 24 * 3600
+
+
+class ReleaseStore:
+    """Normalized release data per source and project, next to the HTTP cache, keyed by its response's validator."""
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        if _columns(self._conn, "releases") not in ([], ["source", "name", "key", "validator", "data"]):
+            self._conn.execute("DROP TABLE releases")  # laid out by an older version, refilled as responses are read
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS releases (source TEXT NOT NULL, name TEXT NOT NULL, key TEXT NOT NULL,"
+            " validator TEXT NOT NULL, data TEXT NOT NULL, PRIMARY KEY (source, name))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS releases_key ON releases(key)")  # evicted with the response
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS skips"
+            " (source TEXT NOT NULL, name TEXT NOT NULL, until INTEGER NOT NULL, PRIMARY KEY (source, name))"
+        )
+
+    def get(self, source: str, name: str, validator: str) -> dict[str, Release] | None:
+        query = "SELECT validator, data FROM releases WHERE source = ? AND name = ?"
+        with self._lock:
+            row = self._conn.execute(query, (source, name)).fetchone()
+        if row is None or row[0] != validator:
+            return None
+        return releases_from_rows(json.loads(row[1]))
+
+    def put(self, source: str, name: str, key: str, validator: str, releases: dict[str, Release]) -> None:
+        """
+        Store the releases read from a response.
+
+        :param source: the source, the PyPI JSON API or the endpoint of an index server
+        :param name: the project
+        :param key: the cache key of the response, the releases are evicted with it
+        :param validator: the validator of the response
+        :param releases: the releases read from it
+        """
+        data = json.dumps(releases_to_rows(releases), separators=(",", ":"))
+        with self._lock:
+            self._conn.execute("REPLACE INTO releases VALUES (?, ?, ?, ?, ?)", (source, name, key, validator, data))
+
+    def skipped(self, source: str, name: str) -> bool:
+        """Check if the source was lately found to add nothing to the project, so it need not be asked about it."""
+        query = "SELECT 1 FROM skips WHERE source = ? AND name = ? AND until > ?"
+        with self._lock:
+            return self._conn.execute(query, (source, name, int(time.time()))).fetchone() is not None
+
+    def skip(self, source: str, name: str, ttl: float) -> None:
+        """
+        Do not ask the source about the project for a while.
+
+        :param source: the source, the PyPI JSON API or the endpoint of an index server
+        :param name: the project
+        :param ttl: seconds to skip the source for, not positive to ask it again from now on
+        """
+        with self._lock:
+            if ttl > 0:
+                self._conn.execute("REPLACE INTO skips VALUES (?, ?, ?)", (source, name, int(time.time() + ttl)))
+            else:
+                self._conn.execute("DELETE FROM skips WHERE source = ? AND name = ?", (source, name))
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+__all__ = [
+    "CacheInfo",
+    "CacheStats",
+    "CacheUsage",
+    "NotCachedError",
+    "ReleaseStore",
+    "cache_info",
+    "delete_unusable",
+    "evict",
+    "run_cache_command",
+    "track_cache_stats",
+    "track_cache_usage",
+    "vacuum",
+]
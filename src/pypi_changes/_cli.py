@@ -1,9 +1,17 @@
 from __future__ import annotations
 
 import shutil
-from argparse import Action, ArgumentDefaultsHelpFormatter, ArgumentError, ArgumentParser, Namespace
+import sys
+from argparse import (
+    Action,
+    ArgumentDefaultsHelpFormatter,
+    ArgumentError,
+    ArgumentParser,
+    ArgumentTypeError,
+    Namespace,
+)
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, cast
 
 from platformdirs import user_cache_path
 
@@ -14,31 +22,70 @@ if TYPE_CHECKING:
 
 
 class Options(Namespace):
-    python: Path
+    python: list[Path]
     jobs: int
+    host_limits: dict[str, int]
+    source: str
     cache_path: Path
     cache_duration: int
+    not_found_duration: int
+    not_published: list[str]
+    cache_max_size: int
+    cache_command: str | None
+    serve: bool
+    no_server: bool
+    offline: bool
+    prefetch: Path | None
     sort: str
+    limit: int | None
+    only_outdated: bool
+    output: str
+    compact: bool
+    stream: bool
+    timings: str | None
+    profile: Path | None
 
 
 def parse_cli_arguments(args: Sequence[str] | None = None) -> Options:
+    args = sys.argv[1:] if args is None else list(args)
+    options = Options(cache_command=None)
+    if args and args[0] == "cache":
+        _define_cache_arguments().parse_args(args[1:], options)
+        return options
+    options.serve = bool(args) and args[0] == "serve"
+    if options.serve:
+        _define_serve_arguments().parse_args(args[1:], options)
+        return options
     parser = _define_cli_arguments()
-    options = Options()
     parser.parse_args(args, options)
     if options.python is None:
         if (resolved := shutil.which("python")) is None:
             parser.error("no python interpreter found on PATH, provide PYTHON_EXE explicitly")
-        options.python = Path(resolved).absolute()
+        options.python = [Path(resolved).absolute()]
     return options
 
 
-def _define_cli_arguments() -> ArgumentParser:
+def default_options() -> Options:
+    """:return: the options of a run without any command line arguments, without an interpreter to check"""
+    return _define_cli_arguments().parse_args([], Options(cache_command=None, serve=False))
+
+
+def _define_cache_arguments() -> ArgumentParser:
     epilog = f"running {version} at {Path(__file__).parent}"
-    parser = ArgumentParser(prog="pypi-changes", formatter_class=_HelpFormatter, epilog=epilog)
+    parser = ArgumentParser(prog="pypi-changes cache", formatter_class=_HelpFormatter, epilog=epilog)
+    _add_cache_arguments(parser)
+    parser.add_argument(
+        "cache_command",
+        help="show what the cache holds, reclaim the disk space of deleted entries, or evict down to --cache-max-size",
+        choices=["info", "vacuum", "prune"],
+        default="info",
+        nargs="?",
+        metavar="{info,vacuum,prune}",
+    )
+    return parser
 
-    parallel_help = "maximum number of parallel requests when loading distribution information from PyPI"
-    parser.add_argument("--jobs", "-j", default=10, type=int, help=parallel_help, metavar="COUNT")
 
+def _add_cache_arguments(parser: ArgumentParser) -> None:
     path = user_cache_path(appname="pypi_changes", appauthor="gaborbernat", version=version) / "requests.sqlite"
     parser.add_argument(
         "--cache-path",
@@ -49,8 +96,89 @@ def _define_cli_arguments() -> ArgumentParser:
         metavar="PATH",
         dest="cache_path",
     )
-    cache_help = "seconds how long requests should be cached (pass 0 to bypass the cache, -1 to cache forever)"
+    max_size_help = "megabytes of data the cache is kept within, evicting the least recently used responses first"
+    parser.add_argument(
+        "--cache-max-size", default=256, type=int, help=max_size_help, metavar="MB", dest="cache_max_size"
+    )
+
+
+def _add_fetch_arguments(parser: ArgumentParser) -> None:
+    parallel_help = "maximum number of parallel requests when loading distribution information from PyPI"
+    parser.add_argument("--jobs", "-j", default=10, type=int, help=parallel_help, metavar="COUNT")
+    parser.add_argument(
+        "--host-limit",
+        help="at most this many parallel requests to the host, within which the concurrency adapts (repeatable)",
+        type=_host_limit,
+        action=_HostLimits,
+        default={},
+        metavar="HOST=COUNT",
+        dest="host_limits",
+    )
+    parser.add_argument(
+        "--source",
+        help="where to read PyPI release history from: the JSON API, or the much smaller JSON simple index (PEP 691)",
+        choices=["json", "simple"],
+        default="json",
+        dest="source",
+    )
+
+    _add_cache_arguments(parser)
+    cache_help = "seconds how long requests should be cached (pass 0 to revalidate every request, -1 to cache forever)"
     parser.add_argument("--cache-duration", "-d", default=3600, type=int, help=cache_help, metavar="SEC")
+    parser.add_argument(
+        "--not-found-duration",
+        help="seconds a project an index answers 404 for is not asked about again, independent of --cache-duration",
+        default=24 * 3600,
+        type=int,
+        metavar="SEC",
+        dest="not_found_duration",
+    )
+
+
+def _define_serve_arguments() -> ArgumentParser:
+    epilog = f"running {version} at {Path(__file__).parent}"
+    description = "keep release information warm in memory, answering the checks of the same --cache-path over a socket"
+    parser = ArgumentParser(
+        prog="pypi-changes serve", formatter_class=_HelpFormatter, description=description, epilog=epilog
+    )
+    _add_fetch_arguments(parser)
+    parser.set_defaults(offline=False, not_published=[])
+    return parser
+
+
+def _define_cli_arguments() -> ArgumentParser:
+    epilog = f"running {version} at {Path(__file__).parent}; inspect and maintain the cache with: pypi-changes cache"
+    parser = ArgumentParser(prog="pypi-changes", formatter_class=_HelpFormatter, epilog=epilog)
+    _add_fetch_arguments(parser)
+    parser.add_argument(
+        "--not-published",
+        help="projects matching this name pattern (e.g. 'acme-*') are not looked up anywhere (repeatable)",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        dest="not_published",
+    )
+    network = parser.add_mutually_exclusive_group()
+    network.add_argument(
+        "--offline",
+        help="answer only from the cache, however old its entries, never connecting to the network",
+        action="store_true",
+        dest="offline",
+    )
+    network.add_argument(
+        "--prefetch",
+        help="only warm the cache with the projects of this requirements or lock file, for a later --offline run",
+        type=Path,
+        default=None,
+        metavar="REQUIREMENTS",
+        dest="prefetch",
+    )
+    parser.add_argument(
+        "--no-server",
+        help="look up the releases in this process, even if a pypi-changes serve process is answering",
+        action="store_true",
+        dest="no_server",
+    )
 
     parser.add_argument(
         "--sort",
@@ -63,6 +191,13 @@ def _define_cli_arguments() -> ArgumentParser:
         nargs="?",
     )
 
+    parser.add_argument(
+        "--only-outdated",
+        help="show only the packages with a newer release than the installed one",
+        action="store_true",
+        dest="only_outdated",
+    )
+
     parser.add_argument(
         "--output",
         "-o",
@@ -71,19 +206,86 @@ def _define_cli_arguments() -> ArgumentParser:
         default="tree",
         dest="output",
     )
+    parser.add_argument(
+        "--compact",
+        help="json output without indentation and without the human readable since fields, for machines to read",
+        action="store_true",
+        dest="compact",
+    )
+    shown = parser.add_mutually_exclusive_group()
+    shown.add_argument(
+        "--stream",
+        help="show each package as soon as its information arrives (JSON Lines for json, unsorted requirements)",
+        action="store_true",
+        dest="stream",
+    )
+    shown.add_argument(
+        "--limit",
+        "-n",
+        help="show only the first COUNT packages of each interpreter in sort order (e.g. the most recently released)",
+        type=_positive,
+        default=None,
+        metavar="COUNT",
+        dest="limit",
+    )
+    parser.add_argument(
+        "--timings",
+        help="report where the run spent its time, per phase and per package, to stderr as a table or as JSON",
+        choices=["table", "json"],
+        const="table",
+        nargs="?",
+        default=None,
+        dest="timings",
+    )
+    parser.add_argument(
+        "--profile",
+        help="profile the whole run with cProfile, writing the statistics to this file (read it with python -m pstats)",
+        type=Path,
+        default=None,
+        metavar="PATH",
+        dest="profile",
+    )
 
     parser.add_argument(
         "python",
-        help="python interpreter to inspect (default: python on PATH)",
+        help="python interpreters, directories (or globs) of virtual environments, or requirements and lock files"
+        " (uv.lock, poetry.lock, pylock.toml) to check without an interpreter (default: python on PATH)",
         metavar="PYTHON_EXE",
         action=_Python,
-        nargs="?",
+        nargs="*",
         default=None,
     )
 
     return parser
 
 
+def _positive(value: str) -> int:
+    if not value.isdigit() or int(value) < 1:
+        msg = f"expected a positive number, got {value!r}"
+        raise ArgumentTypeError(msg)
+    return int(value)
+
+
+def _host_limit(value: str) -> tuple[str, int]:
+    host, sep, count = value.rpartition("=")
+    if not sep or not host or not count.isdigit() or int(count) < 1:
+        msg = f"expected HOST=COUNT with a positive COUNT, got {value!r}"
+        raise ArgumentTypeError(msg)
+    return host, int(count)
+
+
+class _HostLimits(Action):
+    def __call__(
+        self,
+        parser: ArgumentParser,  # ruff:ignore[unused-method-argument]
+        namespace: Namespace,
+        values: str | Sequence[str] | None,
+        option_string: str | None = None,  # ruff:ignore[unused-method-argument]
+    ) -> None:
+        host, count = cast("tuple[str, int]", values)  # already split by the type converter
+        setattr(namespace, self.dest, {**getattr(namespace, self.dest), host: count})
+
+
 class _Python(Action):
     def __call__(
         self,
@@ -92,13 +294,52 @@ class _Python(Action):
         values: str | Sequence[str] | None,
         option_string: str | None = None,  # ruff:ignore[unused-method-argument]
     ) -> None:
-        if values is None:
+        if not values:
             return
-        assert isinstance(values, str)  # ruff:ignore[assert]
-        path = Path(values).absolute()
-        if not path.exists():
-            raise ArgumentError(self, f"path {path} does not exist")
-        setattr(namespace, self.dest, path)
+        try:
+            pythons = resolve_pythons([values] if isinstance(values, str) else values)
+        except ValueError as exc:
+            raise ArgumentError(self, str(exc)) from exc
+        setattr(namespace, self.dest, pythons)
+
+
+def resolve_pythons(values: Sequence[str | Path]) -> list[Path]:
+    """
+    Resolve interpreters, virtual environments and directories (or globs) of virtual environments to interpreters.
+
+    Requirements and lock files are kept as they are.
+
+    :raises ValueError: if a path does not exist, or a directory holds no virtual environment
+    """
+    pythons: list[Path] = []
+    for value in values:
+        for path in _expand(Path(value).absolute()):
+            if not path.exists():
+                msg = f"path {path} does not exist"
+                raise ValueError(msg)
+            found = _venv_pythons(path) if path.is_dir() else [path]
+            if not found:
+                msg = f"no virtual environment found within {path}"
+                raise ValueError(msg)
+            pythons.extend(i for i in found if i not in pythons)
+    return pythons
+
+
+def _expand(path: Path) -> list[Path]:
+    if path.exists() or not any(c in str(path) for c in "*?["):
+        return [path]
+    return sorted(Path(path.anchor).glob(str(path.relative_to(path.anchor)))) or [path]
+
+
+def _venv_pythons(path: Path) -> list[Path]:
+    # a virtual environment itself, or a directory holding virtual environments
+    if found := _venv_python(path):
+        return found
+    return [python for child in sorted(path.iterdir()) if child.is_dir() for python in _venv_python(child)]
+
+
+def _venv_python(path: Path) -> list[Path]:
+    return [i for i in (path / "bin" / "python", path / "Scripts" / "python.exe") if i.exists()][:1]
 
 
 class _HelpFormatter(ArgumentDefaultsHelpFormatter):
@@ -108,5 +349,7 @@ class _HelpFormatter(ArgumentDefaultsHelpFormatter):
 
 __all__ = [
     "Options",
+    "default_options",
     "parse_cli_arguments",
+    "resolve_pythons",
 ]
@@ -1,58 +1,290 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import os
 import re
-from importlib.metadata import Distribution, PathDistribution
+import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from email.message import Message
+from fnmatch import fnmatchcase
+from importlib.metadata import PathDistribution
 from pathlib import Path
 from subprocess import check_output  # ruff:ignore[suspicious-subprocess-import]
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Callable, cast
 
-from rich.console import Console
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.utils import canonicalize_name
+
+from ._timings import phase
 
 if TYPE_CHECKING:
-    from collections.abc import Generator, Iterable
+    from collections.abc import Generator, Iterable, Sequence
+    from importlib.metadata import PackageMetadata
 
     from ._cli import Options
+    from ._timings import Timings
 
 _PKG_REGEX = re.compile(r"^([A-Z0-9]|[A-Z0-9][A-Z0-9._-]*[A-Z0-9])(\.egg-info|\.dist-info)$", flags=re.IGNORECASE)
+#: the distributions within a path entry: its modification time, and per distribution its directory name, modification
+#: time, name and version
+Listing = dict[str, Any]
+
+
+class HeaderDistribution(PathDistribution):
+    """A distribution whose name and version come from the metadata header lines, without parsing the whole file."""
+
+    def __init__(self, path: Path, name: str, version: str | None, python: Path | None = None) -> None:
+        super().__init__(path)
+        #: the interpreter this distribution was discovered for
+        self.python = python
+        self._headers = Message()
+        self._headers["Name"] = name
+        if version is not None:
+            self._headers["Version"] = version
+
+    @property
+    def metadata(self) -> PackageMetadata:
+        return cast("PackageMetadata", self._headers)
+
+    @property
+    def version(self) -> str:
+        return self._headers["Version"]
+
+
+def collect_distributions(
+    options: Options, timings: Timings | None = None, *, show_status: bool = True
+) -> list[PathDistribution]:
+    by_python: dict[Path, list[PathDistribution]] = {}
+    executor = ThreadPoolExecutor(max_workers=options.jobs, thread_name_prefix="discover")
+    from rich.console import Console
+
+    with Console().status("Discovering distributions") if show_status else nullcontext() as status, executor:
+        futures = {
+            executor.submit(_discover, python, options.cache_path.parent, timings): python for python in options.python
+        }
+        for future in as_completed(futures):
+            by_python[futures[future]] = future.result()
+            if status is not None:
+                status.update(f"Discovering distributions {sum(len(i) for i in by_python.values())}")
+    return [dist for python in options.python for dist in by_python[python]]
+
+
+def group_by_project(
+    distributions: Iterable[PathDistribution], not_published: Sequence[str]
+) -> tuple[dict[str, list[PathDistribution]], list[PathDistribution]]:
+    """
+    Group the distributions by project, so that one installed in many environments is looked up once.
+
+    :param distributions: the distributions
+    :param not_published: name patterns of projects not to look up
+    :return: the distributions per canonical project name, and those of the projects not to look up
+    """
+    by_project: defaultdict[str, list[PathDistribution]] = defaultdict(list)
+    for dist in distributions:
+        by_project[canonicalize_name(dist.metadata["Name"])].append(dist)
+    # projects published nowhere (e.g. internal ones) are not looked up at all
+    canonical = [canonicalize_name(pattern) for pattern in not_published]  # so that acme_* matches acme-internal too
+    names = [name for name in by_project if any(fnmatchcase(name, pattern) for pattern in canonical)]
+    return by_project, [dist for name in names for dist in by_project.pop(name)]
+
+
+def is_dependency_file(path: Path) -> bool:
+    """Check if the path is a requirements or lock file, rather than an interpreter."""
+    return path.name in _LOCK_READERS or _PYLOCK.match(path.name) is not None or path.suffix in {".txt", ".in"}
+
+
+def file_distributions(path: Path) -> list[PathDistribution]:
+    """
+    Read the projects a requirements or lock file pins as distributions, at their pinned version if any.
+
+    Lock files are ``uv.lock``, ``poetry.lock`` and ``pylock.toml`` (PEP 751); anything else is read as a requirements
+    file. Projects not installed from an index (a directory, a VCS checkout, an archive URL) are left out.
+    """
+    if (reader := _LOCK_READERS.get(path.name)) is None:
+        reader = _pylock if _PYLOCK.match(path.name) else _requirements
+    return [HeaderDistribution(path, name, version, path) for name, version in reader(path)]
+
+
+def _requirements(path: Path) -> Generator[tuple[str, str | None], None, None]:
+    for raw in path.read_text(encoding="utf-8").replace("\\\n", " ").splitlines():
+        line = raw.partition(" #")[0].partition(" --")[0].strip()  # drop comments and per requirement options (hashes)
+        if not line or line.startswith(("#", "-")):  # comments and pip options (-r, -e, --index-url, ...)
+            continue
+        try:
+            requirement = Requirement(line)
+        except InvalidRequirement:
+            continue
+        if requirement.url is not None:
+            continue
+        if requirement.marker is not None and not requirement.marker.evaluate({"extra": ""}):
+            continue  # not installed on the interpreter running us, as pip would skip it
+        # a wildcard (==1.*) is a range, not a version
+        pins = [s.version for s in requirement.specifier if s.operator in {"==", "==="} and not s.version.endswith("*")]
+        yield requirement.name, pins[0] if len(pins) == 1 else None
+
+
+def _uv_lock(path: Path) -> Generator[tuple[str, str | None], None, None]:
+    for package in _toml(path).get("package", []):
+        if "registry" in package.get("source", {"registry": None}):  # not the workspace members, git or path sources
+            yield package["name"], package.get("version")
 
 
-def collect_distributions(options: Options) -> list[PathDistribution]:
-    distributions: list[PathDistribution] = []
-    with Console().status("Discovering distributions") as status:
-        paths = _get_py_info(str(options.python))
-        for dist in _iter_distributions(paths):
-            status.update(f"Discovering distributions {len(distributions)}")
-            distributions.append(dist)
-    return distributions
+def _poetry_lock(path: Path) -> Generator[tuple[str, str | None], None, None]:
+    for package in _toml(path).get("package", []):
+        if package.get("source", {}).get("type", "legacy") == "legacy":  # PyPI, or a further index server
+            yield package["name"], package.get("version")
 
 
-def _get_py_info(python: str) -> list[Path]:
+def _pylock(path: Path) -> Generator[tuple[str, str | None], None, None]:
+    for package in _toml(path).get("packages", []):
+        if not {"vcs", "directory", "archive"} & package.keys():
+            yield package["name"], package.get("version")
+
+
+def _toml(path: Path) -> dict[str, Any]:
+    if sys.version_info >= (3, 11):
+        import tomllib
+    else:  # pragma: no cover
+        import tomli as tomllib
+
+    with path.open("rb") as file:
+        return tomllib.load(file)
+
+
+_LOCK_READERS: dict[str, Callable[[Path], Iterable[tuple[str, str | None]]]] = {
+    "uv.lock": _uv_lock,
+    "poetry.lock": _poetry_lock,
+}
+_PYLOCK = re.compile(r"^pylock\.([^.]+\.)?toml$")
+
+
+def _discover(python: Path, cache_dir: Path, timings: Timings | None = None) -> list[PathDistribution]:
+    if is_dependency_file(python):  # nothing to launch, the file lists the projects
+        with phase(timings, "metadata", within="discover"):
+            return file_distributions(python)
+    # per interpreter, so with many interpreters discovered in parallel these add up to more than the discovery took
+    with phase(timings, "interpreter", within="discover"):
+        paths = _get_py_info(str(python), cache_dir / "sys_path")
+    with phase(timings, "metadata", within="discover"):
+        return list(_iter_distributions(paths, python, cache_dir / "distributions"))
+
+
+def _get_py_info(python: str, cache_dir: Path) -> list[Path]:
+    # the answer only changes if the interpreter, PYTHONPATH or one of the path entries (e.g. a new .pth file) changes
+    cache = _cache_file(cache_dir, python)
+    key = {"python": python, "mtime": _mtime(python), "pythonpath": os.environ.get("PYTHONPATH")}
+    try:
+        cached = json.loads(cache.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        cached = {}
+    if cached.get("key") == key and cached.get("stamp") == _stamp(cached.get("paths", [])):
+        return [Path(i) for i in cached["paths"]]
+
     cmd = [python, "-c", "import sys, json; print(json.dumps(sys.path))"]
-    return [Path(i) for i in json.loads(check_output(cmd, text=True))]  # ruff:ignore[subprocess-without-shell-equals-true]
+    paths: list[str] = json.loads(check_output(cmd, text=True))  # ruff:ignore[subprocess-without-shell-equals-true]
+    _write(cache, {"key": key, "paths": paths, "stamp": _stamp(paths)})  # if it fails, we just spawn again next time
+    return [Path(i) for i in paths]
+
+
+def _cache_file(cache_dir: Path, python: str) -> Path:
+    return cache_dir / f"{hashlib.sha256(python.encode()).hexdigest()[:16]}.json"
 
 
-def _iter_distributions(paths: Iterable[Path]) -> Generator[PathDistribution, None, None]:
+def _write(cache: Path, content: Any) -> None:
+    try:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        cache.write_text(json.dumps(content), encoding="utf-8")
+    except OSError:  # pragma: no cover # a read-only cache is not fatal
+        pass
+
+
+def _mtime(path: str) -> int | None:
+    try:
+        return Path(path).stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _stamp(paths: Iterable[str]) -> dict[str, int | None]:
+    return {path: _mtime(path) for path in paths if path}
+
+
+def _iter_distributions(
+    paths: Iterable[Path], python: Path | None = None, cache_dir: Path | None = None
+) -> Generator[PathDistribution, None, None]:
+    # the listing of each path entry is kept between runs, so that an unchanged environment reads no metadata at all
+    cache = None if cache_dir is None else _cache_file(cache_dir, str(python))
+    try:
+        previous: dict[str, Listing] = {} if cache is None else json.loads(cache.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        previous = {}
+    listings: dict[str, Listing] = {}
     found: set[str] = set()
-    done_paths: set[Path] = set()
     for raw_path in paths:
         if not raw_path.exists():
             continue
         path = raw_path.resolve()
-        if path not in done_paths:
-            done_paths.add(path)
-            for candidate in path.iterdir():
-                if not candidate.is_dir():
-                    continue
-                match = _PKG_REGEX.match(candidate.name)
-                if match:
-                    dist = Distribution.at(candidate)
-                    name = dist.metadata["Name"]
-                    if name is not None and name not in found:
-                        found.add(name)
-                        yield dist
+        if str(path) not in listings:
+            listings[str(path)] = listing = _listing(path, previous.get(str(path)))
+            for dir_name, _, name, version in listing["entries"]:
+                if name is not None and name not in found:
+                    found.add(name)
+                    yield HeaderDistribution(path / dir_name, name, version, python)
+    if cache is not None and listings != previous:
+        _write(cache, listings)
+
+
+def _listing(path: Path, previous: Listing | None) -> Listing:
+    mtime = _mtime(str(path))
+    if previous is not None and previous["mtime"] == mtime:  # nothing was installed, upgraded or removed
+        return previous
+    known = {} if previous is None else {entry[0]: entry for entry in previous["entries"]}
+    entries: list[list[Any]] = []
+    with os.scandir(path) as candidates:
+        for candidate in candidates:
+            if not candidate.is_dir() or not _PKG_REGEX.match(candidate.name):
+                continue
+            at = candidate.stat().st_mtime_ns
+            entry = known.get(candidate.name)
+            if entry is None or entry[1] != at:  # new, or reinstalled at the same version
+                entry = [candidate.name, at, *_read_name_version(Path(candidate.path))]
+            entries.append(entry)
+    return {"mtime": mtime, "entries": entries}
+
+
+def _read_name_version(path: Path) -> tuple[str | None, str | None]:
+    try:
+        with (path / ("METADATA" if path.suffix == ".dist-info" else "PKG-INFO")).open("rb") as file:
+            headers = _read_headers((line.decode("utf-8", errors="replace") for line in file), {"Name", "Version"})
+    except OSError:
+        headers = {}
+    name, version = headers.get("Name"), headers.get("Version")
+    if name is None and path.suffix == ".dist-info":  # no usable metadata, fall back to the {name}-{version} layout
+        name, _, version_from_dir = path.stem.partition("-")
+        version = version or version_from_dir or None
+    return name, version
+
+
+def _read_headers(lines: Iterable[str], wanted: set[str]) -> dict[str, str]:
+    found: dict[str, str] = {}
+    for line in lines:
+        if not line.strip():  # the headers end at the first empty line, the (possibly huge) description follows
+            break
+        key, sep, value = line.partition(":")
+        if sep and key in wanted:
+            found[key] = value.strip()
+            if len(found) == len(wanted):
+                break
+    return found
 
 
 __all__ = [
+    "HeaderDistribution",
     "collect_distributions",
+    "file_distributions",
+    "group_by_project",
+    "is_dependency_file",
 ]
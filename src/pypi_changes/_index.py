@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import logging
+import os
+import sys
+from configparser import ConfigParser, Error
+from contextlib import suppress
+from pathlib import Path
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+from platformdirs import site_config_path, user_config_path
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+_LOGGER = logging.getLogger(__name__)
+#: the index servers warned about already, a run reads the configuration more than once
+_IGNORED: set[str] = set()
+
+
+def index_urls(environ: Mapping[str, str] = os.environ) -> list[str]:
+    """
+    Collect the index servers pip is configured with, the primary first and then the extra ones.
+
+    Like pip, the ``PIP_INDEX_URL`` and ``PIP_EXTRA_INDEX_URL`` environment variables take precedence over the
+    ``index-url`` and ``extra-index-url`` settings of the pip configuration files.
+
+    :param environ: the environment variables to look at
+    :return: the index server URLs, without duplicates; ones not served over HTTP (like a ``file://`` wheel directory)
+        are left out, with a warning logged
+    """
+    config = ConfigParser(interpolation=None)
+    with suppress(Error):  # a broken pip configuration breaks pip too, do not fail because of it
+        config.read(_config_files(environ), encoding="utf-8")
+
+    def setting(env: str, key: str) -> str:
+        if (value := environ.get(env)) is not None:
+            return value
+        for section in ("install", "global"):  # the command specific section overrides the global one
+            if config.has_option(section, key):
+                return config.get(section, key)
+        return ""
+
+    urls = [*setting("PIP_INDEX_URL", "index-url").split(), *setting("PIP_EXTRA_INDEX_URL", "extra-index-url").split()]
+    served = []
+    for url in dict.fromkeys(urls):
+        if urlsplit(url).scheme in {"http", "https"}:
+            served.append(url)
+        elif url not in _IGNORED:
+            _IGNORED.add(url)
+            _LOGGER.warning("ignoring index server %s, only http(s) ones are asked", url)
+    return served
+
+
+def _config_files(environ: Mapping[str, str]) -> list[Path]:
+    # in the order pip loads them, later ones override earlier ones
+    if (explicit := environ.get("PIP_CONFIG_FILE")) == os.devnull:
+        return []
+    name = "pip.ini" if sys.platform == "win32" else "pip.conf"
+    site = [Path(i) / name for i in str(site_config_path("pip", appauthor=False, multipath=True)).split(os.pathsep)]
+    files = [*reversed(site), Path("/etc") / name] if sys.platform == "linux" else [*reversed(site)]
+    files += [Path.home() / ".pip" / name, user_config_path("pip", appauthor=False, roaming=True) / name]
+    if explicit:
+        files.append(Path(explicit))
+    return files
+
+
+__all__ = [
+    "index_urls",
+]
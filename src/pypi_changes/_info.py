@@ -1,61 +1,192 @@
 from __future__ import annotations
 
-import os
-from collections import defaultdict
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from contextlib import ExitStack, contextmanager
 from datetime import datetime, timedelta, timezone
-from typing import TYPE_CHECKING, Any
+from functools import partial
+from http import HTTPStatus
+from operator import itemgetter
+from typing import TYPE_CHECKING, Any, Union
 
+from packaging.utils import canonicalize_name
 from packaging.version import InvalidVersion, Version
-from pypi_simple import PyPISimple
+from requests import ConnectionError as RequestsConnectionError
+from requests.adapters import BaseAdapter
 from requests_cache import CachedSession
+from rich.console import Console
+from rich.markup import escape
 from rich.progress import BarColumn, Progress, Task, TextColumn, TimeRemainingColumn
 from rich.text import Text
 
-from ._pkg import Package
+from ._cache import SKIP_TTL, NotCachedError, ReleaseStore, evict, track_cache_stats, track_cache_usage
+from ._distributions import group_by_project
+from ._index import index_urls
+from ._limiter import AdaptiveAdapter, HostLimits
+from ._pkg import Package, Release
+from ._timings import phase, step
 
 if TYPE_CHECKING:
-    from collections.abc import Generator, Iterator, Sequence
+    from collections.abc import Generator, Sequence
+    from concurrent.futures import Executor
     from importlib.metadata import PathDistribution
+    from types import TracebackType
+    from typing import Self
 
-    from requests import Session
+    from pypi_simple import PyPISimple
+    from requests import PreparedRequest, Response, Session
 
     from ._cli import Options
+    from ._timings import Timings
 
 PYPI_INDEX = "https://pypi.org/simple"
+PYPI_JSON_API = "https://pypi.org/pypi"
 
+#: what looking up a project gave: its releases, ``None`` if no source publishes it, or the error raised
+Result = Union[Exception, dict[str, Release], None]
 
-def pypi_info(distributions: Sequence[PathDistribution], options: Options) -> Generator[Package, None, None]:
-    with ExitStack() as stack:
-        enter = stack.enter_context
-        session = enter(CachedSession(str(options.cache_path), backend="sqlite", expire_after=options.cache_duration))
-        session.cache.delete(expired=True)  # cleanup old entries
-
-        client = enter(_pypi_client(session))
-
-        progress = Progress(
-            "[progress.description]{task.description}",
-            BarColumn(),
-            TextColumn("[bold magenta] {task.completed}/{task.total}"),
-            "[progress.percentage]{task.percentage:>3.0f}%",
-            SpeedColumn(),
-            TimeRemainingColumn(),
-            transient=True,
+
+def pypi_info(
+    distributions: Sequence[PathDistribution],
+    options: Options,
+    timings: Timings | None = None,
+) -> Generator[Package, None, None]:
+    progress = Progress(
+        "[progress.description]{task.description}",
+        BarColumn(),
+        TextColumn("[bold magenta] {task.completed}/{task.total}"),
+        "[progress.percentage]{task.percentage:>3.0f}%",
+        SpeedColumn(),
+        TimeRemainingColumn(),
+        transient=True,
+        disable=options.stream,  # results are shown as they arrive, they are the progress
+    )
+    with Lookup(options) as lookup, progress:
+        yield from lookup.packages(distributions, timings, progress)
+    with phase(timings, "evict", within="fetch"):
+        lookup.evict()
+    console = Console(stderr=True)
+    for endpoint, exc in lookup.index_errors.items():
+        console.print(f"[yellow]index server {endpoint} failed, its releases are left out: {escape(str(exc))}")
+    console.print(f"[dim]PyPI requests: {lookup.stats}")
+
+
+class Lookup:
+    """
+    The HTTP session, caches and index server clients of release lookups, kept open across lookups.
+
+    A long running process checking many environments reuses one, so its connections stay pooled and alive.
+    """
+
+    def __init__(self, options: Options) -> None:
+        self.options = options
+        with ExitStack() as stack:  # closed here if opening any of them fails, else by close
+            enter = stack.enter_context
+            session = enter(_session(options))
+            #: how the responses were served, from the cache or downloaded
+            self.stats = track_cache_stats(session)
+            self._usage = track_cache_usage(session)
+            store = enter(ReleaseStore(options.cache_path))
+            indexes = enter(_index_clients(session))
+            index_executor = enter(ThreadPoolExecutor(options.jobs * len(indexes), "index")) if indexes else None
+            simple = enter(_simple_client(PYPI_INDEX, session)) if options.source == "simple" else None
+            self._stack = stack.pop_all()
+        self._ages: dict[str, datetime] | None = {} if options.offline else None
+        #: the index servers that failed to answer, with the first error each gave
+        self.index_errors: dict[str, Exception] = {}
+        self._fetch = partial(
+            one_info,
+            indexes,
+            session,
+            store,
+            simple=simple,
+            ages=self._ages,
+            index_executor=index_executor,
+            not_found_ttl=options.not_found_duration,
+            # an index adding nothing is not trusted to keep doing so for longer than a response would be cached
+            skip_ttl=SKIP_TTL if options.cache_duration < 0 else min(SKIP_TTL, options.cache_duration),
+            index_errors=self.index_errors,
         )
-        enter(progress)
-        task = progress.add_task("[red]Acquire release information", total=len(distributions))
 
-        executor = enter(ThreadPoolExecutor(max_workers=options.jobs, thread_name_prefix="version-getter"))
-        future_to_url = {executor.submit(one_info, client, session, dist): dist for dist in distributions}
-        for future in as_completed(future_to_url):
-            dist = future_to_url[future]
-            progress.update(task, advance=1)
-            try:
-                result: Exception | dict[str, Any] | None = future.result()
-            except Exception as exc:  # ruff:ignore[blind-except]
-                result = exc
-            yield Package(dist, result)
+    def packages(
+        self,
+        distributions: Sequence[PathDistribution],
+        timings: Timings | None = None,
+        progress: Progress | None = None,
+    ) -> Generator[Package, None, None]:
+        """Look up the releases of the distributions, yielding each package as its information arrives."""
+        by_project, not_published = group_by_project(distributions, self.options.not_published)
+        for dist in not_published:
+            yield Package(dist, None)
+        unique = [dists[0] for dists in by_project.values()]
+        task = None if progress is None else progress.add_task("[red]Acquire release information", total=len(unique))
+        fetch = self._fetch if timings is None else timings.queued(self._fetch)
+        with ThreadPoolExecutor(max_workers=self.options.jobs, thread_name_prefix="version-getter") as executor:
+            future_to_dist = {executor.submit(fetch, dist): dist for dist in unique}
+            for future in as_completed(future_to_dist):
+                if progress is not None and task is not None:
+                    progress.update(task, advance=1)
+                try:
+                    result: Result = future.result()
+                except Exception as exc:  # ruff:ignore[blind-except]
+                    result = exc
+                yield from self._found(by_project, future_to_dist[future], result)
+
+    def _found(
+        self, by_project: dict[str, list[PathDistribution]], dist: PathDistribution, result: Result
+    ) -> list[Package]:
+        # the same project installed in many environments is asked for once, its result is shared by all of them
+        fetched_at = None if self._ages is None else self._ages.get(dist.metadata["Name"])
+        return [Package(same, result, fetched_at) for same in by_project[canonicalize_name(dist.metadata["Name"])]]
+
+    def evict(self) -> None:
+        """Evict a bounded batch of the least recently used responses, if the cache is over its size."""
+        if not self.options.offline:  # a bounded amount of maintenance per run, instead of sweeping the whole cache
+            evict(self.options.cache_path, self._usage.drain(), self.options.cache_max_size * 1024 * 1024)
+
+    def close(self) -> None:
+        self._stack.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+def _session(options: Options) -> CachedSession:
+    if not options.offline:
+        session = CachedSession(str(options.cache_path), backend="sqlite", expire_after=options.cache_duration)
+        # one transport for PyPI and every index server, so a host shared by several of them has a single limit
+        _mount_adaptive_adapter(session, HostLimits(options.jobs, options.host_limits), options.jobs)
+        return session
+    # answer only from the cache, however old the entry; a miss becomes a 504 instead of a request, and the transport
+    # refuses to connect should anything still try to
+    session = CachedSession(str(options.cache_path), backend="sqlite", only_if_cached=True, stale_if_error=True)
+    for prefix in ("https://", "http://"):
+        session.mount(prefix, _OfflineAdapter())
+    return session
+
+
+class _OfflineAdapter(BaseAdapter):
+    def send(self, request: PreparedRequest, *args: Any, **kwargs: Any) -> Response:  # ruff:ignore[no-self-use, unused-method-argument]
+        msg = f"offline, not requesting {request.url}"
+        raise RequestsConnectionError(msg)
+
+    def close(self) -> None:
+        pass
+
+
+def _mount_adaptive_adapter(session: Session, limits: HostLimits, jobs: int) -> None:
+    # the default pool keeps 10 connections per host, with more jobs than that connections are dropped after each use
+    # instead of being kept alive, so size it to the concurrency we are going to drive; each host has its own pool
+    adapter = AdaptiveAdapter(limits, pool_connections=jobs, pool_maxsize=jobs)
+    for prefix in ("https://", "http://"):
+        session.mount(prefix, adapter)
 
 
 class SpeedColumn(TextColumn):
@@ -68,71 +199,251 @@ class SpeedColumn(TextColumn):
         return Text(f"{task.speed:.3f} steps/s")
 
 
+def _simple_client(endpoint: str, session: Session) -> PyPISimple:
+    # only needed with --source simple or index servers, importing it doubles the start up time of a run otherwise
+    from pypi_simple import PyPISimple
+
+    return PyPISimple(endpoint=endpoint, session=session)
+
+
 @contextmanager
-def _pypi_client(session: Session) -> Iterator[PyPISimple | None]:
-    url = os.environ.get("PIP_INDEX_URL")
-    if url is not None and url.lstrip("/") != PYPI_INDEX:
-        with PyPISimple(endpoint=url, session=session) as client:
-            yield client
-    else:
-        yield None
+def _index_clients(session: Session) -> Generator[list[PyPISimple], None, None]:
+    with ExitStack() as stack:
+        clients: list[PyPISimple] = []
+        for url in index_urls():
+            if url.rstrip("/") == PYPI_INDEX.rstrip("/"):  # PyPI itself is asked through its JSON API anyway
+                continue
+            clients.append(stack.enter_context(_simple_client(url, session)))
+        yield clients
 
 
-def one_info(pypi_client: PyPISimple | None, session: CachedSession, dist: PathDistribution) -> dict[str, Any] | None:
+def one_info(  # ruff:ignore[too-many-arguments]
+    indexes: Sequence[PyPISimple],
+    session: CachedSession,
+    store: ReleaseStore,
+    dist: PathDistribution,
+    *,
+    simple: PyPISimple | None = None,
+    ages: dict[str, datetime] | None = None,
+    index_executor: Executor | None = None,
+    not_found_ttl: float = 0,
+    skip_ttl: float = SKIP_TTL,
+    index_errors: dict[str, Exception] | None = None,
+) -> dict[str, Release] | None:
+    """
+    Load the releases of a distribution's project from PyPI and the index servers.
+
+    :param not_found_ttl: seconds a source answering 404 for the project is not asked about it again
+    :param skip_ttl: seconds an index adding no versions to the project is not asked about it again
+    :param index_errors: the first failure of each index server is recorded here, keyed by its endpoint
+    :return: the releases, or ``None`` if no source publishes the project
+    """
     name: str = dist.metadata["Name"]
-    result = _load_from_pypi_json_api(name, session)
-    if pypi_client is not None:
-        result["releases"] = _merge_with_index_server(name, pypi_client, result["releases"])
-    return result
+    # skip the sources known to add nothing for the project, and ask the others at the same time
+    ask = [client for client in indexes if not store.skipped(client.endpoint, name)]
+    ask_pypi = not store.skipped(PYPI_JSON_API, name)
+    if index_executor is None or not ask:
+        with step("index"):
+            results = [_ask_index_server(name, client) for client in ask]
+        releases = _load_from_pypi(name, session, store, simple, ages) if ask_pypi else None
+    else:
+        futures = [index_executor.submit(_ask_index_server, name, client) for client in ask]
+        releases = _load_from_pypi(name, session, store, simple, ages) if ask_pypi else None
+        with step("index"):  # what the index servers took beyond PyPI
+            results = [future.result() for future in futures]
+
+    # an index that failed contributes nothing this time, and is asked again next time
+    found: list[dict[str, Release] | None] = []
+    for client, index in zip(ask, results):
+        if isinstance(index, Exception):
+            if index_errors is not None:
+                index_errors.setdefault(client.endpoint, index)
+            continue
+        # a 404 is remembered for its own duration, as is an index adding nothing PyPI does not have already
+        redundant = bool(releases) and index is not None and index.keys() <= (releases or {}).keys()
+        store.skip(client.endpoint, name, not_found_ttl if index is None else skip_ttl if redundant else 0)
+        found.append(index)
+    if ask_pypi:
+        store.skip(PYPI_JSON_API, name, not_found_ttl if releases is None else 0)
+    if releases is None and all(index is None for index in found):
+        return None
+    for index in found:  # the first source to list a version wins
+        releases = _merge(releases or {}, index or {})
+    return releases
+
+
+def _load_from_pypi(
+    name: str,
+    session: CachedSession,
+    store: ReleaseStore,
+    simple: PyPISimple | None,
+    ages: dict[str, datetime] | None,
+) -> dict[str, Release] | None:
+    if simple is None:
+        return _load_from_pypi_json_api(name, session, store, ages)
+    return _load_from_simple_api(name, simple, session, store, ages)
 
 
-def _load_from_pypi_json_api(name: str, session: CachedSession) -> dict[str, Any]:
+def _load_from_pypi_json_api(
+    name: str,
+    session: CachedSession,
+    store: ReleaseStore | None = None,
+    ages: dict[str, datetime] | None = None,
+) -> dict[str, Release] | None:
     # ask PyPi - e.g. https://pypi.org/pypi/pip/json, see https://warehouse.pypa.io/api-reference/json/ for more details
-    response = session.get(f"https://pypi.org/pypi/{name}/json")
-    result: dict[str, Any] = response.json() if response.ok else {"releases": {}}
+    response = _get(session, name, f"{PYPI_JSON_API}/{name}/json", ages)
+    if response.status_code == HTTPStatus.NOT_FOUND:
+        return None
+    if not response.ok:
+        return {}
+    if (releases := _stored(PYPI_JSON_API, name, response, store)) is not None:
+        return releases
+    with step("parse"):
+        raw_releases = response.json()["releases"]
+    with step("normalize"):
+        releases = _normalize(raw_releases)
+    _store(PYPI_JSON_API, name, response, store, releases)
+    return releases
+
+
+def _load_from_simple_api(
+    name: str,
+    client: PyPISimple,
+    session: CachedSession,
+    store: ReleaseStore | None = None,
+    ages: dict[str, datetime] | None = None,
+) -> dict[str, Release] | None:
+    # the JSON flavour of the simple index (PEP 691) lists just the files with their upload time (PEP 700), a fraction
+    # of the JSON API document that also carries the description and every file's metadata
+    from pypi_simple import ACCEPT_JSON_ONLY, ProjectPage
+
+    response = _get(session, name, client.get_project_url(name), ages, headers={"Accept": ACCEPT_JSON_ONLY})
+    if response.status_code == HTTPStatus.NOT_FOUND:
+        return None
+    if not response.ok:
+        return {}
+    if (releases := _stored(client.endpoint, name, response, store)) is not None:
+        return releases
+    with step("parse"):
+        page = ProjectPage.from_response(response, name)
+    if any(pkg.upload_time is None for pkg in page.packages):  # the index does not know upload times, ask the JSON API
+        return _load_from_pypi_json_api(name, session, store, ages)
+    with step("normalize"):
+        earliest: dict[str, tuple[datetime, str | None] | None] = dict.fromkeys(page.versions or [])
+        for pkg in page.packages:
+            if pkg.version is None or pkg.upload_time is None:
+                continue
+            if (first := earliest.get(pkg.version)) is None or pkg.upload_time < first[0]:
+                earliest[pkg.version] = pkg.upload_time, pkg.package_type
+        releases = _releases(earliest)
+    _store(client.endpoint, name, response, store, releases)
+    return releases
+
+
+def _get(
+    session: CachedSession,
+    name: str,
+    url: str,
+    ages: dict[str, datetime] | None,
+    **kwargs: Any,
+) -> Response:
+    with step("request"):  # the transport records its own steps, the rest of the request is cache work
+        response = session.get(url, **kwargs)
+    if session.settings.only_if_cached and response.status_code == HTTPStatus.GATEWAY_TIMEOUT:
+        raise NotCachedError(name)
+    if ages is not None and getattr(response, "from_cache", False):  # keep the oldest when more than one was needed
+        ages[name] = min(ages.get(name, response.created_at), response.created_at)
+    return response
+
+
+def _stored(source: str, name: str, response: Response, store: ReleaseStore | None) -> dict[str, Release] | None:
+    # the same validator means the same body, so reuse what we normalized from it last time without decoding it again
+    validator = _validator(response)
+    if store is None or validator is None:
+        return None
+    with step("cache"):
+        return store.get(source, name, validator)
+
+
+def _store(
+    source: str, name: str, response: Response, store: ReleaseStore | None, releases: dict[str, Release]
+) -> None:
+    # a response the cache did not keep has no key to evict the releases with, and is not seen again anyway
+    if store is not None and (key := getattr(response, "cache_key", None)) and (validator := _validator(response)):
+        with step("cache"):
+            store.put(source, name, key, validator, releases)
+
 
-    # normalize response
+def _validator(response: Response) -> str | None:
+    return response.headers.get("ETag") or response.headers.get("Last-Modified")
+
+
+def _normalize(raw_releases: dict[str, list[dict[str, Any]]]) -> dict[str, Release]:
+    earliest: dict[str, tuple[datetime, str | None] | None] = {}
+    for a_version, artifact_release in raw_releases.items():
+        if artifact_release:  # the ISO 8601 timestamps PyPI emits share a format, so they sort lexically
+            first = min(artifact_release, key=itemgetter("upload_time_iso_8601"))
+            upload_time = datetime.fromisoformat(first["upload_time_iso_8601"].replace("Z", "+00:00"))
+            earliest[a_version] = upload_time, first.get("packagetype")
+        else:
+            earliest[a_version] = None
+    return _releases(earliest)
+
+
+def _releases(earliest: dict[str, tuple[datetime, str | None] | None]) -> dict[str, Release]:
+    # keep a single entry per version: its earliest upload, or if no artifacts a made up release time
+    releases: dict[str, Release] = {}
     prev_release_at = datetime.now(timezone.utc)
-    for a_version, artifact_release in sorted(result["releases"].items(), reverse=True):
-        if artifact_release:  # enrich into releases version and transform upload time to python datetime
-            for release in artifact_release:
-                upload_time = datetime.fromisoformat(release.get("upload_time_iso_8601").replace("Z", "+00:00"))
-                release.update({"version": a_version, "upload_time_iso_8601": upload_time})
-            prev_release_at = artifact_release[0]["upload_time_iso_8601"]
-        else:  # if no releases make up a release time and enrich version
+    for a_version, first in sorted(earliest.items(), reverse=True):
+        if first is not None:
+            prev_release_at, package_type = first
+            releases[a_version] = Release(a_version, prev_release_at, package_type)
+        else:
             prev_release_at -= timedelta(seconds=1)
-            release = {
-                "packagetype": "sdist",
-                "version": a_version,
-                "upload_time_iso_8601": prev_release_at,
-                "synthesized": True,
-            }
-            artifact_release.append(release)
-    result["releases"] = dict(sorted(result["releases"].items(), key=sort_by_version_release, reverse=True))
-    return result
-
-
-def sort_by_version_release(value: tuple[str, list[dict[str, Any]]]) -> tuple[Version, datetime]:
+            releases[a_version] = Release(a_version, prev_release_at, synthesized=True)
+    return dict(sorted(releases.items(), key=sort_by_version_release, reverse=True))
+
+
+def sort_by_version_release(value: tuple[str, Release]) -> tuple[Version, datetime | None]:
     try:
         version = Version(value[0])
     except InvalidVersion:
         version = Version("0.0.1")
-    return version, value[1][0]["upload_time_iso_8601"]
+    return version, value[1].upload_time
 
 
 def _merge_with_index_server(
     name: str,
     pypi_client: PyPISimple,
-    releases: dict[str, list[dict[str, Any]]],
-) -> dict[str, list[dict[str, Any]]]:
-    index_info = pypi_client.get_project_page(name)
-    index_releases = defaultdict(list)
+    releases: dict[str, Release],
+) -> dict[str, Release]:
+    return _merge(releases, _load_from_index_server(name, pypi_client) or {})
+
+
+def _ask_index_server(name: str, pypi_client: PyPISimple) -> Result:
+    try:
+        return _load_from_index_server(name, pypi_client)
+    except Exception as exc:  # ruff:ignore[blind-except]
+        return exc
+
+
+def _load_from_index_server(name: str, pypi_client: PyPISimple) -> dict[str, Release] | None:
+    from pypi_simple import NoSuchProjectError
+
+    try:
+        index_info = pypi_client.get_project_page(name)
+    except NoSuchProjectError:
+        return None
+    found: dict[str, Release] = {}
     for pkg in index_info.packages:
-        release = {"packagetype": pkg.package_type, "version": pkg.version, "upload_time_iso_8601": None}
-        if pkg.version is not None:  # some Artifactory might not set this for .egg-info uploads, ignore those
-            index_releases[pkg.version].append(release)
+        # some Artifactory might not set this for .egg-info uploads, ignore those
+        if pkg.version is not None and pkg.version not in found:
+            found[pkg.version] = Release(pkg.version, None, pkg.package_type)
+    return dict(sorted(found.items(), key=sort_by_version_release, reverse=True))
+
 
-    missing = {ver: values for ver, values in index_releases.items() if ver not in releases}
+def _merge(releases: dict[str, Release], index: dict[str, Release]) -> dict[str, Release]:
+    missing = {version: release for version, release in index.items() if version not in releases}
     if missing:
         missing.update(releases)
         return dict(sorted(missing.items(), key=sort_by_version_release, reverse=True))
@@ -140,6 +451,7 @@ def _merge_with_index_server(
 
 
 __all__ = [
+    "Lookup",
     "Package",
     "pypi_info",
 ]
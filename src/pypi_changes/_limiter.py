@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import random
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+from threading import Condition, Lock
+from time import monotonic, sleep
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import Timeout
+
+from ._timings import active, add_step, step
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Mapping
+
+    from requests import PreparedRequest, Response
+
+#: responses telling us to back off, retried after the delay the server asks for (or our own backoff)
+RETRY_STATUSES = frozenset({
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+})
+#: how many times a request is retried before the failure is handed to the caller
+RETRIES = 3
+#: seconds of the first backoff, it doubles with each further attempt
+BACKOFF_BASE = 0.5
+#: the longest we wait on a single Retry-After or backoff, a server asking for more is treated as failed
+MAX_DELAY = 60.0
+#: a request slower than this many times the fastest one seen means requests queue up somewhere, so stop growing
+LATENCY_TOLERANCE = 3.0
+
+
+class HostLimit:
+    """
+    Concurrency limit of one host, adapted with additive increase, multiplicative decrease (AIMD).
+
+    The limit starts small and doubles with each round of successful requests (slow start) until the host first pushes
+    back. From then on it grows by one per round while latency stays near the fastest seen, and halves whenever the
+    host throttles (429, 503 and alike) or fails to answer; a ``Retry-After`` pauses all requests to the host.
+    """
+
+    def __init__(self, maximum: int, initial: int = 2) -> None:
+        self.maximum = maximum
+        self.limit = float(min(initial, maximum))
+        self.in_flight = 0
+        self._slow_start = True
+        self._fastest: float | None = None
+        self._resume_at = 0.0
+        self._cond = Condition()
+
+    @contextmanager
+    def slot(self) -> Generator[None, None, None]:
+        with self._cond:
+            while (wait := self._resume_at - monotonic()) > 0 or self.in_flight >= int(self.limit):
+                self._cond.wait(timeout=wait if wait > 0 else None)
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+
+    def succeeded(self, latency: float) -> None:
+        with self._cond:
+            self._fastest = latency if self._fastest is None else min(self._fastest, latency)
+            if latency <= self._fastest * LATENCY_TOLERANCE:
+                self.limit = min(float(self.maximum), self.limit + (1 if self._slow_start else 1 / self.limit))
+                self._cond.notify_all()
+
+    def throttled(self, pause: float | None = None) -> None:
+        with self._cond:
+            self._slow_start = False
+            self.limit = max(1.0, self.limit / 2)
+            if pause:
+                self._resume_at = max(self._resume_at, monotonic() + pause)
+
+
+class HostLimits:
+    """The :class:`HostLimit` of each host, capped at ``jobs`` unless configured otherwise for the host."""
+
+    def __init__(self, jobs: int, per_host: Mapping[str, int] | None = None) -> None:
+        self._jobs = jobs
+        self._per_host = dict(per_host or {})
+        self._limits: dict[str, HostLimit] = {}
+        self._lock = Lock()
+
+    def __getitem__(self, host: str) -> HostLimit:
+        with self._lock:
+            if (limit := self._limits.get(host)) is None:
+                limit = self._limits[host] = HostLimit(self._per_host.get(host, self._jobs))
+            return limit
+
+
+class AdaptiveAdapter(HTTPAdapter):
+    """A transport that schedules each request within its host's :class:`HostLimit`, retrying transient failures."""
+
+    def __init__(self, limits: HostLimits, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.limits = limits
+
+    def send(self, request: PreparedRequest, *args: Any, **kwargs: Any) -> Response:
+        limit = self.limits[urlsplit(request.url or "").hostname or ""]
+        attempt, waiting = 0, monotonic()
+        while True:
+            with limit.slot():
+                start = monotonic()
+                add_step("wait", start - waiting)
+                try:
+                    response = super().send(request, *args, **kwargs)
+                except (RequestsConnectionError, Timeout):
+                    add_step("connect", monotonic() - start)
+                    limit.throttled()
+                    if attempt >= RETRIES:
+                        raise
+                    delay = _backoff(attempt)
+                else:
+                    add_step("connect", monotonic() - start)
+                    if response.status_code not in RETRY_STATUSES:
+                        limit.succeeded(monotonic() - start)
+                        break
+                    asked = _retry_after(response)
+                    give_up = attempt >= RETRIES or (asked is not None and asked > MAX_DELAY)
+                    # a response handed back is not waited out, so neither must the requests after it be
+                    limit.throttled(None if give_up else asked)
+                    if give_up:
+                        return response
+                    delay = _backoff(attempt) if asked is None else asked
+                    response.close()
+            attempt, waiting = attempt + 1, monotonic()
+            sleep(delay)
+        if active() and not kwargs.get("stream"):  # the session would read the body next, read it here to time it
+            with step("transfer"):
+                _ = response.content
+        return response
+
+
+def _backoff(attempt: int) -> float:
+    # full jitter, so clients throttled at the same moment do not come back at the same moment
+    return random.uniform(0, min(MAX_DELAY, BACKOFF_BASE * 2**attempt))  # ruff:ignore[suspicious-non-cryptographic-random-usage]
+
+
+def _retry_after(response: Response) -> float | None:
+    if (value := response.headers.get("Retry-After")) is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:  # or an HTTP date
+        at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if at.tzinfo is None:  # a -0000 offset parses naive, the date is still UTC
+        at = at.replace(tzinfo=timezone.utc)
+    return max(0.0, (at - datetime.now(timezone.utc)).total_seconds())
+
+
+__all__ = [
+    "AdaptiveAdapter",
+    "HostLimit",
+    "HostLimits",
+]
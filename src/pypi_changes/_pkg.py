@@ -1,56 +1,124 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, cast
+from datetime import datetime, timezone
+from functools import cached_property
+from typing import TYPE_CHECKING, NamedTuple, Union, cast
 
 from packaging.version import Version
 
 if TYPE_CHECKING:
-    from datetime import datetime
+    from collections.abc import Iterable
     from importlib.metadata import PathDistribution
     from pathlib import Path
 
 
+class Release(NamedTuple):
+    """A version of a project; a tuple so that projects with thousands of versions stay cheap to hold."""
+
+    version: str
+    upload_time: datetime | None
+    package_type: str | None = "sdist"
+    synthesized: bool = False
+
+
+#: a release as stored and sent around: version, upload timestamp, package type and if the upload time is made up
+ReleaseRow = tuple[str, Union[float, None], Union[str, None], bool]
+
+
+def releases_to_rows(releases: dict[str, Release]) -> list[ReleaseRow]:
+    return [
+        (r.version, None if r.upload_time is None else r.upload_time.timestamp(), r.package_type, r.synthesized)
+        for r in releases.values()
+    ]
+
+
+def releases_from_rows(rows: Iterable[ReleaseRow]) -> dict[str, Release]:
+    return {
+        version: Release(
+            version,
+            None if timestamp is None else datetime.fromtimestamp(timestamp, timezone.utc),
+            package_type,
+            synthesized,
+        )
+        for version, timestamp, package_type, synthesized in rows
+    }
+
+
 class Package:
-    def __init__(self, dist: PathDistribution, info: dict[str, Any] | Exception | None) -> None:
+    """
+    An installed distribution together with its releases.
+
+    Release lookups are computed on first access and then memoized: sorting and every printer query them repeatedly.
+    """
+
+    def __init__(
+        self,
+        dist: PathDistribution,
+        releases: dict[str, Release] | Exception | None,
+        fetched_at: datetime | None = None,
+    ) -> None:
         self.dist: PathDistribution = dist
-        self.info: dict[str, Any] | None = None if isinstance(info, Exception) else info
-        self.exc = info if isinstance(info, Exception) else None
+        self.releases: dict[str, Release] | None = None if isinstance(releases, Exception) else releases
+        self.exc = releases if isinstance(releases, Exception) else None
+        #: when the release information was downloaded, set if it was served from the cache in offline mode
+        self.fetched_at = fetched_at
 
     @property
+    def published(self) -> bool:
+        """False if no source publishes the project: it matches ``--not-published``, or every source answered 404."""
+        return self.releases is not None or self.exc is not None
+
+    @cached_property
     def last_release_at(self) -> datetime | None:
-        if (last_release := self.last_release) is None or last_release.get("synthesized"):
+        if (last_release := self.last_release) is None or last_release.synthesized:
             return None
-        return last_release["upload_time_iso_8601"]
+        return last_release.upload_time
 
-    @property
-    def last_release(self) -> dict[str, Any] | None:
-        if self.info is None or not self.info["releases"]:
+    @cached_property
+    def last_release(self) -> Release | None:
+        """The newest stable release, or the newest release if there is no stable one."""
+        if not self.releases:
             return None
-        for version_str, releases in self.info["releases"].items():
+        for version_str, release in self.releases.items():  # newest first, so we rarely parse more than a few
             version = Version(version_str)
             if not version.is_devrelease and not version.is_prerelease:
-                return releases[0]
-        return next(iter(self.info["releases"].values()))[0]
+                return release
+        return self.latest_release
 
     @property
+    def outdated(self) -> bool:
+        """True if a newer release than the installed version is known, never for a requirement without a pin."""
+        last_release = self.last_release
+        return last_release is not None and self.version is not None and self.version != last_release.version
+
+    @cached_property
+    def latest_release(self) -> Release | None:
+        """The newest release, including pre and dev releases."""
+        return next(iter(self.releases.values()), None) if self.releases else None
+
+    @cached_property
     def name(self) -> str:
         return self.dist.metadata["Name"]
 
-    @property
-    def version(self) -> str:
+    @cached_property
+    def version(self) -> str | None:
+        """The installed version, ``None`` for a requirement without a ``==`` pin."""
         return self.dist.version
 
+    @property
+    def python(self) -> Path | None:
+        """The interpreter the distribution was discovered for, if known."""
+        return getattr(self.dist, "python", None)
+
     @property
     def path(self) -> Path:
         return cast("Path", self.dist._path)  # ruff:ignore[private-member-access]
 
-    @property
-    def current_release(self) -> dict[str, Any]:
-        if self.info is not None:
-            release_info = self.info["releases"].get(self.version)
-            if release_info is not None:
-                return release_info[0] or {}
-        return {}  # return empty version info if not matching
+    @cached_property
+    def current_release(self) -> Release | None:
+        if self.releases is None or self.version is None:
+            return None
+        return self.releases.get(self.version)
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}(name={self.name!r}, path={self.path!r})"
@@ -58,4 +126,8 @@ class Package:
 
 __all__ = [
     "Package",
+    "Release",
+    "ReleaseRow",
+    "releases_from_rows",
+    "releases_to_rows",
 ]
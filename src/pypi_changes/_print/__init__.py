@@ -1,32 +1,79 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import heapq
+from bisect import bisect
+from typing import TYPE_CHECKING, Any, Callable
 
 if TYPE_CHECKING:
     from collections.abc import Iterable
     from datetime import datetime
+    from pathlib import Path
 
     from pypi_changes._cli import Options
     from pypi_changes._pkg import Package
 
 
-class _Reversor:  # ruff:ignore[eq-without-hash]
-    def __init__(self, obj: str) -> None:
-        self.obj = obj
+def get_sorted_pkg_list(distributions: Iterable[Package], options: Options, now: datetime) -> list[Package]:
+    """
+    Sort packages into display order, keeping only the first ``--limit`` of them.
 
-    def __eq__(self, other: object) -> bool:
-        return isinstance(other, _Reversor) and other.obj == self.obj
+    :param distributions: the packages
+    :param options: the run options, the sort method and limit are taken from here
+    :param now: the release time of packages without one
+    :return: the packages to show, in order
+    """
+    key = _sort_key(options, now)
+    if options.limit is None:
+        return sorted(distributions, key=key)
+    return heapq.nsmallest(options.limit, distributions, key=key)  # a partial selection, not a sort of everything
 
-    def __lt__(self, other: _Reversor) -> bool:
-        return other.obj < self.obj
 
+def per_python(distributions: Iterable[Package], options: Options) -> dict[Path, list[Package]]:
+    """
+    Group packages by the interpreter they were discovered for.
 
-def get_sorted_pkg_list(distributions: Iterable[Package], options: Options, now: datetime) -> Iterable[Package]:
+    :param distributions: the packages
+    :param options: the run options, the groups follow the order of the interpreters there
+    :return: the packages per interpreter
+    """
+    groups: dict[Path, list[Package]] = {python: [] for python in options.python}
+    for pkg in distributions:
+        groups.setdefault(pkg.python or options.python[0], []).append(pkg)
+    return groups
+
+
+class SortedPackages:
+    """Packages kept in display order as they arrive, for renderers that show results before all are known."""
+
+    def __init__(self, options: Options, now: datetime) -> None:
+        self._key = _sort_key(options, now)
+        self._keys: list[Any] = []
+        self.packages: list[Package] = []
+
+    def insert(self, pkg: Package) -> int:
+        """
+        Insert a package at its sorted position.
+
+        :param pkg: the package
+        :return: the index it was inserted at
+        """
+        key = self._key(pkg)
+        at = bisect(self._keys, key)
+        self._keys.insert(at, key)
+        self.packages.insert(at, pkg)
+        return at
+
+
+def _sort_key(options: Options, now: datetime) -> Callable[[Package], Any]:
     if options.sort in {"a", "alphabetic"}:
-        return sorted(distributions, key=lambda v: v.name.lower())
-    return sorted(distributions, key=lambda v: (v.last_release_at or now, _Reversor(v.name)), reverse=True)
+        return lambda v: v.name.lower()
+    # most recently released first (a negated timestamp, so plain tuples compare without Python level calls), ties
+    # alphabetically
+    return lambda v: (-(v.last_release_at or now).timestamp(), v.name)
 
 
 __all__ = [
+    "SortedPackages",
     "get_sorted_pkg_list",
+    "per_python",
 ]
@@ -1,49 +1,116 @@
 from __future__ import annotations
 
 import json
+import sys
 from datetime import datetime, timezone
-from typing import TYPE_CHECKING, Any
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable
 
 from humanize import naturaldelta
 
-from . import get_sorted_pkg_list
+from . import get_sorted_pkg_list, per_python
 
 if TYPE_CHECKING:
     from collections.abc import Iterable
+    from types import ModuleType
 
     from pypi_changes._cli import Options
-    from pypi_changes._pkg import Package
+    from pypi_changes._pkg import Package, Release
 
+Encoder = Callable[[Any], str]
 
-def release_info(release: dict[str, Any] | None, now: datetime) -> dict[str, Any]:
+
+def release_info(release: Release | None, now: datetime, *, since: bool = True) -> dict[str, Any]:
     if release is None:
         return {}
-    release_at = release.get("upload_time_iso_8601") if not release.get("synthesized") else None
-    release_since = naturaldelta(now - release_at) if release_at else None
-    return {
-        "version": release.get("version"),
-        "date": release_at.isoformat() if release_at is not None else None,
-        "since": release_since,
-    }
+    release_at = release.upload_time if not release.synthesized else None
+    info = {"version": release.version, "date": release_at.isoformat() if release_at is not None else None}
+    if since:
+        info["since"] = naturaldelta(now - release_at) if release_at else None
+    return info
 
 
 def print_json(distributions: Iterable[Package], options: Options) -> None:
     now = datetime.now(timezone.utc)
-    pkg_list = []
-
-    for pkg in get_sorted_pkg_list(distributions, options, now):
-        current_release = {"version": pkg.version, **release_info(pkg.current_release, now)}
-        latest_release = release_info(pkg.last_release, now)
-        pkg_list.append(
-            {
-                "name": pkg.name,
-                "version": pkg.version,
-                "up_to_date": pkg.version == latest_release.get("version") if latest_release is not None else True,
-                "current": current_release,
-                "latest": latest_release,
-            },
-        )
-    print(json.dumps(pkg_list, indent=2))  # ruff:ignore[print]
+    many = len(options.python) > 1
+    record = partial(package_info, now=now, since=not options.compact)
+    if options.stream:  # JSON Lines, one package per line as soon as its information arrives
+        dumps = _encoder(indent=False)
+        for pkg in distributions:
+            info = record(pkg)
+            if many:
+                info["python"] = str(pkg.python)
+            sys.stdout.write(f"{dumps(info)}\n")
+            sys.stdout.flush()
+        return
+    # written a package at a time rather than dumped at once, so the whole document is never held in memory
+    pretty = not options.compact
+    dumps = _encoder(indent=pretty)
+    groups = per_python(distributions, options)
+    if not many:
+        packages = get_sorted_pkg_list(groups[options.python[0]], options, now)
+        _write_list((record(pkg) for pkg in packages), dumps, 0, pretty=pretty)
+        sys.stdout.write("\n")
+        return
+    sys.stdout.write("{")
+    for at, (python, packages) in enumerate(groups.items()):
+        sys.stdout.write(f"{',' if at else ''}{_newline(1, pretty=pretty)}{dumps(str(python))}:{' ' if pretty else ''}")
+        records = (record(pkg) for pkg in get_sorted_pkg_list(packages, options, now))
+        _write_list(records, dumps, 1, pretty=pretty)
+    sys.stdout.write(f"{_newline(0, pretty=pretty)}}}\n")
+
+
+def _write_list(records: Iterable[dict[str, Any]], dumps: Encoder, depth: int, *, pretty: bool) -> None:
+    """Write a JSON array a record at a time, laid out as encoding the whole array at once would."""
+    inner = _newline(depth + 1, pretty=pretty)
+    sys.stdout.write("[")
+    empty = True
+    for info in records:
+        encoded = dumps(info).replace("\n", inner) if pretty else dumps(info)  # nested one level deeper
+        sys.stdout.write(f"{'' if empty else ','}{inner}{encoded}")
+        empty = False
+    sys.stdout.write("]" if empty else f"{_newline(depth, pretty=pretty)}]")
+
+
+def _newline(depth: int, *, pretty: bool) -> str:
+    return f"\n{'  ' * depth}" if pretty else ""
+
+
+def _encoder(*, indent: bool) -> Encoder:
+    if (orjson := _orjson()) is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return lambda value: orjson.dumps(value, option=option).decode()
+    # laid out as orjson does, so the output does not depend on it being installed: text as is, and no spaces unless
+    # indented
+    separators = (",", ": ") if indent else (",", ":")
+    return json.JSONEncoder(ensure_ascii=False, indent=2 if indent else None, separators=separators).encode
+
+
+def _orjson() -> ModuleType | None:
+    try:
+        import orjson  # a faster encoder, if installed
+    except ImportError:
+        return None
+    return orjson
+
+
+def package_info(pkg: Package, now: datetime, *, since: bool = True) -> dict[str, Any]:
+    current_release = {"version": pkg.version, **release_info(pkg.current_release, now, since=since)}
+    latest_release = release_info(pkg.last_release, now, since=since)
+    info = {
+        "name": pkg.name,
+        "version": pkg.version,
+        "up_to_date": pkg.version is None or pkg.version == latest_release.get("version"),
+        "current": current_release,
+        "latest": latest_release,
+    }
+    if not pkg.published:
+        info["published"] = False
+    if pkg.fetched_at is not None:
+        info["cached"] = {"date": pkg.fetched_at.isoformat()}
+        if since:
+            info["cached"]["since"] = naturaldelta(now - pkg.fetched_at)
+    return info
 
 
 __all__ = [
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime, timezone
 from typing import TYPE_CHECKING
 
-from . import get_sorted_pkg_list
+from . import get_sorted_pkg_list, per_python
 
 if TYPE_CHECKING:
     from collections.abc import Iterable
@@ -14,10 +14,24 @@ if TYPE_CHECKING:
 
 def print_requirements(distributions: Iterable[Package], options: Options) -> None:
     now = datetime.now(timezone.utc)
-    for pkg in get_sorted_pkg_list(distributions, options, now):
-        last_release = pkg.last_release or {}
-        if (remote_version := last_release.get("version")) and pkg.version != remote_version:
-            print(f"{pkg.name}=={remote_version}")  # ruff:ignore[print]
+    many = len(options.python) > 1
+    if options.stream:
+        for pkg in distributions:
+            if (line := _requirement(pkg)) is not None:
+                print(f"{line}  # {pkg.python}" if many else line, flush=True)  # ruff:ignore[print]
+        return
+    for python, packages in per_python(distributions, options).items():
+        lines = [line for pkg in get_sorted_pkg_list(packages, options, now) if (line := _requirement(pkg)) is not None]
+        if many and lines:
+            print(f"# {python}")  # ruff:ignore[print]
+        for line in lines:
+            print(line)  # ruff:ignore[print]
+
+
+def _requirement(pkg: Package) -> str | None:
+    if pkg.outdated and (last_release := pkg.last_release) is not None:  # an unpinned requirement is left as it is
+        return f"{pkg.name}=={last_release.version}"
+    return None
 
 
 __all__ = [
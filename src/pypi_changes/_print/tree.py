@@ -1,49 +1,151 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from itertools import starmap
+from time import monotonic
 from typing import TYPE_CHECKING
 
 from humanize import naturaldelta
 from packaging.version import InvalidVersion, Version
+from rich import get_console
 from rich import print as rich_print
+from rich.console import COLOR_SYSTEMS, Group
+from rich.live import Live
 from rich.markup import escape
+from rich.style import Style
 from rich.text import Text
 from rich.tree import Tree
 
-from . import get_sorted_pkg_list
+from . import SortedPackages, get_sorted_pkg_list, per_python
 
 if TYPE_CHECKING:
     from collections.abc import Iterable
+    from pathlib import Path
+
+    from rich.console import Console
 
     from pypi_changes._cli import Options
     from pypi_changes._pkg import Package
 
+_REFRESH_INTERVAL = 0.25
+#: above this many packages a tree is written line by line, laying out thousands of tree nodes takes seconds
+_LARGE_TREE = 1000
+#: lines written at once when writing a large tree
+_BATCH = 500
+
 
 def print_tree(distributions: Iterable[Package], options: Options) -> None:
     now = datetime.now(timezone.utc)
-    tree = Tree(f"🐍 Distributions within {escape(str(options.python))}", guide_style="cyan")
-    for pkg in get_sorted_pkg_list(distributions, options, now):
-        text = Text(pkg.name, "yellow")
-        text.stylize(f"link https://pypi.org/project/{pkg.name}/#history")
-        text.append(" ", "white")
-        text.append(pkg.version, "blue")
-
-        current_release = pkg.current_release
-        current_release_at = current_release.get("upload_time_iso_8601")
-        last_release = pkg.last_release or {}
-        last_release_at = pkg.last_release_at
-
-        if current_release_at is not None:
-            text.append(" ")  # pragma: no cover
-            text.append(naturaldelta(now - current_release_at), "green")  # pragma: no cover
-        if pkg.version != (remote_version := last_release.get("version")):
-            style = "bold red" if _is_major_bump(pkg.version, remote_version) else "red"
-            text.append(f" remote {remote_version}", style)
-            if last_release_at is not None:
-                text.append(" ", "white")
-                text.append(naturaldelta(now - last_release_at), "green")
-        tree.add(text)
-    rich_print(tree)
+    console = get_console()
+    link = console.is_terminal and not console.legacy_windows  # elsewhere the links are dropped anyway
+    if options.stream:
+        _stream_tree(distributions, options, now, link=link)
+        return
+    for python, packages in per_python(distributions, options).items():
+        ordered = get_sorted_pkg_list(packages, options, now)
+        if len(ordered) > _LARGE_TREE and not console.legacy_windows:
+            _print_lines(console, python, ordered, now, link=link)
+            continue
+        tree = _new_tree(python)
+        for pkg in ordered:
+            tree.add(_package_text(pkg, now, link=link))
+        rich_print(tree)
+
+
+def _print_lines(console: Console, python: Path, packages: list[Package], now: datetime, *, link: bool) -> None:
+    """Write a tree of packages a batch of lines at a time, encoding the styles directly instead of laying it out."""
+    color_system = None if console.color_system is None else COLOR_SYSTEMS[console.color_system]
+    styles: dict[str, Style] = {}
+
+    def render(value: str, style: str) -> str:
+        if color_system is None:  # e.g. redirected to a file
+            return value
+        if (parsed := styles.get(style)) is None:  # each style is parsed and its escape codes made once
+            parsed = Style.parse(f"yellow {style}")  # over the style of the whole line
+            styles[style] = parsed = parsed.without_color if console.no_color else parsed
+        return parsed.render(value, color_system=color_system)
+
+    guides = [render("├── ", "cyan")] * (len(packages) - 1) + [render("└── ", "cyan")]
+    console.file.write(f"{_title(python)}\n")
+    for at in range(0, len(packages), _BATCH):
+        lines = []
+        for guide, pkg in zip(guides[at : at + _BATCH], packages[at : at + _BATCH]):
+            (name, name_style), *parts = _package_parts(pkg, now)
+            name = render(name, name_style)
+            if link and color_system is not None:  # an OSC 8 hyperlink
+                name = f"\x1b]8;;{_url(pkg)}\x1b\\{name}\x1b]8;;\x1b\\"
+            lines.append(f"{guide}{name}{''.join(starmap(render, parts))}\n")
+        console.file.write("".join(lines))
+
+
+def _title(python: Path) -> str:
+    return f"🐍 Distributions within {python}"
+
+
+def _new_tree(python: Path) -> Tree:
+    return Tree(escape(_title(python)), guide_style="cyan")
+
+
+def _stream_tree(distributions: Iterable[Package], options: Options, now: datetime, *, link: bool) -> None:
+    trees = {python: (_new_tree(python), SortedPackages(options, now)) for python in options.python}
+    last_refresh = 0.0
+    # refresh from this thread only (the tree is mutated here), at most a few times per second, and once more on exit
+    with Live(Group(*(tree for tree, _ in trees.values())), auto_refresh=False) as live:
+        for pkg in distributions:
+            tree, ordered = trees[pkg.python or options.python[0]]
+            at = ordered.insert(pkg)
+            tree.add(_package_text(pkg, now, link=link))
+            tree.children.insert(at, tree.children.pop())
+            if (at_time := monotonic()) - last_refresh > _REFRESH_INTERVAL:
+                live.refresh()
+                last_refresh = at_time
+
+
+def _package_text(pkg: Package, now: datetime, *, link: bool) -> Text:
+    text = Text.assemble(*_package_parts(pkg, now), style="yellow")
+    if link:
+        text.stylize(f"link {_url(pkg)}", 0, len(pkg.name))
+    return text
+
+
+def _url(pkg: Package) -> str:
+    return f"https://pypi.org/project/{pkg.name}/#history"
+
+
+def _package_parts(pkg: Package, now: datetime) -> list[tuple[str, str]]:
+    """:return: the text of a package's line, as pieces of text with their style"""
+    version = pkg.version
+    parts = [(pkg.name, "yellow"), (" ", "white"), ("unpinned", "dim") if version is None else (version, "blue")]
+
+    current_release = pkg.current_release
+    current_release_at = None if current_release is None else current_release.upload_time
+    last_release = pkg.last_release
+    last_release_at = pkg.last_release_at
+
+    if current_release_at is not None:
+        parts.extend(((" ", ""), (naturaldelta(now - current_release_at), "green")))  # pragma: no cover
+    if not pkg.published:
+        parts.append((" not published", "dim"))
+    elif pkg.exc is not None and _not_cached(pkg.exc):
+        parts.append((" not cached", "dim"))
+    elif version != (remote_version := None if last_release is None else last_release.version):
+        if version is None:  # an unpinned requirement, nothing to compare against: show what an install would get
+            parts.append((f" latest {remote_version}", "white"))
+        else:
+            style = "bold red" if _is_major_bump(version, remote_version) else "red"
+            parts.append((f" remote {remote_version}", style))
+        if last_release_at is not None:
+            parts.extend(((" ", "white"), (naturaldelta(now - last_release_at), "green")))
+    if pkg.fetched_at is not None:
+        parts.append((f" (cached {naturaldelta(now - pkg.fetched_at)} ago)", "dim"))
+    return parts
+
+
+def _not_cached(exc: Exception) -> bool:
+    # only offline runs raise it, so the cache layer is not loaded for every tree
+    from pypi_changes._cache import NotCachedError
+
+    return isinstance(exc, NotCachedError)
 
 
 def _is_major_bump(current: str, remote: str | None) -> bool:
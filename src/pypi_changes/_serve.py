@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import json
+import math
+import socket
+import sys
+from contextlib import contextmanager, suppress
+from functools import partial
+from pathlib import Path
+from socketserver import StreamRequestHandler
+from threading import Event, Lock, Thread
+from time import monotonic
+from typing import TYPE_CHECKING, Any, Union
+
+from packaging.utils import canonicalize_name
+
+from ._distributions import HeaderDistribution, group_by_project
+from ._pkg import Package, releases_from_rows, releases_to_rows
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable, Sequence
+    from importlib.metadata import PathDistribution
+    from socketserver import BaseServer
+
+    from ._cli import Options
+    from ._info import Lookup
+    from ._pkg import Release, ReleaseRow
+
+#: what the server answers for a project: its releases, ``None`` if not published, or the error looking it up
+Answer = Union[list["ReleaseRow"], None, dict[str, str]]
+
+#: the most seconds between two looks for projects to refresh
+REFRESH_EVERY = 60.0
+#: seconds a check waits to connect to the server, before looking the releases up itself
+CONNECT_TIMEOUT = 1.0
+#: seconds a check waits for the answer once connected, a server stuck longer is not waited for any further
+ANSWER_TIMEOUT = 60.0
+
+
+class ServerError(RuntimeError):
+    """The serve process failed to look up a project."""
+
+
+def socket_path(cache_path: Path) -> Path:
+    """:return: the Unix socket the server of the cache listens on, next to the cache file"""
+    return cache_path.with_suffix(".sock")
+
+
+def served_info(distributions: Sequence[PathDistribution], options: Options) -> list[Package] | None:
+    """
+    Ask the serve process of the cache for the releases of the distributions.
+
+    :return: the packages, or ``None`` if no server answers
+    """
+    path = socket_path(options.cache_path)
+    if not hasattr(socket, "AF_UNIX") or not path.exists():
+        return None
+    by_project, not_published = group_by_project(distributions, options.not_published)
+    settings = _settings(options)
+    request = {"projects": [dists[0].metadata["Name"] for dists in by_project.values()], "settings": settings}
+    try:
+        response = _ask(path, request)
+    except (OSError, ValueError):  # a socket left behind by a server that is gone, one that went away or hangs
+        return None
+    if (theirs := response.get("settings")) is not None:  # it would answer other releases than we look up
+        differ = ", ".join(key.replace("_", "-") for key in settings if theirs.get(key) != settings[key])
+        msg = f"not asking pypi-changes serve at {path}, it runs with other {differ}"
+        print(msg, file=sys.stderr)  # ruff:ignore[print]
+        return None
+    answers: dict[str, Answer] = response["projects"]
+    packages = [Package(dist, None) for dist in not_published]
+    for name, dists in by_project.items():
+        if name not in answers:  # a server of another version, look it up ourselves rather than guess
+            return None
+        answer = answers[name]
+        result = ServerError(answer["error"]) if isinstance(answer, dict) else _releases(answer)
+        packages.extend(Package(dist, result) for dist in dists)
+    print(f"answered by pypi-changes serve at {path}", file=sys.stderr)  # ruff:ignore[print]
+    return packages
+
+
+def _settings(options: Options) -> dict[str, Any]:
+    # what decides the releases of a project beyond its name, a check only takes answers looked up the same way
+    from ._index import index_urls
+
+    return {
+        "index_urls": index_urls(),
+        "source": options.source,
+        "offline": options.offline,
+        "cache_duration": options.cache_duration,
+    }
+
+
+def _ask(path: Path, request: dict[str, Any]) -> Any:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(CONNECT_TIMEOUT)
+        conn.connect(str(path))
+        conn.settimeout(ANSWER_TIMEOUT)  # projects not yet known are looked up first, allow for that
+        conn.sendall(json.dumps(request).encode() + b"\n")
+        with conn.makefile("rb") as file:
+            return json.loads(file.readline())
+
+
+def _releases(answer: list[ReleaseRow] | None) -> dict[str, Release] | None:
+    return None if answer is None else releases_from_rows(answer)
+
+
+class ReleaseIndex:
+    """
+    The release information of the projects asked about, held in memory.
+
+    Checks are answered from memory, :meth:`keep_fresh` looks the projects up again in the background once their cache
+    duration passed, when the HTTP cache revalidates them. A duration of ``0`` looks up every project on every check.
+    """
+
+    def __init__(self, lookup: Lookup, cache_duration: float) -> None:
+        self._lookup = lookup
+        self._max_age = math.inf if cache_duration < 0 else cache_duration
+        self._lock = Lock()
+        self._entries: dict[str, tuple[float, Answer]] = {}
+
+    def get(self, names: Iterable[str]) -> dict[str, Answer]:
+        result: dict[str, Answer] = {}
+        missing: list[str] = []
+        with self._lock:
+            for name in names:
+                if self._max_age and (entry := self._entries.get(key := canonicalize_name(name))) is not None:
+                    result[key] = entry[1]
+                else:
+                    missing.append(name)
+        result.update(self._fetch(missing))
+        return result
+
+    def keep_fresh(self, stop: Event) -> None:
+        """Look up the projects again once their cache duration passed, until stopped."""
+        if math.isinf(self._max_age) or not self._max_age:
+            return
+        every = min(max(self._max_age, 1.0), REFRESH_EVERY)
+        while not stop.wait(every):
+            with self._lock:
+                at = monotonic()
+                expired = [key for key, (fetched, _) in self._entries.items() if at - fetched >= self._max_age]
+            self._fetch(expired)
+
+    def _fetch(self, names: Sequence[str]) -> dict[str, Answer]:
+        if not names:
+            return {}
+        result: dict[str, Answer] = {}
+        at = monotonic()
+        for pkg in self._lookup.packages([HeaderDistribution(Path(name), name, None) for name in names]):
+            key = canonicalize_name(pkg.name)
+            if pkg.exc is not None:  # not kept, the next check asks again
+                result[key] = {"error": f"{type(pkg.exc).__name__}: {pkg.exc}"}
+                continue
+            result[key] = None if pkg.releases is None else releases_to_rows(pkg.releases)
+            with self._lock:
+                self._entries[key] = at, result[key]
+        self._lookup.evict()
+        return result
+
+
+class _Handler(StreamRequestHandler):
+    def __init__(self, *args: Any, index: ReleaseIndex, settings: dict[str, Any]) -> None:
+        self.index = index  # before the base class handles the request
+        self.settings = settings
+        super().__init__(*args)
+
+    def handle(self) -> None:
+        request = json.loads(self.rfile.readline())
+        if (settings := request.get("settings")) is not None and settings != self.settings:
+            response: dict[str, Any] = {"settings": self.settings}
+        else:
+            response = {"projects": self.index.get(request["projects"])}
+        self.wfile.write(json.dumps(response, separators=(",", ":")).encode() + b"\n")
+
+
+def run_server(options: Options) -> int:
+    from rich.console import Console
+
+    path = socket_path(options.cache_path)
+    console = Console(stderr=True)
+    if _answers(path):
+        console.print(f"[red]already serving at {path}")
+        return 1
+    with listening(options) as server:
+        console.print(f"serving at {path}, stop with Ctrl+C")
+        with suppress(KeyboardInterrupt):
+            server.serve_forever()
+    return 0
+
+
+@contextmanager
+def listening(options: Options) -> Generator[BaseServer, None, None]:
+    """Listen on the socket of the cache, keeping the release information of the projects asked about fresh."""
+    from socketserver import ThreadingUnixStreamServer  # POSIX only
+
+    from ._info import Lookup  # the client side does not need it
+
+    path = socket_path(options.cache_path)
+    path.unlink(missing_ok=True)  # left behind by a server that is gone
+    path.parent.mkdir(parents=True, exist_ok=True)
+    stop = Event()
+    with Lookup(options) as lookup:
+        index = ReleaseIndex(lookup, options.cache_duration)
+        try:
+            handler = partial(_Handler, index=index, settings=_settings(options))
+            with ThreadingUnixStreamServer(str(path), handler) as server:
+                path.chmod(0o600)  # the answers are as private as the cache
+                server.daemon_threads = True
+                Thread(target=index.keep_fresh, args=(stop,), name="refresh", daemon=True).start()
+                yield server
+        finally:
+            stop.set()
+            path.unlink(missing_ok=True)
+
+
+def _answers(path: Path) -> bool:
+    try:
+        _ask(path, {"projects": []})
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+__all__ = [
+    "ReleaseIndex",
+    "ServerError",
+    "listening",
+    "run_server",
+    "served_info",
+    "socket_path",
+]
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import json
+import sys
+import threading
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from threading import Lock
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Callable, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable
+    from contextlib import AbstractContextManager
+    from importlib.metadata import PathDistribution
+    from pathlib import Path
+
+    from rich.table import Table
+
+T = TypeVar("T")
+
+#: the steps of a package's lookup, in the order they happen
+STEPS = ("queue", "wait", "connect", "transfer", "cache", "parse", "normalize", "index")
+#: how many of the slowest packages the table shows
+SLOWEST = 10
+
+_CURRENT: ContextVar[tuple[Timings, str] | None] = ContextVar("timings", default=None)
+
+
+class Timings:
+    """
+    Wall time spent per phase of a run, and per step of each package's lookup.
+
+    A phase started within another is not counted towards the outer one, so the top level phases add up to the run.
+    Steps are recorded against the package being looked up in the current thread, see :func:`step`.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.phases: dict[str, float] = {}
+        self.parents: dict[str, str | None] = {}
+        self._steps: dict[str, dict[str, float]] = {}
+
+    @contextmanager
+    def phase(self, name: str, within: str | None = None) -> Generator[None, None, None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self._add_phase(name, within, perf_counter() - start)
+
+    def track(self, items: Iterable[T], name: str, within: str | None = None) -> Generator[T, None, None]:
+        """Count the time spent producing each item (e.g. waiting for the next package) towards a phase."""
+        iterator = iter(items)
+        while True:
+            with self.phase(name, within):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def _add_phase(self, name: str, within: str | None, took: float) -> None:
+        with self._lock:
+            self.parents.setdefault(name, within)
+            self.phases[name] = self.phases.get(name, 0.0) + took
+            if within is not None:
+                self.phases[within] = self.phases.get(within, 0.0) - took
+
+    def queued(self, fetch: Callable[[PathDistribution], T]) -> Callable[[PathDistribution], T]:
+        """Wrap a per package fetch, recording how long each waited for a worker and the steps of its lookup."""
+        at = perf_counter()
+
+        def run(dist: PathDistribution) -> T:
+            name = dist.metadata["Name"]
+            self.add(name, "queue", perf_counter() - at)
+            token = _CURRENT.set((self, name))
+            try:
+                return fetch(dist)
+            finally:
+                _CURRENT.reset(token)
+
+        return run
+
+    def add(self, package: str, name: str, took: float) -> None:
+        with self._lock:
+            steps = self._steps.setdefault(package, {})
+            steps[name] = steps.get(name, 0.0) + took
+
+    def packages(self) -> dict[str, dict[str, float]]:
+        """:return: the time of each step per package, the cache step being what a request took beyond the transport"""
+        result: dict[str, dict[str, float]] = {}
+        with self._lock:
+            for package, steps in self._steps.items():
+                transport = sum(steps.get(i, 0.0) for i in ("wait", "connect", "transfer"))
+                cache = steps.get("cache", 0.0) + max(0.0, steps.get("request", 0.0) - transport)
+                result[package] = {i: cache if i == "cache" else steps.get(i, 0.0) for i in STEPS}
+        return result
+
+
+def phase(timings: Timings | None, name: str, within: str | None = None) -> AbstractContextManager[None]:
+    return nullcontext() if timings is None else timings.phase(name, within)
+
+
+def active() -> bool:
+    return _CURRENT.get() is not None
+
+
+@contextmanager
+def step(name: str) -> Generator[None, None, None]:
+    """Time a step of the lookup of the package the current thread works on, if timings are being recorded."""
+    if (current := _CURRENT.get()) is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        current[0].add(current[1], name, perf_counter() - start)
+
+
+def add_step(name: str, took: float) -> None:
+    if (current := _CURRENT.get()) is not None:
+        current[0].add(current[1], name, took)
+
+
+def print_timings(timings: Timings, output: str) -> None:
+    from rich.console import Console
+
+    packages = timings.packages()
+    # inner phases running in parallel threads can add up to more than the outer one took
+    by_phase = {name: max(0.0, took) for name, took in timings.phases.items()}
+    if output == "json":
+        print(json.dumps({"phases": by_phase, "packages": packages}, indent=2), file=sys.stderr)  # ruff:ignore[print]
+        return
+    run = sum(by_phase.values()) or 1.0  # each phase excludes those within it, together they make up the run
+    phases = _table("Timings", "phase", "seconds", "share")
+
+    def add_phases(parent: str | None, depth: int) -> None:  # each phase followed by those within it
+        for name, took in by_phase.items():
+            if timings.parents.get(name) == parent:
+                phases.add_row(f"{'  ' * depth}{name}", f"{took:.3f}", f"{took / run:.0%}")
+                add_phases(name, depth + 1)
+
+    add_phases(None, 0)
+    slowest = _table(f"Slowest {SLOWEST} packages (seconds)", "package", "lookup", *STEPS)
+    totals = {name: sum(took for i, took in steps.items() if i != "queue") for name, steps in packages.items()}
+    for name in sorted(packages, key=totals.__getitem__, reverse=True)[:SLOWEST]:
+        slowest.add_row(name, f"{totals[name]:.3f}", *(f"{packages[name][i]:.3f}" for i in STEPS))
+    all_steps = {i: sum(steps[i] for steps in packages.values()) for i in STEPS}
+    slowest.add_section()
+    slowest.add_row(f"all {len(packages)}", f"{sum(totals.values()):.3f}", *(f"{all_steps[i]:.3f}" for i in STEPS))
+    console = Console(stderr=True)
+    console.print(phases)
+    console.print(slowest)
+
+
+def _table(title: str, first: str, *numbers: str) -> Table:
+    from rich import box
+    from rich.table import Column, Table
+
+    # without padding, so that the per package table fits a terminal of 80 columns
+    columns = [Column(first, overflow="fold"), *(Column(i, justify="right", min_width=len(i)) for i in numbers)]
+    return Table(*columns, title=title, title_justify="left", box=box.SIMPLE_HEAD, padding=(0, 0))
+
+
+@contextmanager
+def profile(path: Path) -> Generator[None, None, None]:
+    """Profile everything run within, including the threads started meanwhile, into a pstats file."""
+    import cProfile
+    import pstats
+
+    from rich.console import Console
+
+    profiler = cProfile.Profile()
+    per_thread: list[cProfile.Profile] = []
+    if sys.version_info < (3, 12):  # the profiler sees just the thread that enabled it, give each new one its own
+
+        def start(*args: Any) -> None:  # ruff:ignore[unused-function-argument]
+            thread_profiler = cProfile.Profile()
+            per_thread.append(thread_profiler)
+            thread_profiler.enable()  # takes over from this hook for the rest of the thread
+
+        threading.setprofile(start)
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        threading.setprofile(None)
+        stats = pstats.Stats(profiler)
+        for thread_profiler in per_thread:
+            stats.add(thread_profiler)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        stats.dump_stats(path)
+        Console(stderr=True).print(f"[dim]profile written to {path}, inspect it with: python -m pstats {path}")
+
+
+__all__ = [
+    "STEPS",
+    "Timings",
+    "active",
+    "add_step",
+    "phase",
+    "print_timings",
+    "profile",
+    "step",
+]
@@ -1,7 +1,14 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import os
 import sys
-from typing import TYPE_CHECKING
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Lock, Thread
+from typing import TYPE_CHECKING, Any
 from unittest.mock import MagicMock, create_autospec
 
 import pytest
@@ -9,9 +16,10 @@ import pytest
 from pypi_changes._cli import Options
 
 if TYPE_CHECKING:
-    from pathlib import Path
+    from collections.abc import Iterator
 
     from _pytest.monkeypatch import MonkeyPatch
+    from pytest_mock import MockerFixture
 
     from tests import MakeDist
 
@@ -19,6 +27,8 @@ if TYPE_CHECKING:
 @pytest.fixture(autouse=True)
 def _no_index(monkeypatch: MonkeyPatch) -> None:
     monkeypatch.delenv("PIP_INDEX_URL", raising=False)
+    monkeypatch.delenv("PIP_EXTRA_INDEX_URL", raising=False)
+    monkeypatch.setenv("PIP_CONFIG_FILE", os.devnull)
 
 
 @pytest.fixture(autouse=True)
@@ -30,7 +40,23 @@ def _no_proxy(monkeypatch: MonkeyPatch) -> None:
 
 @pytest.fixture
 def option_simple(tmp_path: Path) -> Options:
-    return Options(cache_path=tmp_path / "a.sqlite", jobs=1, cache_duration=0.01)
+    return Options(
+        python=[Path(sys.executable)],
+        cache_path=tmp_path / "a.sqlite",
+        jobs=1,
+        host_limits={},
+        cache_duration=0.01,
+        cache_max_size=256,
+        not_found_duration=3600,
+        not_published=[],
+        offline=False,
+        prefetch=None,
+        source="json",
+        stream=False,
+        compact=False,
+        limit=None,
+        only_outdated=False,
+    )
 
 
 @pytest.fixture
@@ -44,3 +70,112 @@ def make_dist() -> MakeDist:
         return dist
 
     return func
+
+
+class PyPIServer:
+    """A local stand-in for the PyPI JSON API and JSON simple index, serving ``projects`` and recording the requests."""
+
+    def __init__(self) -> None:
+        self.projects: dict[str, dict[str, Any]] = {}
+        self.requests: list[str] = []
+        self.statuses: list[int] = []
+        self.delay: float = 0
+        self.upload_times = True
+        #: projects served by the simple index only, the JSON API answers 404 for them
+        self.index_only: set[str] = set()
+        #: further index servers, served at /index/<name>/<project>/
+        self.indexes: dict[str, dict[str, dict[str, Any]]] = {}
+        self.url = ""
+        #: the next requests are answered with 429, with these Retry-After values (None for no header)
+        self.throttle: list[str | None] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = Lock()
+
+    def add(self, name: str, *versions: str, index: str | None = None) -> None:
+        releases = {
+            v: [{"packagetype": "sdist", "upload_time_iso_8601": f"2021-01-{i:02}T00:00:00Z"}]
+            for i, v in enumerate(versions, 1)
+        }
+        projects = self.projects if index is None else self.indexes.setdefault(index, {})
+        projects[name] = {"info": {"name": name}, "releases": releases}
+
+    def body(self, path: str) -> tuple[bytes | None, str]:
+        parts = path.strip("/").split("/")
+        if parts[0] not in {"simple", "index"}:
+            project = None if parts[0] in self.index_only else self.projects.get(parts[0])
+            return (None if project is None else json.dumps(project).encode()), "application/json"
+        projects, name = (self.projects, parts[1]) if parts[0] == "simple" else (self.indexes[parts[1]], parts[2])
+        if (project := projects.get(name)) is None:
+            return None, "application/vnd.pypi.simple.v1+json"
+        files = [
+            {
+                "filename": f"{name}-{version}.tar.gz",
+                "url": f"{self.url}/files/{name}-{version}.tar.gz",
+                "hashes": {},
+                **({"upload-time": artifact["upload_time_iso_8601"]} if self.upload_times else {}),
+            }
+            for version, artifacts in project["releases"].items()
+            for artifact in artifacts
+        ]
+        page = {"meta": {"api-version": "1.1"}, "name": name, "files": files, "versions": list(project["releases"])}
+        return json.dumps(page).encode(), "application/vnd.pypi.simple.v1+json"
+
+
+@pytest.fixture
+def pypi_server(mocker: MockerFixture) -> Iterator[PyPIServer]:
+    server = PyPIServer()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            server.requests.append(self.path)
+            with server.lock:
+                server.in_flight += 1
+                server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                throttle = (True, server.throttle.pop(0)) if server.throttle else (False, None)
+            time.sleep(server.delay)
+            with server.lock:  # the request is done once answered, count it so before the client sees the answer
+                server.in_flight -= 1
+            if throttle[0]:
+                self._throttle(throttle[1])
+            else:
+                self._respond()
+
+        def _throttle(self, retry_after: str | None) -> None:
+            server.statuses.append(429)
+            self.send_response(429)
+            if retry_after is not None:
+                self.send_header("Retry-After", retry_after)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def _respond(self) -> None:
+            found, content_type = server.body(self.path)
+            body = found or json.dumps({"message": "Not Found"}).encode()
+            etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+            if found is not None and self.headers.get("If-None-Match") == etag:
+                server.statuses.append(304)
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            server.statuses.append(404 if found is None else 200)
+            self.send_response(server.statuses[-1])
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            if found is not None:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:  # ruff:ignore[builtin-argument-shadowing]
+            pass
+
+    with ThreadingHTTPServer(("127.0.0.1", 0), Handler) as httpd:
+        thread = Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        server.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+        mocker.patch("pypi_changes._info.PYPI_JSON_API", server.url)
+        mocker.patch("pypi_changes._info.PYPI_INDEX", f"{server.url}/simple")
+        yield server
+        httpd.shutdown()
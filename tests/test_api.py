@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+
+from pypi_changes import Checker, check_environment, check_environment_async
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+    from tests.conftest import PyPIServer
+
+
+@pytest.fixture
+def pythons(mocker: MockerFixture, tmp_path: Path) -> list[Path]:
+    result = []
+    for env, names in (("one", ["b", "a"]), ("two", ["a", "internal-tool"])):
+        python = tmp_path / env / "python"
+        for name in names:
+            meta = python.parent / "site" / f"{name}-1.0.dist-info" / "METADATA"
+            meta.parent.mkdir(parents=True)
+            meta.write_text(f"Name: {name}\nVersion: 1.0\n", encoding="utf-8")
+        python.write_text("", encoding="utf-8")
+        result.append(python)
+    mocker.patch("pypi_changes._distributions._get_py_info", side_effect=lambda p, _: [Path(p).parent / "site"])
+    return result
+
+
+def test_checker_reuses_session(
+    tmp_path: Path, pypi_server: PyPIServer, pythons: list[Path], capsys: pytest.CaptureFixture[str]
+) -> None:
+    pypi_server.add("a", "1.0", "2.0")
+    pypi_server.add("b", "1.0")
+
+    with Checker(cache_path=tmp_path / "a.sqlite", not_published=["internal-*"]) as checker:
+        first = checker.check(pythons)
+        second = checker.check(pythons[0])
+
+    assert [(pkg.python, pkg.name) for pkg in first] == [
+        (pythons[0], "a"),
+        (pythons[0], "b"),
+        (pythons[1], "a"),
+        (pythons[1], "internal-tool"),
+    ]
+    assert [pkg.last_release.version for pkg in first if pkg.last_release] == ["2.0", "1.0", "2.0"]
+    assert not first[3].published
+    assert [pkg.name for pkg in second] == ["a", "b"]
+    assert sorted(pypi_server.requests) == ["/a/json", "/b/json"]  # the second check is answered from the cache
+    assert capsys.readouterr() == ("", "")  # nothing shown
+
+
+def test_check_environment_async(tmp_path: Path, pypi_server: PyPIServer, pythons: list[Path]) -> None:
+    pypi_server.add("a", "1.0", "2.0")
+    pypi_server.add("b", "1.0")
+
+    async def run() -> list[list[str]]:
+        checks = [check_environment_async(i, cache_path=tmp_path / f"{i.parent.name}.sqlite") for i in pythons]
+        return [[pkg.name for pkg in packages] for packages in await asyncio.gather(*checks)]
+
+    assert asyncio.run(run()) == [["a", "b"], ["a", "internal-tool"]]
+    assert sorted(pypi_server.requests) == ["/a/json", "/a/json", "/b/json", "/internal-tool/json"]
+
+
+def test_check_environment_invalid(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="does not exist"):
+        check_environment(tmp_path / "missing", cache_path=tmp_path / "a.sqlite")
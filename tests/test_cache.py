@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import sqlite3
+import sys
+import time
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
+
+import pytest
+from requests import ConnectionError as RequestsConnectionError
+from requests import Request
+from requests.structures import CaseInsensitiveDict
+from requests_cache import CachedRequest, CachedResponse, CachedSession
+
+from pypi_changes import main
+from pypi_changes._cache import MAX_IDLE, SKIP_TTL, NotCachedError, ReleaseStore, delete_unusable, evict
+from pypi_changes._cli import parse_cli_arguments
+from pypi_changes._info import PYPI_JSON_API, _normalize, _OfflineAdapter, _session, pypi_info
+from pypi_changes._pkg import Release
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+    from pypi_changes._cli import Options
+    from tests import MakeDist
+    from tests.conftest import PyPIServer
+
+
+def test_expired_entry_revalidated(
+    tmp_path: Path,
+    option_simple: Options,
+    make_dist: MakeDist,
+    pypi_server: PyPIServer,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    pypi_server.add("a", "1.0", "2.0")
+    distributions = [make_dist(tmp_path, "a", "1.0")]
+
+    first = list(pypi_info(distributions, option_simple))
+    time.sleep(option_simple.cache_duration)
+    second = list(pypi_info(distributions, option_simple))
+
+    assert pypi_server.statuses == [200, 304]
+    assert first[0].releases == second[0].releases
+    err = capsys.readouterr().err
+    assert "0 from cache, 0 revalidated, 1 downloaded" in err
+    assert "0 from cache, 1 revalidated, 0 downloaded" in err
+
+
+def test_fresh_entry_from_cache(
+    tmp_path: Path,
+    option_simple: Options,
+    make_dist: MakeDist,
+    pypi_server: PyPIServer,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    pypi_server.add("a", "1.0")
+    option_simple.cache_duration = 3600
+    distributions = [make_dist(tmp_path, "a", "1.0")]
+
+    for _ in range(2):
+        list(pypi_info(distributions, option_simple))
+
+    assert pypi_server.statuses == [200]
+    assert "1 from cache, 0 revalidated, 0 downloaded" in capsys.readouterr().err
+
+
+def test_delete_unusable_keeps_revalidatable(tmp_path: Path) -> None:
+    session = CachedSession(str(tmp_path / "a.sqlite"), backend="sqlite", expire_after=-1)
+    expired = datetime.now(timezone.utc) - timedelta(seconds=1)
+    for name, headers in [("a", {"ETag": '"1"'}), ("b", {"Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}), ("c", {})]:
+        request = CachedRequest(method="GET", url=f"https://pypi.org/pypi/{name}/json")
+        response = CachedResponse(
+            status_code=200, url=request.url, request=request, headers=CaseInsensitiveDict(headers)
+        )
+        session.cache.save_response(response, cache_key=name, expires=expired)
+
+    delete_unusable(session)
+
+    assert sorted(session.cache.responses.keys()) == ["a", "b"]
+
+
+def test_warm_run_skips_normalization(
+    tmp_path: Path,
+    option_simple: Options,
+    make_dist: MakeDist,
+    pypi_server: PyPIServer,
+    mocker: MockerFixture,
+) -> None:
+    pypi_server.add("a", "1.0", "2.0")
+    option_simple.cache_duration = 3600
+    distributions = [make_dist(tmp_path, "a", "1.0")]
+    normalize = mocker.patch("pypi_changes._info._normalize", wraps=_normalize)
+
+    first = list(pypi_info(distributions, option_simple))
+    second = list(pypi_info(distributions, option_simple))
+
+    assert normalize.call_count == 1
+    assert first[0].releases == second[0].releases
+
+
+def test_release_store_round_trip(tmp_path: Path) -> None:
+    at = datetime(2021, 1, 1, tzinfo=timezone.utc)
+    releases = {
+        "2.0": Release("2.0", at, "bdist_wheel"),
+        "1.0": Release("1.0", at, "sdist", synthesized=True),
+        "0.1": Release("0.1", None),
+    }
+    with ReleaseStore(tmp_path / "a.sqlite") as store:
+        store.put("https://index", "a", "key", '"1"', releases)
+
+        assert store.get("https://index", "a", '"1"') == releases
+        assert store.get("https://index", "a", '"2"') is None
+        assert store.get("https://index", "b", '"1"') is None
+        assert store.get("https://other", "a", '"1"') is None  # an index server may serve the same validator
+
+
+def test_release_store_drops_old_layout(tmp_path: Path) -> None:
+    path = tmp_path / "a.sqlite"
+    with closing(sqlite3.connect(str(path))) as conn, conn:
+        conn.execute("CREATE TABLE releases (name TEXT PRIMARY KEY, validator TEXT NOT NULL, data TEXT NOT NULL)")
+        conn.execute("INSERT INTO releases VALUES ('a', '\"1\"', '[]')")
+
+    with ReleaseStore(path) as store:
+        assert store.get("https://index", "a", '"1"') is None
+        store.put("https://index", "a", "key", '"1"', {})
+        assert store.get("https://index", "a", '"1"') == {}
+
+
+def test_offline_serves_expired_cache_without_network(
+    tmp_path: Path,
+    option_simple: Options,
+    make_dist: MakeDist,
+    pypi_server: PyPIServer,
+) -> None:
+    pypi_server.add("a", "1.0", "2.0")
+    pypi_server.add("b", "1.0")
+    online = list(pypi_info([make_dist(tmp_path, "a", "1.0")], option_simple))
+    time.sleep(option_simple.cache_duration)
+    pypi_server.requests.clear()
+
+    option_simple.offline = True
+    offline = {p.name: p for p in pypi_info([make_dist(tmp_path, n, "1.0") for n in "ab"], option_simple)}
+
+    assert pypi_server.requests == []
+    assert offline["a"].releases == online[0].releases
+    assert offline["a"].fetched_at is not None
+    assert offline["a"].fetched_at < datetime.now(timezone.utc)
+    assert isinstance(offline["b"].exc, NotCachedError)
+    assert offline["b"].fetched_at is None
+
+
+def test_offline_miss_never_reaches_transport(
+    tmp_path: Path, option_simple: Options, make_dist: MakeDist, pypi_server: PyPIServer, mocker: MockerFixture
+) -> None:
+    send = mocker.spy(_OfflineAdapter, "send")
+    option_simple.offline = True
+
+    [pkg] = pypi_info([make_dist(tmp_path, "a", "1.0")], option_simple)
+
+    assert isinstance(pkg.exc, NotCachedError)
+    assert send.call_count == 0  # answered by the cache layer
+    assert pypi_server.requests == []
+    url = f"{pypi_server.url}/a/json"
+    with _session(option_simple) as session, pytest.raises(RequestsConnectionError, match="offline, not requesting"):
+        session.get_adapter(url).send(Request("GET", url).prepare())  # should anything get past it, it refuses too
+    assert pypi_server.requests == []
+
+
+def test_offline_miss_counted_as_not_cached(
+    tmp_path: Path,
+    option_simple: Options,
+    make_dist: MakeDist,
+    pypi_server: PyPIServer,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    pypi_server.add("a", "1.0")
+    list(pypi_info([make_dist(tmp_path, "a", "1.0")], option_simple))
+    capsys.readouterr()
+
+    option_simple.offline = True
+    list(pypi_info([make_dist(tmp_path, n, "1.0") for n in "ab"], option_simple))
+
+    assert "1 from cache, 0 revalidated, 0 downloaded (0.0 KiB), 1 not cached" in capsys.readouterr().err
+
+
+def test_prefetch_warms_offline_run(tmp_path: Path, pypi_server: PyPIServer, make_dist: MakeDist) -> None:
+    pypi_server.add("a", "1.0", "2.0")
+    pypi_server.add("b", "1.0")
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("a==1.0\nb>=1 # the b project\n", encoding="utf-8")
+    cache = tmp_path / "a.sqlite"
+
+    assert main(["--prefetch", str(requirements), "--cache-path", str(cache)]) == 0
+    assert sorted(pypi_server.requests) == ["/a/json", "/b/json"]
+
+    options = parse_cli_arguments(["--offline", "--cache-path", str(cache), sys.executable])
+    packages = list(pypi_info([make_dist(tmp_path, n, "1.0") for n in "ab"], options))
+    assert len(pypi_server.requests) == 2
+    assert all(p.releases for p in packages)
+
+
+def _cache_with(path: Path, *names: str) -> CachedSession:
+    session = CachedSession(str(path), backend="sqlite", expire_after=-1)
+    for name in names:
+        request = CachedRequest(method="GET", url=f"https://pypi.org/pypi/{name}/json")
+        response = CachedResponse(
+            status_code=200,
+            url=request.url,
+            request=request,
+            content=b"x" * 1024,  # ty: ignore[unknown-argument] # attrs names the field _content, the init content
+        )
+        session.cache.save_response(response, cache_key=name)
+    return session
+
+
+def test_evict_least_recently_used_in_bounded_batches(tmp_path: Path) -> None:
+    path = tmp_path / "a.sqlite"
+    session = _cache_with(path, "a", "b", "c")
+    assert evict(path, [], max_size=1024 * 1024) == 0
+    with closing(sqlite3.connect(str(path), isolation_level=None)) as conn:
+        conn.execute("UPDATE last_used SET at = at - 100 WHERE key IN ('a', 'b')")
+        conn.execute("UPDATE last_used SET at = at - 100 WHERE key = 'a'")
+
+    assert evict(path, ["c"], max_size=0, batch=1) == 1
+    assert sorted(session.cache.responses.keys()) == ["b", "c"]
+    assert evict(path, ["c"], max_size=0, batch=1) == 1
+    assert sorted(session.cache.responses.keys()) == ["c"]
+
+
+def test_evict_idle(tmp_path: Path) -> None:
+    path = tmp_path / "a.sqlite"
+    session = _cache_with(path, "a", "b")
+    evict(path, [], max_size=1024 * 1024)
+    with closing(sqlite3.connect(str(path), isolation_level=None)) as conn:
+        conn.execute("UPDATE last_used SET at = at - ? WHERE key = 'a'", (MAX_IDLE + 1,))
+
+    assert evict(path, [], max_size=1024 * 1024) == 1
+    assert list(session.cache.responses.keys()) == ["b"]
+
+
+def test_run_records_usage_and_evicts(
+    tmp_path: Path, option_simple: Options, make_dist: MakeDist, pypi_server: PyPIServer
+) -> None:
+    for name in "ab":
+        pypi_server.add(name, "1.0")
+    list(pypi_info([make_dist(tmp_path, n, "1.0") for n in "ab"], option_simple))
+    with closing(sqlite3.connect(str(option_simple.cache_path))) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM releases").fetchone()[0] == 2
+    option_simple.cache_max_size = 0
+
+    list(pypi_info([make_dist(tmp_path, "a", "1.0")], option_simple))
+
+    with closing(sqlite3.connect(str(option_simple.cache_path))) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM releases").fetchone()[0] == 0  # evicted with their responses
+
+
+def test_evict_drops_releases_of_deleted_responses(tmp_path: Path) -> None:
+    path = tmp_path / "a.sqlite"
+    _cache_with(path, "a", "b")
+    with ReleaseStore(path) as store:
+        for name in "ab":
+            store.put(PYPI_JSON_API, name, name, '"1"', {})
+    with closing(sqlite3.connect(str(path), isolation_level=None)) as conn:
+        conn.execute("DELETE FROM responses WHERE key = 'a'")  # as the cache layer or delete_unusable do
+
+    assert evict(path, [], max_size=1024 * 1024) == 0
+
+    with closing(sqlite3.connect(str(path))) as conn:
+        assert conn.execute("SELECT name FROM releases").fetchall() == [("b",)]
+
+
+def test_cache_command(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    path = tmp_path / "a.sqlite"
+    _cache_with(path, "a", "b")
+    with ReleaseStore(path) as store:
+        for name in "ab":
+            store.put(PYPI_JSON_API, name, name, '"1"', {})
+    evict(path, [], max_size=1024 * 1024)
+
+    assert main(["cache", "prune", "--cache-path", str(path), "--cache-max-size", "0"]) == 0
+    out, err = capsys.readouterr()
+    assert "evicted 2 least recently used responses" in err
+    assert "responses 0 (0 expired)" in out
+    assert "projects  0" in out
+
+    assert main(["cache", "vacuum", "-c", str(path)]) == 0
+    assert main(["cache", "-c", str(tmp_path / "missing.sqlite")]) == 1
+
+
+def test_release_store_skip(tmp_path: Path, mocker: MockerFixture) -> None:
+    with ReleaseStore(tmp_path / "a.sqlite") as store:
+        store.skip("https://index", "a", SKIP_TTL)
+        store.skip("https://index", "b", SKIP_TTL)
+        store.skip("https://index", "b", 0)
+        store.skip("https://index", "c", 10 * SKIP_TTL)
+
+        assert store.skipped("https://index", "a")
+        assert not store.skipped("https://other", "a")
+        assert not store.skipped("https://index", "b")
+        mocker.patch("pypi_changes._cache.time.time", return_value=time.time() + SKIP_TTL + 1)
+        assert not store.skipped("https://index", "a")
+        assert store.skipped("https://index", "c")
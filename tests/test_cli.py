@@ -17,17 +17,35 @@ if TYPE_CHECKING:
 
 def test_cli_ok_explicit_python(tmp_path: Path, mocker: MockerFixture) -> None:
     user_cache_path = mocker.patch("pypi_changes._cli.user_cache_path", return_value=tmp_path / "cache")
+    python = tmp_path / "python"
+    python.touch()
 
-    options = parse_cli_arguments([str(tmp_path)])
+    options = parse_cli_arguments([str(python)])
 
     assert isinstance(options, Options)
     assert options.__dict__ == {
         "jobs": 10,
+        "host_limits": {},
+        "source": "json",
         "cache_path": tmp_path / "cache" / "requests.sqlite",
         "cache_duration": 3600,
-        "python": tmp_path,
+        "cache_max_size": 256,
+        "not_found_duration": 86400,
+        "not_published": [],
+        "cache_command": None,
+        "serve": False,
+        "no_server": False,
+        "offline": False,
+        "prefetch": None,
+        "python": [python],
         "sort": "updated",
+        "limit": None,
+        "only_outdated": False,
         "output": "tree",
+        "compact": False,
+        "stream": False,
+        "timings": None,
+        "profile": None,
     }
     assert user_cache_path.call_args == call(appname="pypi_changes", appauthor="gaborbernat", version=__version__)
 
@@ -40,7 +58,7 @@ def test_cli_default_python_from_path(tmp_path: Path, mocker: MockerFixture) ->
 
     options = parse_cli_arguments([])
 
-    assert options.python == python_path.absolute()
+    assert options.python == [python_path.absolute()]
 
 
 def test_cli_default_python_not_found(mocker: MockerFixture, capsys: CaptureFixture[str]) -> None:
@@ -63,3 +81,92 @@ def test_cli_python_not_exist(tmp_path: Path, capsys: CaptureFixture[str]) -> No
     out, err = capsys.readouterr()
     assert not out
     assert f"pypi-changes: error: argument PYTHON_EXE: path {tmp_path / 'missing'} does not exist" in err
+
+
+@pytest.mark.parametrize(
+    ("args", "message"),
+    [
+        pytest.param(["--limit", "0"], "argument --limit/-n: expected a positive number, got '0'", id="zero"),
+        pytest.param(["-n", "2", "--stream"], "argument --stream: not allowed with argument --limit/-n", id="stream"),
+    ],
+)
+def test_cli_limit_invalid(capsys: CaptureFixture[str], args: list[str], message: str) -> None:
+    with pytest.raises(SystemExit):
+        parse_cli_arguments(args)
+
+    assert f"pypi-changes: error: {message}" in capsys.readouterr().err
+
+
+def test_cli_host_limit() -> None:
+    args = ["--host-limit", "pypi.org=4", "--host-limit", "files.example=2", "--host-limit", "pypi.org=8"]
+
+    assert parse_cli_arguments(args).host_limits == {"pypi.org": 8, "files.example": 2}  # the last one wins
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        pytest.param("pypi.org=0", id="zero"),
+        pytest.param("pypi.org", id="missing-separator"),
+        pytest.param("=4", id="missing-host"),
+    ],
+)
+def test_cli_host_limit_invalid(capsys: CaptureFixture[str], value: str) -> None:
+    with pytest.raises(SystemExit):
+        parse_cli_arguments(["--host-limit", value])
+
+    expected = f"argument --host-limit: expected HOST=COUNT with a positive COUNT, got {value!r}"
+    assert f"pypi-changes: error: {expected}" in capsys.readouterr().err
+
+
+def _make_venv(path: Path) -> Path:
+    python = path / "bin" / "python"
+    python.parent.mkdir(parents=True)
+    python.touch()
+    return python
+
+
+def test_cli_many_pythons(tmp_path: Path) -> None:
+    first, second = _make_venv(tmp_path / "a"), _make_venv(tmp_path / "b")
+
+    options = parse_cli_arguments([str(first), str(second), str(first)])
+
+    assert options.python == [first, second]
+
+
+def test_cli_venv_directory(tmp_path: Path) -> None:
+    first, second = _make_venv(tmp_path / "venvs" / "a"), _make_venv(tmp_path / "venvs" / "b")
+    (tmp_path / "venvs" / "not-a-venv").mkdir()
+
+    assert parse_cli_arguments([str(tmp_path / "venvs")]).python == [first, second]
+    assert parse_cli_arguments([str(tmp_path / "venvs" / "a")]).python == [first]
+
+
+def test_cli_venv_glob(tmp_path: Path) -> None:
+    first, _ = _make_venv(tmp_path / "a-1"), _make_venv(tmp_path / "b-1")
+
+    assert parse_cli_arguments([str(tmp_path / "a-*")]).python == [first]
+
+
+def test_cli_no_venv_in_directory(tmp_path: Path, capsys: CaptureFixture[str]) -> None:
+    with pytest.raises(SystemExit):
+        parse_cli_arguments([str(tmp_path)])
+
+    assert f"no virtual environment found within {tmp_path}" in capsys.readouterr().err
+
+
+def test_cli_cache_command(tmp_path: Path) -> None:
+    options = parse_cli_arguments([
+        "cache",
+        "prune",
+        "--cache-path",
+        str(tmp_path / "a.sqlite"),
+        "--cache-max-size",
+        "1",
+    ])
+
+    assert options.__dict__ == {"cache_command": "prune", "cache_path": tmp_path / "a.sqlite", "cache_max_size": 1}
+
+
+def test_cli_cache_command_default_info(tmp_path: Path) -> None:
+    assert parse_cli_arguments(["cache", "-c", str(tmp_path)]).cache_command == "info"
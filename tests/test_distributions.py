@@ -1,22 +1,31 @@
 from __future__ import annotations
 
+import json
+import os
 import sys
 from pathlib import Path
+from textwrap import dedent
 from typing import TYPE_CHECKING
 
+import pytest
+
 from pypi_changes._cli import Options
-from pypi_changes._distributions import collect_distributions
+from pypi_changes._distributions import _get_py_info, _read_name_version, collect_distributions, file_distributions
 from tests import PathDistribution
 
 if TYPE_CHECKING:
     from pytest_mock import MockerFixture
 
 
-def test_distributions() -> None:
-    distributions = list(collect_distributions(Options(python=Path(sys.executable))))
+def test_distributions(tmp_path: Path) -> None:
+    distributions = list(collect_distributions(_options(tmp_path)))
     assert all(isinstance(i, PathDistribution) for i in distributions)
 
 
+def _options(tmp_path: Path) -> Options:
+    return Options(python=[Path(sys.executable)], cache_path=tmp_path / "a.sqlite", jobs=1)
+
+
 def _make_dist(path: Path, name: str) -> Path:
     dist = path / f"{name}.dist-info"
     dist.mkdir(parents=True)
@@ -27,7 +36,7 @@ def _make_dist(path: Path, name: str) -> Path:
 def test_distribution_duplicate_path(mocker: MockerFixture, tmp_path: Path) -> None:
     dist = _make_dist(tmp_path, "a")
     mocker.patch("pypi_changes._distributions._get_py_info", return_value=[dist.parent] * 2)
-    distributions = list(collect_distributions(Options(python=Path(sys.executable))))
+    distributions = list(collect_distributions(_options(tmp_path)))
     assert len(distributions) == 1
     assert distributions[0].metadata["Name"] == "a"
 
@@ -35,7 +44,194 @@ def test_distribution_duplicate_path(mocker: MockerFixture, tmp_path: Path) -> N
 def test_distribution_duplicate_pkg(mocker: MockerFixture, tmp_path: Path) -> None:
     dist_1, dist_2 = _make_dist(tmp_path / "1", "a"), _make_dist(tmp_path / "2", "a")
     mocker.patch("pypi_changes._distributions._get_py_info", return_value=[dist_1.parent, dist_2.parent])
-    distributions = list(collect_distributions(Options(python=Path(sys.executable))))
+    distributions = list(collect_distributions(_options(tmp_path)))
     assert len(distributions) == 1
     assert distributions[0].metadata["Name"] == "a"
     assert distributions[0]._path == dist_1  # ruff:ignore[private-member-access]
+
+
+def test_distribution_reads_headers_only(mocker: MockerFixture, tmp_path: Path) -> None:
+    dist = tmp_path / "a.dist-info"
+    dist.mkdir()
+    (dist / "METADATA").write_bytes(b"Metadata-Version: 2.1\nName: A\nVersion: 1.0\n\n\xff not utf-8 description")
+    mocker.patch("pypi_changes._distributions._get_py_info", return_value=[tmp_path])
+
+    distributions = list(collect_distributions(_options(tmp_path)))
+
+    assert len(distributions) == 1
+    assert distributions[0].metadata["Name"] == "A"
+    assert distributions[0].version == "1.0"
+
+
+def test_distribution_name_from_directory(mocker: MockerFixture, tmp_path: Path) -> None:
+    (tmp_path / "foo_bar-2.0.dist-info").mkdir()
+    (tmp_path / "baz.egg-info").mkdir()
+    mocker.patch("pypi_changes._distributions._get_py_info", return_value=[tmp_path])
+
+    distributions = list(collect_distributions(_options(tmp_path)))
+
+    assert [(d.metadata["Name"], d.version) for d in distributions] == [("foo_bar", "2.0")]
+
+
+def test_py_info_cached(mocker: MockerFixture, tmp_path: Path) -> None:
+    site = tmp_path / "site"
+    site.mkdir()
+    check_output = mocker.patch("pypi_changes._distributions.check_output", return_value=json.dumps([str(site)]))
+
+    first = _get_py_info(sys.executable, tmp_path / "cache")
+    second = _get_py_info(sys.executable, tmp_path / "cache")
+    assert check_output.call_count == 1
+    assert first == second == [site]
+
+    (site / "new.pth").touch()  # an entry changed, e.g. a new .pth file might add paths
+    os.utime(site, ns=(0, 0))
+    _get_py_info(sys.executable, tmp_path / "cache")
+    assert check_output.call_count == 2
+
+
+def test_distributions_unchanged_not_read(mocker: MockerFixture, tmp_path: Path) -> None:
+    site = tmp_path / "site"
+    dist_a = _make_dist(site, "a")
+    mocker.patch("pypi_changes._distributions._get_py_info", return_value=[site])
+    read = mocker.patch("pypi_changes._distributions._read_name_version", wraps=_read_name_version)
+
+    def names() -> list[str]:
+        return [d.metadata["Name"] for d in collect_distributions(_options(tmp_path))]
+
+    assert names() == ["a"]
+    assert names() == ["a"]
+    assert read.call_count == 1  # the second run reuses the listing of the unchanged environment
+
+    _make_dist(site, "b")
+    assert sorted(names()) == ["a", "b"]
+    assert [i.args[0].name for i in read.call_args_list[1:]] == ["b.dist-info"]
+
+    (dist_a / "METADATA").write_text("Name: a\nVersion: 2.0")  # reinstalled at the same directory
+    os.utime(dist_a, ns=(0, 0))
+    os.utime(site, ns=(0, 0))
+    assert sorted(names()) == ["a", "b"]
+    assert [i.args[0].name for i in read.call_args_list[2:]] == ["a.dist-info"]
+    assert next(d for d in collect_distributions(_options(tmp_path)) if d.metadata["Name"] == "a").version == "2.0"
+
+
+def test_distributions_many_pythons(mocker: MockerFixture, tmp_path: Path) -> None:
+    pythons = [tmp_path / "1" / "python", tmp_path / "2" / "python"]
+    for python in pythons:
+        _make_dist(python.parent / "site", "a")
+    _make_dist(tmp_path / "2" / "site", "b")
+    mocker.patch("pypi_changes._distributions._get_py_info", side_effect=lambda p, _: [Path(p).parent / "site"])
+    options = _options(tmp_path)
+    options.python = pythons
+
+    distributions = collect_distributions(options)
+
+    found = [(d.python, d.metadata["Name"]) for d in distributions]  # ty: ignore[unresolved-attribute]
+    assert found[0] == (pythons[0], "a")
+    assert sorted(found[1:]) == [(pythons[1], "a"), (pythons[1], "b")]
+
+
+def test_file_distributions_requirements(tmp_path: Path) -> None:
+    requirements = tmp_path / "requirements.txt"
+    text = "# pinned\n--index-url https://example.com\na==1.0 \\\n    --hash=sha256:0\n"
+    text += "B[x]>=2 ; python_version > '3'  # b\n-e .\nc\nd @ https://example.com/d.tar.gz\n"
+    text += "e==1.*\nf==1.0; python_version < '3'\n"
+    requirements.write_text(text, encoding="utf-8")
+
+    found = [(d.metadata["Name"], d.version, d.python) for d in file_distributions(requirements)]  # ty: ignore[unresolved-attribute]
+
+    expected = [("a", "1.0"), ("B", None), ("c", None), ("e", None)]  # f is not for this interpreter
+    assert found == [(name, version, requirements) for name, version in expected]
+
+
+@pytest.mark.parametrize(
+    ("name", "text"),
+    [
+        pytest.param(
+            "uv.lock",
+            """
+            version = 1
+            [[package]]
+            name = "a"
+            version = "1.0"
+            source = { registry = "https://pypi.org/simple" }
+            [[package]]
+            name = "service"
+            version = "0.1.0"
+            source = { editable = "." }
+            [[package]]
+            name = "b"
+            version = "2.0"
+            source = { registry = "https://pypi.org/simple" }
+            [[package]]
+            name = "c"
+            version = "3.0"
+            source = { git = "https://github.com/c/c?rev=main#abc" }
+            """,
+            id="uv",
+        ),
+        pytest.param(
+            "poetry.lock",
+            """
+            [[package]]
+            name = "a"
+            version = "1.0"
+            [[package]]
+            name = "b"
+            version = "2.0"
+            [package.source]
+            type = "legacy"
+            url = "https://example.com/simple"
+            reference = "private"
+            [[package]]
+            name = "c"
+            version = "3.0"
+            [package.source]
+            type = "directory"
+            url = "../c"
+            """,
+            id="poetry",
+        ),
+        pytest.param(
+            "pylock.dev.toml",
+            """
+            lock-version = "1.0"
+            created-by = "pip"
+            [[packages]]
+            name = "a"
+            version = "1.0"
+            wheels = [{ url = "https://example.com/a-1.0-py3-none-any.whl", hashes = { sha256 = "0" } }]
+            [[packages]]
+            name = "b"
+            version = "2.0"
+            index = "https://pypi.org/simple"
+            [[packages]]
+            name = "c"
+            directory = { path = "../c" }
+            """,
+            id="pylock",
+        ),
+    ],
+)
+def test_file_distributions_lock(tmp_path: Path, name: str, text: str) -> None:
+    lock = tmp_path / name
+    lock.write_text(dedent(text), encoding="utf-8")
+
+    found = [(d.metadata["Name"], d.version) for d in file_distributions(lock)]
+
+    assert found == [("a", "1.0"), ("b", "2.0")]
+
+
+def test_distributions_from_files(mocker: MockerFixture, tmp_path: Path) -> None:
+    get_py_info = mocker.patch("pypi_changes._distributions._get_py_info", return_value=[tmp_path / "site"])
+    _make_dist(tmp_path / "site", "a")
+    requirements, lock = tmp_path / "requirements.txt", tmp_path / "uv.lock"
+    requirements.write_text("b==1.0\n", encoding="utf-8")
+    lock.write_text('[[package]]\nname = "c"\nversion = "2.0"\n', encoding="utf-8")
+    options = _options(tmp_path)
+    options.python = [requirements, Path(sys.executable), lock]
+
+    distributions = collect_distributions(options)
+
+    found = [(d.python, d.metadata["Name"]) for d in distributions]  # ty: ignore[unresolved-attribute]
+    assert found == [(requirements, "b"), (Path(sys.executable), "a"), (lock, "c")]
+    assert get_py_info.call_count == 1  # the files are read, not launched
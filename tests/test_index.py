@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+import pytest
+
+from pypi_changes._index import index_urls
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+
+@pytest.fixture(autouse=True)
+def _no_machine_config(mocker: MockerFixture, tmp_path: Path) -> None:
+    mocker.patch("pypi_changes._index.site_config_path", return_value=tmp_path / "site")
+    mocker.patch("pypi_changes._index.user_config_path", return_value=tmp_path / "user")
+    mocker.patch("pypi_changes._index.Path.home", return_value=tmp_path / "home")
+    mocker.patch("pypi_changes._index.sys.platform", "darwin")
+
+
+def test_index_urls_from_environment() -> None:
+    environ = {
+        "PIP_CONFIG_FILE": os.devnull,
+        "PIP_INDEX_URL": "https://mirror/simple",
+        "PIP_EXTRA_INDEX_URL": "https://a/simple https://b/simple\nhttps://mirror/simple",
+    }
+
+    assert index_urls(environ) == ["https://mirror/simple", "https://a/simple", "https://b/simple"]
+
+
+def test_index_urls_from_pip_config(tmp_path: Path) -> None:
+    config = tmp_path / "pip.conf"
+    text = (
+        "[global]\nindex-url = https://mirror/simple\nextra-index-url =\n    https://a/simple\n    https://b/simple\n"
+    )
+    config.write_text(f"{text}[install]\nindex-url = https://install/simple\n", encoding="utf-8")
+
+    result = index_urls({"PIP_CONFIG_FILE": str(config), "PIP_EXTRA_INDEX_URL": "https://c/simple"})
+
+    assert result == ["https://install/simple", "https://c/simple"]
+
+
+def test_index_urls_user_config_overrides_site(tmp_path: Path) -> None:
+    for at, url in [("site", "https://site/simple"), ("user", "https://user/simple")]:
+        (tmp_path / at).mkdir()
+        (tmp_path / at / "pip.conf").write_text(f"[global]\nindex-url = {url}\n", encoding="utf-8")
+
+    assert index_urls({}) == ["https://user/simple"]
+
+
+def test_index_urls_none(tmp_path: Path) -> None:
+    assert index_urls({"PIP_CONFIG_FILE": str(tmp_path / "missing.conf")}) == []
+
+
+def test_index_urls_not_http_ignored(caplog: pytest.LogCaptureFixture, capsys: pytest.CaptureFixture[str]) -> None:
+    environ = {"PIP_CONFIG_FILE": os.devnull, "PIP_EXTRA_INDEX_URL": "file:///opt/wheels/simple https://a/simple"}
+
+    assert index_urls(environ) == ["https://a/simple"]
+    assert index_urls(environ) == ["https://a/simple"]  # warned about once
+    assert caplog.messages == ["ignoring index server file:///opt/wheels/simple, only http(s) ones are asked"]
+    assert capsys.readouterr() == ("", "")  # logged, not printed: a library user decides where it goes
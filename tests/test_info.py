@@ -1,28 +1,48 @@
 from __future__ import annotations
 
 import os
+import time
+from concurrent.futures import Executor, Future
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Callable, TypeVar
 from unittest.mock import create_autospec
 
 import pytest
 from pypi_simple import DistributionPackage, ProjectPage, PyPISimple
+from requests import Response
 from vcr import use_cassette
 
-from pypi_changes._info import _merge_with_index_server, pypi_info
-from pypi_changes._pkg import Package
+from pypi_changes._cache import ReleaseStore
+from pypi_changes._info import Lookup, _load_from_simple_api, _merge_with_index_server, _session, pypi_info
+from pypi_changes._pkg import Package, Release
 
 if TYPE_CHECKING:
     from pytest_mock import MockerFixture
 
     from pypi_changes._cli import Options
     from tests import MakeDist
+    from tests.conftest import PyPIServer
+
+T = TypeVar("T")
+
+
+class _SameThreadExecutor(Executor):
+    def submit(self, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> Future[T]:  # ruff:ignore[no-self-use]
+        future: Future[T] = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as exc:  # ruff:ignore[blind-except]
+            future.set_exception(exc)
+        return future
 
 
 @pytest.fixture
 def _force_pypi_index(mocker: MockerFixture, _no_index: None) -> None:
     mocker.patch("pypi_changes._info.PYPI_INDEX", "")
     mocker.patch.dict(os.environ, {"PIP_INDEX_URL": "https://pypi.org/simple"})
+    # vcr un-patches the connection classes process wide while it opens a connection, racing a concurrent request
+    mocker.patch("pypi_changes._info.ThreadPoolExecutor", return_value=_SameThreadExecutor())
 
 
 @pytest.mark.usefixtures("_force_pypi_index")
@@ -52,7 +72,9 @@ def test_info_missing(tmp_path: Path, option_simple: Options, make_dist: MakeDis
     assert isinstance(packages, list)
     assert len(packages) == 1
     pkg = packages[0]
-    assert pkg.info is None
+    assert pkg.releases is None  # not hosted by any source is a negative answer, not a failure
+    assert pkg.exc is None
+    assert not pkg.published
     assert pkg.last_release_at is None
 
 
@@ -67,8 +89,8 @@ def test_info_pypi_server_invalid_version(tmp_path: Path, option_simple: Options
     assert len(packages) == 1
     pkg = packages[0]
     assert pkg.exc is None
-    assert pkg.info is not None
-    assert "2004b" in pkg.info["releases"]  # this is an invalid version
+    assert pkg.releases is not None
+    assert "2004b" in pkg.releases  # this is an invalid version
 
 
 def test_info_pypi_server_timeout(
@@ -86,7 +108,7 @@ def test_info_pypi_server_timeout(
     assert isinstance(packages, list)
     assert len(packages) == 1
     pkg = packages[0]
-    assert pkg.info is None
+    assert pkg.releases is None
     assert isinstance(pkg.exc, TimeoutError)
 
 
@@ -97,11 +119,268 @@ def test_merge_with_pypi() -> None:
     client = create_autospec(PyPISimple, spec_set=True)
     client.get_project_page.return_value = page
 
-    start = {"0": [{"packagetype": "sdist", "upload_time_iso_8601": None, "version": "0"}]}
+    start = {"0": Release("0", None, "sdist")}
     result = _merge_with_index_server("a", client, start)
     assert result == {
-        "0": [{"packagetype": "sdist", "upload_time_iso_8601": None, "version": "0"}],
-        "1": [{"packagetype": "sdist", "upload_time_iso_8601": None, "version": "1"}],
-        "2": [{"packagetype": "sdist", "upload_time_iso_8601": None, "version": "2"}],
-        "3": [{"packagetype": "wheel", "upload_time_iso_8601": None, "version": "3"}],
+        "0": Release("0", None, "sdist"),
+        "1": Release("1", None, "sdist"),
+        "2": Release("2", None, "sdist"),
+        "3": Release("3", None, "wheel"),
     }
+
+
+def test_info_same_project_many_pythons_fetched_once(
+    tmp_path: Path, option_simple: Options, make_dist: MakeDist, pypi_server: PyPIServer
+) -> None:
+    pypi_server.add("a", "1.0", "2.0")
+    distributions = [make_dist(tmp_path / str(i), n, "1.0") for i, n in enumerate(["a", "A", "b"])]
+
+    packages = list(pypi_info(distributions, option_simple))
+
+    assert sorted(pypi_server.requests) == ["/a/json", "/b/json"]
+    assert sorted(p.name for p in packages) == ["A", "a", "b"]
+    assert len({id(p.releases) for p in packages if p.name.lower() == "a"}) == 1
+
+
+def test_info_simple_source_matches_json_api(
+    tmp_path: Path, option_simple: Options, make_dist: MakeDist, pypi_server: PyPIServer
+) -> None:
+    pypi_server.add("a", "1.0", "2.0")
+    pypi_server.projects["a"]["releases"]["3.0"] = []
+    distributions = [make_dist(tmp_path, "a", "1.0")]
+    [from_json] = [p.releases for p in pypi_info(distributions, option_simple)]
+
+    option_simple.source = "simple"
+    option_simple.cache_path = tmp_path / "b.sqlite"
+    [from_simple] = [p.releases for p in pypi_info(distributions, option_simple)]
+
+    assert pypi_server.requests == ["/a/json", "/simple/a/"]
+    assert isinstance(from_json, dict)
+    assert isinstance(from_simple, dict)
+    assert list(from_simple) == list(from_json) == ["3.0", "2.0", "1.0"]
+    assert from_simple["2.0"] == from_json["2.0"]
+    assert from_simple["3.0"].synthesized
+
+
+def test_info_simple_source_without_upload_time_falls_back(
+    tmp_path: Path, option_simple: Options, make_dist: MakeDist, pypi_server: PyPIServer
+) -> None:
+    pypi_server.add("a", "1.0")
+    pypi_server.upload_times = False
+    option_simple.source = "simple"
+
+    packages = list(pypi_info([make_dist(tmp_path, "a", "1.0"), make_dist(tmp_path, "b", "1.0")], option_simple))
+
+    assert sorted(pypi_server.requests) == ["/a/json", "/simple/a/", "/simple/b/"]
+    assert {p.name: p.releases for p in packages} == {
+        "a": {"1.0": Release("1.0", datetime(2021, 1, 1, tzinfo=timezone.utc), "sdist")},
+        "b": None,  # not published
+    }
+
+
+def test_info_not_found_remembered(
+    tmp_path: Path, option_simple: Options, make_dist: MakeDist, pypi_server: PyPIServer
+) -> None:
+    pypi_server.add("a", "1.0")
+    distributions = [make_dist(tmp_path, name, "1.0") for name in ("a", "internal")]
+    list(pypi_info(distributions, option_simple))
+    time.sleep(option_simple.cache_duration)
+    pypi_server.requests.clear()
+
+    packages = {p.name: p for p in pypi_info(distributions, option_simple)}
+
+    assert pypi_server.requests == ["/a/json"]  # the 404 outlives --cache-duration
+    assert not packages["internal"].published
+    assert packages["a"].published
+
+
+def test_info_not_found_expires(
+    tmp_path: Path, option_simple: Options, make_dist: MakeDist, pypi_server: PyPIServer
+) -> None:
+    option_simple.not_found_duration = 0
+    distributions = [make_dist(tmp_path, "internal", "1.0")]
+    list(pypi_info(distributions, option_simple))
+
+    [pkg] = list(pypi_info(distributions, option_simple))
+
+    assert pypi_server.requests == ["/internal/json", "/internal/json"]
+    assert not pkg.published
+
+
+def test_info_not_published_pattern(
+    tmp_path: Path, option_simple: Options, make_dist: MakeDist, pypi_server: PyPIServer
+) -> None:
+    pypi_server.add("a", "1.0")
+    option_simple.not_published = ["acme_*"]
+    distributions = [make_dist(tmp_path, name, "1.0") for name in ("a", "Acme.Internal", "acme-tools")]
+
+    packages = {p.name: p for p in pypi_info(distributions, option_simple)}
+
+    assert pypi_server.requests == ["/a/json"]
+    assert {name: pkg.published for name, pkg in packages.items()} == {
+        "a": True,
+        "Acme.Internal": False,
+        "acme-tools": False,
+    }
+
+
+@pytest.fixture
+def private_index(pypi_server: PyPIServer, mocker: MockerFixture) -> PyPIServer:
+    # the stand-in answers both as PyPI and as the private index server
+    mocker.patch("pypi_changes._info.PYPI_INDEX", "https://pypi.org/simple")
+    mocker.patch.dict(os.environ, {"PIP_INDEX_URL": f"{pypi_server.url}/simple"})
+    return pypi_server
+
+
+def test_info_index_server_asked_concurrently(
+    tmp_path: Path, option_simple: Options, make_dist: MakeDist, private_index: PyPIServer
+) -> None:
+    private_index.add("a", "1.0", "2.0")
+    private_index.delay = 0.1
+    option_simple.jobs = 2
+
+    [pkg] = list(pypi_info([make_dist(tmp_path, "a", "1.0")], option_simple))
+
+    assert sorted(private_index.requests) == ["/a/json", "/simple/a/"]
+    assert private_index.max_in_flight == 2
+    assert pkg.releases is not None
+    assert list(pkg.releases) == ["2.0", "1.0"]
+
+
+def test_info_index_server_skipped_for_single_source(
+    tmp_path: Path, option_simple: Options, make_dist: MakeDist, private_index: PyPIServer
+) -> None:
+    private_index.add("public", "1.0", "2.0")
+    private_index.add("private", "1.0")
+    private_index.index_only.add("private")
+    distributions = [make_dist(tmp_path, name, "1.0") for name in ("public", "private")]
+    first = {p.name: p.releases for p in pypi_info(distributions, option_simple)}
+    assert sorted(private_index.requests) == ["/private/json", "/public/json", "/simple/private/", "/simple/public/"]
+    time.sleep(option_simple.cache_duration)
+    private_index.requests.clear()
+
+    second = {p.name: p.releases for p in pypi_info(distributions, option_simple)}
+
+    # PyPI's 404 is remembered for its own duration, the index adding nothing to public only as long as the cache
+    assert sorted(private_index.requests) == ["/public/json", "/simple/private/", "/simple/public/"]
+    assert first == second
+    assert second["private"] == {"1.0": Release("1.0", None, "sdist")}
+
+
+def test_info_index_server_skipped_within_cache_duration(
+    tmp_path: Path, option_simple: Options, make_dist: MakeDist, private_index: PyPIServer
+) -> None:
+    private_index.add("public", "1.0", "2.0")
+    private_index.add("private", "1.0")
+    private_index.index_only.add("private")
+    option_simple.cache_duration = 3600
+    distributions = [make_dist(tmp_path, name, "1.0") for name in ("public", "private")]
+
+    with Lookup(option_simple) as lookup:
+        first = {p.name: p.releases for p in lookup.packages(distributions)}
+        second = {p.name: p.releases for p in lookup.packages(distributions)}
+
+    assert first == second
+    assert len(private_index.requests) == 4
+    assert lookup.stats.hits == 2  # the index is not asked about public again, not even from the cache
+
+
+def test_info_many_indexes_merged_first_wins(
+    tmp_path: Path, option_simple: Options, make_dist: MakeDist, pypi_server: PyPIServer, mocker: MockerFixture
+) -> None:
+    pypi_server.add("a", "1.0", "2.0")
+    pypi_server.add("a", "2.0", "3.0", index="first")
+    pypi_server.add("a", "4.0", index="second")
+    pypi_server.add("private", "1.0", index="first")
+    mocker.patch("pypi_changes._info.PYPI_INDEX", "https://pypi.org/simple")
+    env = {"PIP_INDEX_URL": f"{pypi_server.url}/index/first", "PIP_EXTRA_INDEX_URL": f"{pypi_server.url}/index/second"}
+    mocker.patch.dict(os.environ, env)
+    distributions = [make_dist(tmp_path, name, "1.0") for name in ("a", "private")]
+
+    first = {p.name: p.releases for p in pypi_info(distributions, option_simple)}
+    assert len(pypi_server.requests) == 6
+    time.sleep(option_simple.cache_duration)
+    pypi_server.requests.clear()
+    second = {p.name: p.releases for p in pypi_info(distributions, option_simple)}
+
+    assert first == second
+    assert second["a"] is not None
+    assert list(second["a"]) == ["4.0", "3.0", "2.0", "1.0"]
+    assert second["a"]["2.0"].upload_time is not None  # PyPI answered first, its entry wins
+    assert second["a"]["3.0"] == Release("3.0", None, "sdist")
+    assert second["private"] == {"1.0": Release("1.0", None, "sdist")}
+    # known not to host private: PyPI and the second index are not asked again
+    assert sorted(pypi_server.requests) == ["/a/json", "/index/first/a/", "/index/first/private/", "/index/second/a/"]
+
+
+def test_info_failing_index_server_left_out(
+    tmp_path: Path, option_simple: Options, make_dist: MakeDist, pypi_server: PyPIServer, mocker: MockerFixture
+) -> None:
+    pypi_server.add("a", "1.0", "2.0")
+    pypi_server.add("a", "3.0", index="first")
+    mocker.patch("pypi_changes._info.PYPI_INDEX", "https://pypi.org/simple")
+    # the server root answers with the JSON API document, not a simple index page
+    env = {"PIP_INDEX_URL": f"{pypi_server.url}/index/first", "PIP_EXTRA_INDEX_URL": f"{pypi_server.url}/"}
+    mocker.patch.dict(os.environ, env)
+
+    with Lookup(option_simple) as lookup:
+        [pkg] = list(lookup.packages([make_dist(tmp_path, "a", "1.0")]))
+
+    assert pkg.exc is None
+    assert pkg.releases is not None
+    assert list(pkg.releases) == ["3.0", "2.0", "1.0"]
+    assert list(lookup.index_errors) == [f"{pypi_server.url}/"]
+
+
+def test_info_index_server_on_same_host_shares_limit(
+    tmp_path: Path, option_simple: Options, make_dist: MakeDist, private_index: PyPIServer
+) -> None:
+    private_index.add("a", "1.0", "2.0")
+    private_index.delay = 0.1
+    option_simple.jobs = 2
+    option_simple.host_limits = {"127.0.0.1": 1}
+
+    list(pypi_info([make_dist(tmp_path, "a", "1.0")], option_simple))
+
+    assert sorted(private_index.requests) == ["/a/json", "/simple/a/"]
+    assert private_index.max_in_flight == 1
+
+
+def test_load_from_simple_api_not_found(option_simple: Options, pypi_server: PyPIServer) -> None:
+    with _session(option_simple) as session:
+        client = PyPISimple(endpoint=f"{pypi_server.url}/simple/", session=session)
+        assert _load_from_simple_api("a", client, session) is None
+
+    assert pypi_server.requests == ["/simple/a/"]
+
+
+def test_load_from_simple_api_failed(option_simple: Options, mocker: MockerFixture) -> None:
+    response = Response()
+    response.status_code = 503
+    mocker.patch("pypi_changes._info._get", return_value=response)
+    parse = mocker.spy(ProjectPage, "from_response")
+
+    with _session(option_simple) as session:
+        client = PyPISimple(endpoint="https://index.example/simple/", session=session)
+        assert _load_from_simple_api("a", client, session) == {}  # no releases learnt, the project is published
+
+    assert parse.call_count == 0
+
+
+def test_load_from_simple_api_stored_releases_reused(
+    option_simple: Options, pypi_server: PyPIServer, mocker: MockerFixture
+) -> None:
+    pypi_server.add("a", "1.0", "2.0")
+    with _session(option_simple) as session, ReleaseStore(option_simple.cache_path) as store:
+        client = PyPISimple(endpoint=f"{pypi_server.url}/simple/", session=session)
+        first = _load_from_simple_api("a", client, session, store)
+        time.sleep(option_simple.cache_duration)
+        parse = mocker.spy(ProjectPage, "from_response")
+
+        second = _load_from_simple_api("a", client, session, store)
+
+    assert pypi_server.statuses == [200, 304]
+    assert parse.call_count == 0  # the unchanged page is not decoded again
+    assert first is not None
+    assert list(first) == ["2.0", "1.0"]
+    assert second == first
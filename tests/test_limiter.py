@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from threading import Thread
+from typing import TYPE_CHECKING
+
+import pytest
+from requests import ConnectionError as RequestsConnectionError
+from requests import Response, Session
+
+from pypi_changes._info import pypi_info
+from pypi_changes._limiter import AdaptiveAdapter, HostLimit, HostLimits, _retry_after
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+    from pypi_changes._cli import Options
+    from tests import MakeDist
+    from tests.conftest import PyPIServer
+
+
+@pytest.fixture(autouse=True)
+def _fast_backoff(mocker: MockerFixture) -> None:
+    mocker.patch("pypi_changes._limiter.BACKOFF_BASE", 0.01)
+
+
+def _session(limits: HostLimits) -> Session:
+    session = Session()
+    session.mount("http://", AdaptiveAdapter(limits))
+    return session
+
+
+def test_host_limit_aimd() -> None:
+    limit = HostLimit(maximum=8)
+    assert limit.limit == 2
+    for _ in range(4):  # slow start, one more per success
+        limit.succeeded(0.1)
+    assert limit.limit == 6
+
+    limit.throttled()
+    assert limit.limit == 3
+    limit.succeeded(0.1)  # additive increase from now on, by one per round of requests
+    assert limit.limit == pytest.approx(3 + 1 / 3)
+
+    limit.succeeded(1)  # much slower than the fastest seen, do not grow
+    assert limit.limit == pytest.approx(3 + 1 / 3)
+
+    for _ in range(5):
+        limit.throttled()
+    assert limit.limit == 1
+    for _ in range(100):
+        limit.succeeded(0.1)
+    assert limit.limit == 8
+
+
+def test_retry_after_honoured(pypi_server: PyPIServer) -> None:
+    pypi_server.add("a", "1.0")
+    pypi_server.throttle = ["0.3"]
+    limits = HostLimits(jobs=4)
+
+    start = time.monotonic()
+    response = _session(limits).get(f"{pypi_server.url}/a/json")
+
+    assert response.status_code == 200
+    assert pypi_server.statuses == [429, 200]
+    assert time.monotonic() - start >= 0.3
+    assert limits["127.0.0.1"].limit == 2  # halved to one, then one more for the success
+
+
+def test_retry_with_backoff_gives_up(pypi_server: PyPIServer) -> None:
+    pypi_server.add("a", "1.0")
+    pypi_server.throttle = [None] * 10
+
+    response = _session(HostLimits(jobs=4)).get(f"{pypi_server.url}/a/json")
+
+    assert response.status_code == 429
+    assert pypi_server.statuses == [429] * 4
+
+
+def test_retry_after_too_long_not_waited(pypi_server: PyPIServer) -> None:
+    pypi_server.add("a", "1.0")
+    pypi_server.throttle = ["3600"]
+    session = _session(HostLimits(jobs=4))
+
+    response = session.get(f"{pypi_server.url}/a/json")
+    after = Thread(target=session.get, args=(f"{pypi_server.url}/a/json",), daemon=True)
+    after.start()
+    after.join(timeout=5)
+
+    assert response.status_code == 429
+    assert not after.is_alive()  # the host is not paused for the hour asked either
+    assert pypi_server.statuses == [429, 200]
+
+
+def test_host_limit_caps_concurrency(pypi_server: PyPIServer) -> None:
+    pypi_server.add("a", "1.0")
+    pypi_server.delay = 0.05
+    session = _session(HostLimits(jobs=8, per_host={"127.0.0.1": 2}))
+
+    threads = [Thread(target=session.get, args=(f"{pypi_server.url}/a/json",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert pypi_server.statuses == [200] * 8
+    assert pypi_server.max_in_flight == 2
+
+
+def test_pypi_info_survives_throttling(
+    tmp_path: Path, option_simple: Options, make_dist: MakeDist, pypi_server: PyPIServer
+) -> None:
+    for name in "abcd":
+        pypi_server.add(name, "1.0", "2.0")
+    pypi_server.delay = 0.02
+    pypi_server.throttle = ["0", None, "0"]
+    option_simple.jobs = 4
+
+    packages = list(pypi_info([make_dist(tmp_path, name, "1.0") for name in "abcd"], option_simple))
+
+    assert all(pkg.last_release is not None for pkg in packages)
+    assert pypi_server.statuses.count(429) == 3
+    assert pypi_server.statuses.count(200) == 4
+
+
+def test_connection_errors_retried_then_raised() -> None:
+    limits = HostLimits(jobs=4)
+    with socket.socket() as sock:  # a port nothing listens on
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    with pytest.raises(RequestsConnectionError):
+        _session(limits).get(f"http://127.0.0.1:{port}/a/json")
+    assert limits["127.0.0.1"].limit == 1
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        pytest.param(None, None, id="missing"),
+        pytest.param("2", 2, id="seconds"),
+        pytest.param("-1", 0, id="negative"),
+        pytest.param("Wed, 21 Oct 2015 07:28:00 GMT", 0, id="date-past"),
+        pytest.param("Wed, 21 Oct 2015 07:28:00 -0000", 0, id="date-naive"),
+        pytest.param(format_datetime(datetime.now(timezone.utc) + timedelta(hours=1), usegmt=True), 3600, id="date"),
+        pytest.param("soon", None, id="invalid"),
+    ],
+)
+def test_retry_after(value: str | None, expected: float | None) -> None:
+    response = Response()
+    if value is not None:
+        response.headers["Retry-After"] = value
+
+    assert _retry_after(response) == (None if expected is None else pytest.approx(expected, abs=60))
@@ -12,3 +12,41 @@ def test_help_module() -> None:
 def test_help_console() -> None:
     cli = Path(sys.executable).parent / f"python{'.exe' if sys.platform == 'win32' else ''}"
     subprocess.check_call([str(cli), "--help"])
+
+
+#: microseconds importing the package may take to show the help, well above what it takes so that slow machines pass
+STARTUP_BUDGET = 100_000
+
+
+def _imported(*args: str) -> dict[str, int]:
+    """:return: the modules imported running python with the arguments, with their cumulative import time in us"""
+    run = subprocess.run([sys.executable, "-X", "importtime", *args], capture_output=True, text=True, check=True)
+    found: dict[str, int] = {}
+    for line in run.stderr.splitlines():
+        if line.startswith("import time:") and (parts := line.split("|"))[1].strip().isdigit():
+            found[parts[2].strip()] = int(parts[1])
+    return found
+
+
+def test_help_imports_lazily() -> None:
+    imported = _imported("-m", "pypi_changes", "--help")
+
+    assert not {"pypi_changes._info", "requests", "requests_cache", "pypi_simple", "rich"} & imported.keys()
+    assert imported["pypi_changes"] < STARTUP_BUDGET
+
+
+def test_library_imports_lazily() -> None:
+    imported = _imported("-c", "from pypi_changes import Checker")
+
+    assert "pypi_changes._info" in imported
+    assert not {"rich.tree", "pypi_simple", "pypi_changes._print"} & imported.keys()
+
+
+def test_output_imports_only_its_printer(tmp_path: Path) -> None:
+    code = "import sys; from pypi_changes import main; main(sys.argv[1:])"
+    args = ["--offline", "-c", str(tmp_path / "a.sqlite"), "-o", "requirements", sys.executable]
+
+    imported = _imported("-c", code, *args)
+
+    assert "pypi_changes._print.requirements" in imported
+    assert not {"pypi_changes._print.tree", "pypi_changes._print.json", "pypi_simple"} & imported.keys()
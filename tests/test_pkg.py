@@ -3,55 +3,89 @@ from __future__ import annotations
 from datetime import datetime, timezone
 from typing import TYPE_CHECKING
 
-from pypi_changes._pkg import Package
+from packaging.version import Version
+
+from pypi_changes._pkg import Package, Release
 
 if TYPE_CHECKING:
     from pathlib import Path
 
+    from pytest_mock import MockerFixture
+
     from tests import MakeDist
 
 
 def test_ignore_dev_release(make_dist: MakeDist, tmp_path: Path) -> None:
-    releases = {"releases": {"1.0.0dev1": [{"version": "1.0.0dev1"}], "0.9.0": [{"version": "0.9.0"}]}}
-    pkg = Package(make_dist(tmp_path, "a", "1.0.0"), info=releases)
-    assert pkg.last_release == {"version": "0.9.0"}
+    releases = {"1.0.0dev1": Release("1.0.0dev1", None), "0.9.0": Release("0.9.0", None)}
+    pkg = Package(make_dist(tmp_path, "a", "1.0.0"), releases=releases)
+    assert pkg.last_release == Release("0.9.0", None)
 
 
 def test_fallback_to_rc_release(make_dist: MakeDist, tmp_path: Path) -> None:
-    pkg = Package(make_dist(tmp_path, "a", "1.0.0"), info={"releases": {"1.0.0rc1": [{"version": "1.0.0rc1"}]}})
-    assert pkg.last_release == {"version": "1.0.0rc1"}
+    pkg = Package(make_dist(tmp_path, "a", "1.0.0"), releases={"1.0.0rc1": Release("1.0.0rc1", None)})
+    assert pkg.last_release == Release("1.0.0rc1", None)
 
 
 def test_current_release_parse_ok(make_dist: MakeDist, tmp_path: Path) -> None:
-    pkg = Package(make_dist(tmp_path, "a", "1.0.0"), info={"releases": {"1.0.0": [{"version": "1.0.0"}]}})
-    assert pkg.current_release == {"version": "1.0.0"}
+    pkg = Package(make_dist(tmp_path, "a", "1.0.0"), releases={"1.0.0": Release("1.0.0", None)})
+    assert pkg.current_release == Release("1.0.0", None)
 
 
 def test_current_release_empty(make_dist: MakeDist, tmp_path: Path) -> None:
-    pkg = Package(make_dist(tmp_path, "a", "1.0.0"), info=None)
-    assert pkg.current_release == {}
+    pkg = Package(make_dist(tmp_path, "a", "1.0.0"), releases=None)
+    assert pkg.current_release is None
 
 
 def test_last_release_at_synthesized(make_dist: MakeDist, tmp_path: Path) -> None:
-    release = {
-        "version": "1.0.0",
-        "upload_time_iso_8601": datetime(2021, 1, 1, tzinfo=timezone.utc),
-        "synthesized": True,
-    }
-    pkg = Package(make_dist(tmp_path, "a", "0.9.0"), info={"releases": {"1.0.0": [release]}})
+    release = Release("1.0.0", datetime(2021, 1, 1, tzinfo=timezone.utc), synthesized=True)
+    pkg = Package(make_dist(tmp_path, "a", "0.9.0"), releases={"1.0.0": release})
 
     assert pkg.last_release_at is None
 
 
 def test_last_release_at_real(make_dist: MakeDist, tmp_path: Path) -> None:
     upload_time = datetime(2021, 1, 1, tzinfo=timezone.utc)
-    release = {"version": "1.0.0", "upload_time_iso_8601": upload_time}
-    pkg = Package(make_dist(tmp_path, "a", "0.9.0"), info={"releases": {"1.0.0": [release]}})
+    pkg = Package(make_dist(tmp_path, "a", "0.9.0"), releases={"1.0.0": Release("1.0.0", upload_time)})
 
     assert pkg.last_release_at == upload_time
 
 
 def test_last_release_at_no_info(make_dist: MakeDist, tmp_path: Path) -> None:
-    pkg = Package(make_dist(tmp_path, "a", "1.0.0"), info=None)
+    pkg = Package(make_dist(tmp_path, "a", "1.0.0"), releases=None)
 
     assert pkg.last_release_at is None
+
+
+def test_latest_release_includes_pre_release(make_dist: MakeDist, tmp_path: Path) -> None:
+    releases = {"1.0.0rc1": Release("1.0.0rc1", None), "0.9.0": Release("0.9.0", None)}
+    pkg = Package(make_dist(tmp_path, "a", "0.9.0"), releases=releases)
+
+    assert pkg.latest_release == Release("1.0.0rc1", None)
+    assert pkg.last_release == Release("0.9.0", None)
+
+
+def test_outdated(make_dist: MakeDist, tmp_path: Path) -> None:
+    releases = {"2.0.0rc1": Release("2.0.0rc1", None), "1.0.0": Release("1.0.0", None)}
+
+    assert not Package(make_dist(tmp_path, "a", "1.0.0"), releases=releases).outdated  # pre-releases do not count
+    assert Package(make_dist(tmp_path, "a", "0.9.0"), releases=releases).outdated
+    assert not Package(make_dist(tmp_path, "a", "0.9.0"), releases=None).outdated
+
+
+def test_latest_release_no_info(make_dist: MakeDist, tmp_path: Path) -> None:
+    assert Package(make_dist(tmp_path, "a", "1.0.0"), releases={}).latest_release is None
+
+
+def test_release_lookup_parses_versions_once(make_dist: MakeDist, tmp_path: Path, mocker: MockerFixture) -> None:
+    releases = {f"2.0.0.dev{i}": Release(f"2.0.0.dev{i}", None) for i in range(1000, 0, -1)}
+    releases["1.0.0"] = Release("1.0.0", datetime(2021, 1, 1, tzinfo=timezone.utc))
+    packages = [Package(make_dist(tmp_path, str(i), "1.0.0"), releases=releases) for i in range(10)]
+    version = mocker.patch("pypi_changes._pkg.Version", wraps=Version)
+
+    for _ in range(5):  # sorting and every printer query these repeatedly
+        for pkg in packages:
+            assert pkg.last_release_at is not None
+            assert pkg.last_release is not None
+            assert pkg.current_release is not None
+
+    assert version.call_count == len(packages) * len(releases)
@@ -2,12 +2,15 @@ from __future__ import annotations
 
 import json
 import sys
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import TYPE_CHECKING
 from unittest.mock import create_autospec
 
-from pypi_changes._pkg import Package
+import pytest
+
+from pypi_changes._distributions import file_distributions
+from pypi_changes._pkg import Package, Release
 from pypi_changes._print.json import print_json, release_info
 from tests import PathDistribution
 
@@ -21,17 +24,12 @@ if TYPE_CHECKING:
 def test_print_json(capsys: CaptureFixture[str], option_simple: Options, mocker: MockerFixture) -> None:
     mocked_datetime = mocker.patch("pypi_changes._print.json.datetime")
     mocked_datetime.now.return_value = datetime(2021, 11, 6, 10, tzinfo=timezone.utc)
-    option_simple.python = Path(sys.executable)
+    option_simple.python = [Path(sys.executable)]
     option_simple.sort = "unsorted"
     packages = [
         Package(
             create_autospec(PathDistribution, spec_set=True, version=v_cur, metadata={"Name": n}),
-            info={
-                "releases": {
-                    v_last: [{"version": v_last, "upload_time_iso_8601": t_last}],
-                    v_cur: [{"version": v_cur, "upload_time_iso_8601": t_cur}],
-                },
-            },
+            releases={v_last: Release(v_last, t_last), v_cur: Release(v_cur, t_cur)},
         )
         for n, (v_last, t_last), (v_cur, t_cur) in [
             (
@@ -83,3 +81,145 @@ def test_release_info_no_release() -> None:
     result = release_info(None, datetime.now(timezone.utc))
 
     assert result == {}
+
+
+def test_print_json_stream(capsys: CaptureFixture[str], option_simple: Options, mocker: MockerFixture) -> None:
+    mocked_datetime = mocker.patch("pypi_changes._print.json.datetime")
+    mocked_datetime.now.return_value = datetime(2021, 11, 6, 10, tzinfo=timezone.utc)
+    option_simple.stream = True
+    packages = [
+        Package(
+            create_autospec(PathDistribution, spec_set=True, version="1", metadata={"Name": n}),
+            releases={"1": Release("1", None)},
+        )
+        for n in ("b", "a")
+    ]
+
+    print_json(iter(packages), option_simple)
+
+    out, err = capsys.readouterr()
+    assert not err
+    assert [json.loads(line)["name"] for line in out.splitlines()] == ["b", "a"]
+
+
+def test_print_json_many_pythons(capsys: CaptureFixture[str], option_simple: Options) -> None:
+    option_simple.python = [Path("/a/python"), Path("/b/python")]
+    packages = []
+    for name, python in [("x", "/b/python"), ("y", "/a/python"), ("x", "/a/python")]:
+        dist = create_autospec(PathDistribution, version="1", metadata={"Name": name})
+        dist.python = Path(python)
+        packages.append(Package(dist, releases={"1": Release("1", None)}))
+    option_simple.sort = "alphabetic"
+
+    print_json(packages, option_simple)
+
+    result = json.loads(capsys.readouterr().out)
+    assert list(result) == [str(Path("/a/python")), str(Path("/b/python"))]
+    assert [i["name"] for i in result[str(Path("/a/python"))]] == ["x", "y"]
+    assert [i["name"] for i in result[str(Path("/b/python"))]] == ["x"]
+
+
+def test_print_json_offline_data_age(capsys: CaptureFixture[str], option_simple: Options) -> None:
+    fetched_at = datetime.now(timezone.utc) - timedelta(days=3)
+    dist = create_autospec(PathDistribution, version="1", metadata={"Name": "a"})
+    packages = [Package(dist, releases={"1": Release("1", None)}, fetched_at=fetched_at)]
+    option_simple.sort = "alphabetic"
+
+    print_json(packages, option_simple)
+
+    [result] = json.loads(capsys.readouterr().out)
+    assert result["cached"] == {"date": fetched_at.isoformat(), "since": "3 days"}
+
+
+def test_print_json_not_published(capsys: CaptureFixture[str], option_simple: Options) -> None:
+    dist = create_autospec(PathDistribution, version="1", metadata={"Name": "a"})
+    option_simple.sort = "alphabetic"
+
+    print_json([Package(dist, releases=None)], option_simple)
+
+    [result] = json.loads(capsys.readouterr().out)
+    assert result["published"] is False
+    assert result["latest"] == {}
+
+
+def test_print_json_unpinned_requirement(tmp_path: Path, capsys: CaptureFixture[str], option_simple: Options) -> None:
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("requests>=2\n", encoding="utf-8")
+    [dist] = file_distributions(requirements)
+    option_simple.python = [requirements]
+    option_simple.sort = "alphabetic"
+    releases = {"3.0": Release("3.0", datetime(2021, 10, 5, tzinfo=timezone.utc))}
+
+    print_json([Package(dist, releases=releases)], option_simple)
+
+    [result] = json.loads(capsys.readouterr().out)
+    assert result["version"] is None
+    assert result["up_to_date"] is True
+    assert result["current"] == {"version": None}
+    assert result["latest"]["version"] == "3.0"
+
+
+@pytest.mark.parametrize("backend", ["orjson", "json"])
+@pytest.mark.parametrize("compact", [False, True], ids=["indented", "compact"])
+def test_print_json_written_per_package(
+    capsys: CaptureFixture[str], option_simple: Options, mocker: MockerFixture, backend: str, compact: bool
+) -> None:
+    if backend == "json":
+        mocker.patch("pypi_changes._print.json._orjson", return_value=None)
+    option_simple.python = [Path("/a/python"), Path("/b/python"), Path("/c/python")]
+    option_simple.sort = "alphabetic"
+    option_simple.compact = compact
+    packages = []
+    for name, python in [("x", "/b/python"), ("y", "/a/python"), ("x", "/a/python")]:
+        dist = create_autospec(PathDistribution, version="1", metadata={"Name": name})
+        dist.python = Path(python)
+        packages.append(Package(dist, releases={"2": Release("2", datetime(2021, 10, 5, tzinfo=timezone.utc))}))
+
+    print_json(packages, option_simple)
+
+    out = capsys.readouterr().out
+    result = json.loads(out)
+    assert [len(i) for i in result.values()] == [2, 1, 0]
+    if compact:
+        assert out.count("\n") == 1
+        assert "since" not in out
+        assert result[str(Path("/b/python"))][0]["latest"] == {"version": "2", "date": "2021-10-05T00:00:00+00:00"}
+    else:  # the same document as if encoded at once
+        assert out == f"{json.dumps(result, indent=2)}\n"
+
+
+@pytest.mark.parametrize("mode", ["indented", "compact", "stream"])
+def test_print_json_same_without_orjson(
+    capsys: CaptureFixture[str], option_simple: Options, mocker: MockerFixture, mode: str
+) -> None:
+    pytest.importorskip("orjson")
+    option_simple.python = [Path("/a/python"), Path("/b/python")]
+    option_simple.sort = "alphabetic"
+    option_simple.compact = mode == "compact"
+    option_simple.stream = mode == "stream"
+    packages = []
+    for name, python in [("pé", "/a/python"), ("x", "/b/python")]:
+        dist = create_autospec(PathDistribution, version="1", metadata={"Name": name})
+        dist.python = Path(python)
+        packages.append(Package(dist, releases={"2": Release("2", datetime(2021, 10, 5, tzinfo=timezone.utc))}))
+
+    print_json(packages, option_simple)
+    with_orjson = capsys.readouterr().out
+    mocker.patch("pypi_changes._print.json._orjson", return_value=None)
+    print_json(packages, option_simple)
+
+    assert capsys.readouterr().out == with_orjson
+    assert '"pé"' in with_orjson
+
+
+def test_print_json_stream_compact(capsys: CaptureFixture[str], option_simple: Options) -> None:
+    option_simple.stream = True
+    option_simple.compact = True
+    dist = create_autospec(PathDistribution, version="1", metadata={"Name": "a"})
+    fetched_at = datetime.now(timezone.utc)
+
+    print_json([Package(dist, releases={"1": Release("1", None)}, fetched_at=fetched_at)], option_simple)
+
+    [line] = capsys.readouterr().out.splitlines()
+    assert json.loads(line)["cached"] == {"date": fetched_at.isoformat()}
+    assert " " not in line
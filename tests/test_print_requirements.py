@@ -6,7 +6,7 @@ from pathlib import Path
 from typing import TYPE_CHECKING
 from unittest.mock import create_autospec
 
-from pypi_changes._pkg import Package
+from pypi_changes._pkg import Package, Release
 from pypi_changes._print.requirements import print_requirements
 from tests import PathDistribution
 
@@ -20,18 +20,19 @@ if TYPE_CHECKING:
 def test_print_requirements(capsys: pytest.CaptureFixture[str], option_simple: Options, mocker: MockerFixture) -> None:
     mocked_datetime = mocker.patch("pypi_changes._print.requirements.datetime")
     mocked_datetime.now.return_value = datetime(2021, 11, 6, 10, tzinfo=timezone.utc)
-    option_simple.python = Path(sys.executable)
+    option_simple.python = [Path(sys.executable)]
     option_simple.sort = "alphabetic"
     packages = [
         Package(
             create_autospec(PathDistribution, spec_set=True, version=v_l, metadata={"Name": n}),
-            info={"releases": {v_u: [{"version": v_u, "upload_time_iso_8601": t}]}},
+            releases={v_u: Release(v_u, t)},
         )
         for n, v_l, v_u, t in [
             ("a", "1", "2", datetime(2021, 10, 5, 10, tzinfo=timezone.utc)),
             ("b", "3", "3", datetime(2021, 11, 5, 10, tzinfo=timezone.utc)),
             ("d", "1", "1", None),
             ("c", "1", "2", None),
+            ("e", None, "2", None),  # a requirement without a pin is left as it is
         ]
     ]
 
@@ -47,16 +48,12 @@ def test_print_requirements_no_outdated(
 ) -> None:
     mocked_datetime = mocker.patch("pypi_changes._print.requirements.datetime")
     mocked_datetime.now.return_value = datetime(2021, 11, 6, 10, tzinfo=timezone.utc)
-    option_simple.python = Path(sys.executable)
+    option_simple.python = [Path(sys.executable)]
     option_simple.sort = "alphabetic"
     packages = [
         Package(
             create_autospec(PathDistribution, spec_set=True, version="1", metadata={"Name": "a"}),
-            info={
-                "releases": {
-                    "1": [{"version": "1", "upload_time_iso_8601": datetime(2021, 10, 5, 10, tzinfo=timezone.utc)}]
-                }
-            },
+            releases={"1": Release("1", datetime(2021, 10, 5, 10, tzinfo=timezone.utc))},
         ),
     ]
 
@@ -65,3 +62,45 @@ def test_print_requirements_no_outdated(
     out, err = capsys.readouterr()
     assert not err
     assert not out
+
+
+def test_print_requirements_stream(
+    capsys: pytest.CaptureFixture[str], option_simple: Options, mocker: MockerFixture
+) -> None:
+    mocked_datetime = mocker.patch("pypi_changes._print.requirements.datetime")
+    mocked_datetime.now.return_value = datetime(2021, 11, 6, 10, tzinfo=timezone.utc)
+    option_simple.sort = "alphabetic"
+    option_simple.stream = True
+    packages = [
+        Package(
+            create_autospec(PathDistribution, spec_set=True, version="1", metadata={"Name": n}),
+            releases={"2": Release("2", None)},
+        )
+        for n in ("b", "a")
+    ]
+
+    print_requirements(iter(packages), option_simple)
+
+    out, err = capsys.readouterr()
+    assert not err
+    assert out.splitlines() == ["b==2", "a==2"]
+
+
+def test_print_requirements_many_pythons(capsys: pytest.CaptureFixture[str], option_simple: Options) -> None:
+    option_simple.python = [Path("/a/python"), Path("/b/python"), Path("/c/python")]
+    option_simple.sort = "alphabetic"
+    packages = []
+    for name, python in [("x", "/b/python"), ("y", "/a/python"), ("x", "/a/python"), ("z", "/c/python")]:
+        dist = create_autospec(PathDistribution, version="1", metadata={"Name": name})
+        dist.python = Path(python)
+        latest = "1" if name == "z" else "2"
+        packages.append(Package(dist, releases={latest: Release(latest, None)}))
+
+    print_requirements(packages, option_simple)
+
+    a, b = Path("/a/python"), Path("/b/python")
+    assert capsys.readouterr().out.splitlines() == [f"# {a}", "x==2", "y==2", f"# {b}", "x==2"]
+
+    option_simple.stream = True
+    print_requirements(packages[:1], option_simple)
+    assert capsys.readouterr().out.splitlines() == [f"x==2  # {b}"]
@@ -1,19 +1,22 @@
 from __future__ import annotations
 
 import sys
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from io import StringIO
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable
 from unittest.mock import create_autospec
 
+import pytest
 from rich.console import Console
 
-from pypi_changes._pkg import Package
-from pypi_changes._print.tree import print_tree
+from pypi_changes._cache import NotCachedError
+from pypi_changes._distributions import file_distributions
+from pypi_changes._pkg import Package, Release
+from pypi_changes._print.tree import _new_tree, _package_text, _print_lines, print_tree
 from tests import PathDistribution
 
 if TYPE_CHECKING:
-    import pytest
     from pytest_mock import MockerFixture
 
     from pypi_changes._cli import Options
@@ -22,12 +25,12 @@ if TYPE_CHECKING:
 def test_print(capsys: pytest.CaptureFixture[str], option_simple: Options, mocker: MockerFixture) -> None:
     mocked_datetime = mocker.patch("pypi_changes._print.tree.datetime")
     mocked_datetime.now.return_value = datetime(2021, 11, 6, 10, tzinfo=timezone.utc)
-    option_simple.python = Path(sys.executable)
+    option_simple.python = [Path(sys.executable)]
     option_simple.sort = "updated"
     packages = [
         Package(
             create_autospec(PathDistribution, spec_set=True, version=v_l, metadata={"Name": n}),
-            info={"releases": {v_u: [{"version": v_u, "upload_time_iso_8601": t}]}},
+            releases={v_u: Release(v_u, t)},
         )
         for n, v_l, v_u, t in [
             ("a", "1", "2", datetime(2021, 10, 5, 10, tzinfo=timezone.utc)),
@@ -52,15 +55,38 @@ def test_print(capsys: pytest.CaptureFixture[str], option_simple: Options, mocke
     ]
 
 
+def test_print_limit(capsys: pytest.CaptureFixture[str], option_simple: Options, mocker: MockerFixture) -> None:
+    mocked_datetime = mocker.patch("pypi_changes._print.tree.datetime")
+    mocked_datetime.now.return_value = datetime(2021, 11, 6, 10, tzinfo=timezone.utc)
+    option_simple.sort = "updated"
+    option_simple.limit = 2
+    packages = [
+        Package(
+            create_autospec(PathDistribution, spec_set=True, version="1", metadata={"Name": n}),
+            releases={"2": Release("2", t)},
+        )
+        for n, t in [
+            ("a", datetime(2021, 10, 5, 10, tzinfo=timezone.utc)),
+            ("b", datetime(2021, 11, 5, 10, tzinfo=timezone.utc)),
+            ("c", datetime(2021, 9, 5, 10, tzinfo=timezone.utc)),
+        ]
+    ]
+
+    print_tree(packages, option_simple)
+
+    output = [i.strip() for i in capsys.readouterr().out.splitlines()]
+    assert output[-2:] == ["├── b 1 remote 2 a day", "└── a 1 remote 2 a month"]
+
+
 def test_print_alphabetical(capsys: pytest.CaptureFixture[str], option_simple: Options, mocker: MockerFixture) -> None:
     mocked_datetime = mocker.patch("pypi_changes._print.tree.datetime")
     mocked_datetime.now.return_value = datetime(2021, 11, 6, 10, tzinfo=timezone.utc)
-    option_simple.python = Path(sys.executable)
+    option_simple.python = [Path(sys.executable)]
     option_simple.sort = "alphabetic"
     packages = [
         Package(
             create_autospec(PathDistribution, spec_set=True, version=v_l, metadata={"Name": n}),
-            info={"releases": {v_u: [{"version": v_u, "upload_time_iso_8601": t}]}},
+            releases={v_u: Release(v_u, t)},
         )
         for n, v_l, v_u, t in [
             ("a", "1", "2", datetime(2021, 10, 5, 10, tzinfo=timezone.utc)),
@@ -89,16 +115,16 @@ def test_major_bump_bold_style(option_simple: Options, mocker: MockerFixture) ->
     mocked_datetime = mocker.patch("pypi_changes._print.tree.datetime")
     mocked_datetime.now.return_value = datetime(2021, 11, 6, 10, tzinfo=timezone.utc)
     mock_print = mocker.patch("pypi_changes._print.tree.rich_print")
-    option_simple.python = Path(sys.executable)
+    option_simple.python = [Path(sys.executable)]
     option_simple.sort = "alphabetic"
     packages = [
         Package(
             create_autospec(PathDistribution, spec_set=True, version="1.0.0", metadata={"Name": "major-bump"}),
-            info={"releases": {"2.0.0": [{"version": "2.0.0", "upload_time_iso_8601": None}]}},
+            releases={"2.0.0": Release("2.0.0", None)},
         ),
         Package(
             create_autospec(PathDistribution, spec_set=True, version="1.0.0", metadata={"Name": "minor-bump"}),
-            info={"releases": {"1.1.0": [{"version": "1.1.0", "upload_time_iso_8601": None}]}},
+            releases={"1.1.0": Release("1.1.0", None)},
         ),
     ]
 
@@ -113,3 +139,155 @@ def test_major_bump_bold_style(option_simple: Options, mocker: MockerFixture) ->
     minor_line = next(line for line in html.splitlines() if "minor-bump" in line)
     assert major_marker in major_line
     assert major_marker not in minor_line
+
+
+@pytest.mark.parametrize("sort", ["updated", "alphabetic"])
+def test_print_stream_inserts_sorted(
+    sort: str, capsys: pytest.CaptureFixture[str], option_simple: Options, mocker: MockerFixture
+) -> None:
+    mocked_datetime = mocker.patch("pypi_changes._print.tree.datetime")
+    mocked_datetime.now.return_value = datetime(2021, 11, 6, 10, tzinfo=timezone.utc)
+    option_simple.python = [Path(sys.executable)]
+    option_simple.sort = sort
+    packages = [
+        Package(
+            create_autospec(PathDistribution, spec_set=True, version=v_l, metadata={"Name": n}),
+            releases={v_u: Release(v_u, t)},
+        )
+        for n, v_l, v_u, t in [
+            ("a", "1", "2", datetime(2021, 10, 5, 10, tzinfo=timezone.utc)),
+            ("b", "3", "3", datetime(2021, 11, 5, 10, tzinfo=timezone.utc)),
+            ("d", "1", "1", None),
+            ("c", "1", "2", None),
+        ]
+    ]
+    print_tree(packages, option_simple)
+    expected = capsys.readouterr().out.splitlines()[-4:]
+
+    option_simple.stream = True
+    print_tree(iter(packages), option_simple)
+
+    out, err = capsys.readouterr()
+    assert not err
+    assert out.splitlines()[-4:] == expected
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_print_many_pythons(
+    stream: bool, capsys: pytest.CaptureFixture[str], option_simple: Options, mocker: MockerFixture
+) -> None:
+    mocked_datetime = mocker.patch("pypi_changes._print.tree.datetime")
+    mocked_datetime.now.return_value = datetime(2021, 11, 6, 10, tzinfo=timezone.utc)
+    option_simple.python = [Path("/a/python"), Path("/b/python")]
+    option_simple.sort = "alphabetic"
+    option_simple.stream = stream
+    packages = []
+    for name, python in [("x", "/b/python"), ("y", "/a/python"), ("x", "/a/python")]:
+        dist = create_autospec(PathDistribution, version="1", metadata={"Name": name})
+        dist.python = Path(python)
+        packages.append(Package(dist, releases={"1": Release("1", None)}))
+
+    print_tree(iter(packages), option_simple)
+
+    output = [i.strip() for i in capsys.readouterr().out.splitlines()]
+    assert output == [
+        f"🐍 Distributions within {Path('/a/python')}",
+        "├── x 1",
+        "└── y 1",
+        f"🐍 Distributions within {Path('/b/python')}",
+        "└── x 1",
+    ]
+
+
+def test_print_not_published(capsys: pytest.CaptureFixture[str], option_simple: Options) -> None:
+    option_simple.python = [Path("/a/python")]
+    option_simple.sort = "alphabetic"
+    dist = create_autospec(PathDistribution, version="1", metadata={"Name": "internal"})
+
+    print_tree([Package(dist, releases=None)], option_simple)
+
+    assert capsys.readouterr().out.splitlines()[-1].strip() == "└── internal 1 not published"
+
+
+def test_print_not_cached(capsys: pytest.CaptureFixture[str], option_simple: Options) -> None:
+    option_simple.python = [Path("/a/python")]
+    option_simple.sort = "alphabetic"
+    dist = create_autospec(PathDistribution, version="1", metadata={"Name": "a"})
+
+    print_tree([Package(dist, releases=NotCachedError("a"))], option_simple)
+
+    assert capsys.readouterr().out.splitlines()[-1].strip() == "└── a 1 not cached"
+
+
+@pytest.mark.parametrize("large", [False, True], ids=["tree", "lines"])
+def test_print_unpinned_requirement(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], option_simple: Options, mocker: MockerFixture, large: bool
+) -> None:
+    if large:
+        mocker.patch("pypi_changes._print.tree._LARGE_TREE", 0)
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("requests>=2\n", encoding="utf-8")
+    [dist] = file_distributions(requirements)
+    option_simple.python = [requirements]
+    option_simple.sort = "alphabetic"
+    pkg = Package(dist, releases={"3.0": Release("3.0", None), "2.0": Release("2.0", None)})
+
+    print_tree([pkg], option_simple)
+
+    assert capsys.readouterr().out.splitlines()[-1].strip() == "└── requests unpinned latest 3.0"
+    assert not pkg.outdated
+
+
+def test_print_large_tree_line_by_line(
+    capsys: pytest.CaptureFixture[str], option_simple: Options, mocker: MockerFixture
+) -> None:
+    mocker.patch("pypi_changes._print.tree._LARGE_TREE", 1)
+    rich_print = mocker.patch("pypi_changes._print.tree.rich_print")
+    option_simple.python = [Path("/a/python")]
+    option_simple.sort = "alphabetic"
+    packages = []
+    for name, version in [("b", "1"), ("a", "1")]:
+        dist = create_autospec(PathDistribution, version=version, metadata={"Name": name})
+        packages.append(Package(dist, releases={"2": Release("2", None)}))
+
+    print_tree(packages, option_simple)
+
+    assert capsys.readouterr().out.splitlines() == [
+        f"🐍 Distributions within {Path('/a/python')}",
+        "├── a 1 remote 2",
+        "└── b 1 remote 2",
+    ]
+    assert rich_print.call_count == 0
+
+
+@pytest.mark.parametrize("no_color", [False, True])
+def test_print_lines_styled_as_tree(no_color: bool) -> None:
+    now = datetime(2021, 11, 6, 10, tzinfo=timezone.utc)
+    packages = [
+        Package(
+            create_autospec(PathDistribution, version=v_l, metadata={"Name": n}),
+            releases=None if v_u is None else {v_u: Release(v_u, datetime(2021, 10, 5, tzinfo=timezone.utc))},
+            fetched_at=fetched_at,
+        )
+        for n, v_l, v_u, fetched_at in [
+            ("a", "1", "2", None),
+            ("b", "1", "1.1", now - timedelta(days=2)),
+            ("c", "1", None, None),
+        ]
+    ]
+
+    def render(how: Callable[[Console], None]) -> str:
+        console = Console(file=StringIO(), force_terminal=True, color_system="truecolor", no_color=no_color, width=200)
+        how(console)
+        return console.file.getvalue()  # ty: ignore[unresolved-attribute]
+
+    def as_tree(console: Console) -> None:
+        tree = _new_tree(Path("/a/python"))
+        for pkg in packages:
+            tree.add(_package_text(pkg, now, link=False))
+        console.print(tree)
+
+    lines = render(lambda console: _print_lines(console, Path("/a/python"), packages, now, link=False))
+    assert lines == render(as_tree)
+    linked = render(lambda console: _print_lines(console, Path("/a/python"), packages, now, link=True))
+    assert "\x1b]8;;https://pypi.org/project/a/#history\x1b\\" in linked
@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+import json
 from typing import TYPE_CHECKING
 
 from virtualenv import cli_run
 
 from pypi_changes import main
+from pypi_changes._pkg import Package, Release
 
 if TYPE_CHECKING:
     from pathlib import Path
 
+    import pytest
+    from pytest_mock import MockerFixture
+
+    from tests import MakeDist
+
 
 def test_pypi_changes_self_output_default(tmp_path: Path) -> None:
     venv = cli_run([str(tmp_path / "venv")], setup_logging=False)
@@ -18,3 +25,17 @@ def test_pypi_changes_self_output_default(tmp_path: Path) -> None:
 def test_pypi_changes_self_output_json(tmp_path: Path) -> None:
     venv = cli_run([str(tmp_path / "venv")], setup_logging=False)
     main([str(venv.creator.exe), "--output", "json"])
+
+
+def test_pypi_changes_only_outdated(
+    tmp_path: Path, mocker: MockerFixture, make_dist: MakeDist, capsys: pytest.CaptureFixture[str]
+) -> None:
+    dists = [make_dist(tmp_path, name, version) for name, version in [("a", "1.0"), ("b", "2.0"), ("c", "1.0")]]
+    mocker.patch("pypi_changes._distributions.collect_distributions", return_value=dists)
+    releases = {"2.0": Release("2.0", None), "1.0": Release("1.0", None)}
+    packages = [Package(dists[0], releases), Package(dists[1], releases), Package(dists[2], None)]
+    mocker.patch("pypi_changes._info.pypi_info", return_value=iter(packages))
+
+    main(["-c", str(tmp_path / "a.sqlite"), "--no-server", "--only-outdated", "-o", "json"])
+
+    assert [pkg["name"] for pkg in json.loads(capsys.readouterr().out)] == ["a"]
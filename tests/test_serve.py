@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import socket
+from threading import Event, Thread
+from typing import TYPE_CHECKING
+
+import pytest
+
+from pypi_changes import main
+from pypi_changes._cli import parse_cli_arguments
+from pypi_changes._info import Lookup
+from pypi_changes._pkg import Package, Release
+from pypi_changes._serve import ReleaseIndex, listening, run_server, served_info, socket_path
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+    from pypi_changes._cli import Options
+    from tests import MakeDist
+    from tests.conftest import PyPIServer
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="serves on a Unix socket")
+
+
+@pytest.fixture
+def serving(option_simple: Options, pypi_server: PyPIServer) -> Iterator[Options]:  # ruff:ignore[unused-function-argument]
+    option_simple.cache_duration = 3600
+    with listening(option_simple) as server:
+        thread = Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield option_simple
+        server.shutdown()
+        thread.join()
+
+
+def test_serve_answers_from_memory(
+    tmp_path: Path, serving: Options, pypi_server: PyPIServer, make_dist: MakeDist
+) -> None:
+    pypi_server.add("a", "1.0", "2.0")
+    serving.not_published = ["internal-*"]
+    distributions = [make_dist(tmp_path, name, "1.0") for name in ("a", "A", "missing", "internal-tool")]
+
+    first = served_info(distributions, serving)
+    second = served_info(distributions[:1], serving)
+
+    assert first is not None
+    assert second is not None
+    by_name = {pkg.name: pkg for pkg in first}
+    assert by_name["a"].last_release is not None
+    assert by_name["a"].last_release.version == "2.0"
+    assert by_name["A"].releases == by_name["a"].releases  # the same project, asked for once
+    assert not by_name["missing"].published
+    assert not by_name["internal-tool"].published
+    assert second[0].releases == by_name["a"].releases
+    assert sorted(pypi_server.requests) == ["/a/json", "/missing/json"]
+
+
+def test_serve_check_delegates(
+    tmp_path: Path, serving: Options, pypi_server: PyPIServer, make_dist: MakeDist, mocker: MockerFixture
+) -> None:
+    pypi_server.add("a", "1.0")
+    mocker.patch("pypi_changes._distributions.collect_distributions", return_value=[make_dist(tmp_path, "a", "0.1")])
+    pypi_info = mocker.patch("pypi_changes._info.pypi_info")
+
+    assert main(["-c", str(serving.cache_path), "-o", "requirements"]) == 0
+
+    assert pypi_info.call_count == 0
+    assert pypi_server.requests == ["/a/json"]
+
+    assert main(["-c", str(serving.cache_path), "-o", "requirements", "--no-server"]) == 0
+    assert pypi_info.call_count == 1
+
+
+def test_serve_other_settings_not_asked(
+    tmp_path: Path,
+    serving: Options,
+    pypi_server: PyPIServer,
+    make_dist: MakeDist,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    pypi_server.add("a", "1.0")
+    serving.source = "simple"
+    serving.cache_duration = 0
+
+    assert served_info([make_dist(tmp_path, "a", "1.0")], serving) is None
+    assert pypi_server.requests == []
+    assert "it runs with other source, cache-duration" in capsys.readouterr().err
+
+
+def test_serve_unanswered_project_looked_up_here(
+    tmp_path: Path, serving: Options, make_dist: MakeDist, mocker: MockerFixture
+) -> None:
+    mocker.patch.object(ReleaseIndex, "get", return_value={})
+
+    assert served_info([make_dist(tmp_path, "a", "1.0")], serving) is None
+
+
+def test_serve_socket_left_behind(tmp_path: Path, option_simple: Options, make_dist: MakeDist) -> None:
+    path = socket_path(option_simple.cache_path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as gone:
+        gone.bind(str(path))
+
+    assert served_info([make_dist(tmp_path, "a", "1.0")], option_simple) is None
+
+
+def test_serve_hanging_not_waited_for(
+    tmp_path: Path, option_simple: Options, make_dist: MakeDist, mocker: MockerFixture
+) -> None:
+    mocker.patch("pypi_changes._serve.ANSWER_TIMEOUT", 0.1)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stuck:  # accepts connections, never answers
+        stuck.bind(str(socket_path(option_simple.cache_path)))
+        stuck.listen()
+
+        assert served_info([make_dist(tmp_path, "a", "1.0")], option_simple) is None
+
+
+def test_serve_command(tmp_path: Path, mocker: MockerFixture, capsys: pytest.CaptureFixture[str]) -> None:
+    cache = tmp_path / "a.sqlite"
+    serve_forever = mocker.patch("socketserver.BaseServer.serve_forever", side_effect=KeyboardInterrupt)
+
+    assert main(["serve", "--cache-path", str(cache), "--jobs", "3", "--source", "simple"]) == 0
+
+    assert serve_forever.call_count == 1
+    assert f"serving at {socket_path(cache)}" in capsys.readouterr().err
+    assert not socket_path(cache).exists()  # removed once stopped
+
+
+def test_serve_arguments(tmp_path: Path) -> None:
+    options = parse_cli_arguments(["serve", "-c", str(tmp_path / "a.sqlite"), "-j", "3", "--cache-duration", "60"])
+
+    assert options.serve
+    assert (options.jobs, options.cache_duration, options.offline, options.not_published) == (3, 60, False, [])
+
+
+def test_serve_already_serving(serving: Options) -> None:
+    assert run_server(serving) == 1
+
+
+def test_serve_keeps_fresh(mocker: MockerFixture) -> None:
+    lookup = mocker.create_autospec(Lookup, instance=True)
+    releases = [{"1.0": Release("1.0", None)}, {"2.0": Release("2.0", None), "1.0": Release("1.0", None)}]
+    lookup.packages.side_effect = lambda dists: [Package(dists[0], releases.pop(0))]
+    monotonic = mocker.patch("pypi_changes._serve.monotonic", side_effect=[100, 105, 111, 111])
+    stop = mocker.create_autospec(Event, instance=True)
+    stop.wait.side_effect = [False, False, True]
+    index = ReleaseIndex(lookup, 10)
+    index.get(["a"])
+
+    index.keep_fresh(stop)  # not yet expired, then expired
+
+    assert [row[0] for row in index.get(["A"])["a"] or []] == ["2.0", "1.0"]
+    assert lookup.packages.call_count == 2  # refreshed in the background, then answered from memory
+    assert stop.wait.call_args_list == [mocker.call(10)] * 3
+    assert monotonic.call_count == 4
+
+
+def test_serve_revalidate_every_check(mocker: MockerFixture) -> None:
+    lookup = mocker.create_autospec(Lookup, instance=True)
+    lookup.packages.side_effect = lambda dists: [Package(dists[0], None)]
+    index = ReleaseIndex(lookup, 0)
+
+    index.get(["a"])
+    index.get(["a"])
+    index.keep_fresh(Event())  # nothing to do
+
+    assert lookup.packages.call_count == 2
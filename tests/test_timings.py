@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import pstats
+import sys
+import time
+from typing import TYPE_CHECKING
+
+from pypi_changes import main
+from pypi_changes._distributions import collect_distributions
+from pypi_changes._info import pypi_info
+from pypi_changes._timings import STEPS, Timings, print_timings
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+
+    from pypi_changes._cli import Options
+    from tests import MakeDist
+    from tests.conftest import PyPIServer
+
+
+def test_timings_inner_phase_not_counted_towards_outer() -> None:
+    timings = Timings()
+
+    with timings.phase("outer"):
+        time.sleep(0.02)
+        for _ in timings.track(iter([1, 2]), "inner", within="outer"):
+            time.sleep(0.01)
+        with timings.phase("inner", within="outer"):
+            time.sleep(0.03)
+
+    assert timings.phases["outer"] >= 0.04
+    assert 0.03 <= timings.phases["inner"] < 0.04
+    assert timings.parents == {"inner": "outer", "outer": None}
+
+
+def test_timings_per_package_steps(
+    tmp_path: Path, option_simple: Options, make_dist: MakeDist, pypi_server: PyPIServer
+) -> None:
+    pypi_server.add("a", "1.0", "2.0")
+    option_simple.cache_duration = 0  # revalidated, so the second run is served by the store
+    cold, warm = Timings(), Timings()
+
+    list(pypi_info([make_dist(tmp_path, "a", "1.0")], option_simple, cold))
+    list(pypi_info([make_dist(tmp_path, "a", "1.0")], option_simple, warm))
+
+    steps, again = cold.packages()["a"], warm.packages()["a"]
+    assert set(steps) == set(STEPS)
+    assert all(steps[i] > 0 for i in ("queue", "connect", "transfer", "cache", "parse", "normalize"))
+    assert steps["index"] < 0.01  # there is no index server to wait for
+    assert again["parse"] == again["normalize"] == 0  # the normalized releases come from the store
+    assert again["cache"] > 0
+    assert "evict" in cold.phases
+
+
+def test_timings_discovery_phases(option_simple: Options) -> None:
+    timings = Timings()
+
+    with timings.phase("discover"):
+        assert collect_distributions(option_simple, timings)
+
+    assert set(timings.phases) == {"interpreter", "metadata", "discover"}
+    assert timings.phases["interpreter"] > 0
+
+
+def test_timings_json(tmp_path: Path, pypi_server: PyPIServer, capsys: pytest.CaptureFixture[str]) -> None:
+    pypi_server.add("a", "1.0")
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("a\nb\n", encoding="utf-8")
+
+    args = ["--prefetch", str(requirements), "--cache-path", str(tmp_path / "a.sqlite"), "--timings", "json"]
+    assert main(args) == 0
+
+    err = capsys.readouterr().err
+    result = json.loads(err[err.index("{") :])
+    assert set(result["phases"]) == {"fetch", "evict"}
+    assert set(result["packages"]) == {"a", "b"}
+    assert result["packages"]["a"]["connect"] > 0
+
+
+def test_timings_table(capsys: pytest.CaptureFixture[str]) -> None:
+    timings = Timings()
+    timings._add_phase("render", None, 1.0)  # ruff:ignore[private-member-access]
+    timings._add_phase("fetch", "render", 0.75)  # ruff:ignore[private-member-access]
+    for at in range(shown := 12):
+        timings.add(f"p{at}", "connect", at / 10)
+    timings.add("p0", "queue", 5)  # waiting for a worker does not make a lookup slow
+
+    print_timings(timings, "table")
+
+    err = capsys.readouterr().err
+    rows = [line.split() for line in err.splitlines()]
+    assert ["render", "0.250", "25%"] in rows
+    assert ["fetch", "0.750", "75%"] in rows
+    assert "   fetch " in err  # indented under render
+    assert "p11" in err
+    assert "p0 " not in err
+    assert f"all {shown}" in err
+
+
+def test_profile(tmp_path: Path, pypi_server: PyPIServer) -> None:
+    pypi_server.add("a", "1.0")
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("a\n", encoding="utf-8")
+    profile = tmp_path / "run.pstats"
+
+    assert main(["--prefetch", str(requirements), "-c", str(tmp_path / "a.sqlite"), "--profile", str(profile)]) == 0
+
+    stats = pstats.Stats(str(profile))
+    functions = {name for _, _, name in stats.stats}  # ty: ignore[unresolved-attribute] # set by load_stats, not declared
+    assert "one_info" in functions  # runs on a worker thread
+    assert "_run" in functions
+    assert sys.getprofile() is None